@@ -1,30 +1,65 @@
 import os
 import json
 import sys
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+import time
+import uuid
+import asyncio
+import click
+from datetime import datetime, timedelta, timezone
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text, or_, type_coerce, LargeBinary
+from sqlalchemy.orm import load_only, deferred, undefer_group
+from sqlalchemy.exc import IntegrityError, DatabaseError
+from sqlalchemy.schema import CreateIndex
 from werkzeug.security import generate_password_hash, check_password_hash
+from jinja2.utils import htmlsafe_json_dumps
 from dotenv import load_dotenv
 
+# Before the backend imports: some of their settings (e.g. METRICS_NODE_HOOK) are read at import
+load_dotenv()
+
 project_root = os.path.abspath(os.path.join(os.getcwd(), '..')) 
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from backend.src.agents.assistant_agent import AssistantAgent
-from backend.src.agents.testing_agent import TestingAgent
-from backend.src.agents.tutoring_agent import TutoringAgent
-
-# Load environment variables
-load_dotenv()
+from backend.src.course_cache import get_generation_version, course_cache_key, failed_parts
+from backend.src.jobs import JobRunner, JobQueueFull, JobEvents
+from backend.src.pipelines.generation import generate_course
+from backend.src.registry import warm_up
+from backend.src.metrics import render_metrics, count_page_cache
+from backend.src.page_cache import get_page_cache, template_version, course_page_key
+from backend.src.catalog import CATALOG, catalog_entries, parse_standards
+from backend.src.compression import CompressedText, get_codec, train_dictionary
+from backend.src.database import database_url, engine_options, configure_engine, commit_with_retry
+from backend.src.logger import logging
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "super_secret_dev_key")
 
-# Database Config
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+# Database Config (see backend/src/database.py)
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 
+# Background generation: bounded worker pool shared by all requests of this process
+# Jobs this process holds are touched every heartbeat; ones left untouched for JOB_STALE_AFTER belonged to a dead worker
+job_runner = JobRunner(
+    max_concurrency=int(os.getenv("GENERATION_WORKERS", "2")),
+    max_pending=int(os.getenv("GENERATION_QUEUE_LIMIT", "20")),
+    heartbeat=lambda job_ids: touch_jobs(job_ids),
+    heartbeat_interval=float(os.getenv("GENERATION_JOB_HEARTBEAT", "30"))
+)
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "24"))
+JOB_STALE_AFTER = timedelta(seconds=int(os.getenv("GENERATION_JOB_TIMEOUT", "120")))
+# Partial content of running jobs, streamed to the course page over SSE
+job_events = JobEvents()
+# Rendered course pages are cached until product.html changes
+COURSE_PAGE_VERSION = template_version(app.jinja_env, ['product.html'])
+# Catalog picker data, in catalog order (the tojson filter sorts keys)
+CATALOG_JSON = htmlsafe_json_dumps(CATALOG)
+
 # Database Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -39,20 +74,402 @@ class Course(db.Model):
     subject = db.Column(db.String(150), nullable=False)
     standard = db.Column(db.Integer, nullable=False)
     
-    intro = db.Column(db.Text, nullable=True)
-    links = db.Column(db.Text, nullable=True)
+    # Shared generated content (see CourseArtifact)
+    artifact_id = db.Column(db.Integer, db.ForeignKey('course_artifact.id'), nullable=True)
+    artifact = db.relationship('CourseArtifact', lazy=True)
     
-    lessons_json = db.Column(db.Text, nullable=True) 
-    tests_json = db.Column(db.Text, nullable=True)
+    # Legacy per-user content, only set on courses saved before the shared store.
+    # Deferred: listing courses never reads it, and it is loaded in one query when accessed.
+    intro = deferred(db.Column(CompressedText, nullable=True), group='content')
+    links = deferred(db.Column(db.Text, nullable=True), group='content')
+    
+    # Pre-normalization blobs, moved into Lesson/Test rows by migrate_course_content()
+    lessons_json = deferred(db.Column(db.Text, nullable=True), group='blobs')
+    tests_json = deferred(db.Column(db.Text, nullable=True), group='blobs')
+
+    __table_args__ = (
+        # Dashboard pages (keyset on id) and the history lookup in product()
+        db.Index('ix_course_user_id_id', 'user_id', 'id'),
+        db.Index('ix_course_user_lookup', 'user_id', 'topic', 'subject', 'standard'),
+    )
+
+class CourseArtifact(db.Model):
+    """Generated course shared by every user asking for the same (topic, subject, standard)."""
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    version = db.Column(db.String(64), nullable=False)
+    topic = db.Column(db.String(150), nullable=False)
+    subject = db.Column(db.String(150), nullable=False)
+    standard = db.Column(db.Integer, nullable=False)
+
+    intro = deferred(db.Column(CompressedText, nullable=True), group='content')
+    links = deferred(db.Column(db.Text, nullable=True), group='content')
+
+    # Pre-normalization blobs, moved into Lesson/Test rows by migrate_course_content()
+    lessons_json = deferred(db.Column(db.Text, nullable=True), group='blobs')
+    tests_json = deferred(db.Column(db.Text, nullable=True), group='blobs')
+
+class Lesson(db.Model):
+    """One lesson of a course. Pages list the titles and fetch each body on demand."""
+    id = db.Column(db.Integer, primary_key=True)
+    # Owned by a shared artifact, or by a legacy per-user course
+    artifact_id = db.Column(db.Integer, db.ForeignKey('course_artifact.id'), nullable=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=True)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.Text, nullable=False)
+    body = db.Column(CompressedText, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_lesson_artifact_position', 'artifact_id', 'position'),
+        db.Index('ix_lesson_course_position', 'course_id', 'position'),
+    )
+
+class Test(db.Model):
+    """Practice quiz for the lesson with the same title."""
+    id = db.Column(db.Integer, primary_key=True)
+    artifact_id = db.Column(db.Integer, db.ForeignKey('course_artifact.id'), nullable=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=True)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.Text, nullable=False)
+    body = db.Column(CompressedText, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_test_artifact_position', 'artifact_id', 'position'),
+        db.Index('ix_test_course_position', 'course_id', 'position'),
+    )
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class GenerationJob(db.Model):
+    """A queued or running course generation, polled by the dashboard."""
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    topic = db.Column(db.String(150), nullable=False)
+    subject = db.Column(db.String(150), nullable=False)
+    standard = db.Column(db.Integer, nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued | running | done | failed
+    phase = db.Column(db.String(20), nullable=False, default='queued')
+    error = db.Column(db.Text, nullable=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='SET NULL'), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    # In-flight lookup in product()
+    __table_args__ = (
+        db.Index('ix_generation_job_user_lookup', 'user_id', 'topic', 'subject', 'standard', 'status'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'phase': self.phase,
+            'error': self.error,
+            'course_id': self.course_id,
+            'status_url': url_for('job_status', job_id=self.id),
+            'result_url': url_for('job_result', job_id=self.id),
+            'view_url': url_for('job_view', job_id=self.id),
+            'events_url': url_for('job_events_stream', job_id=self.id),
+        }
+
+def content_owner(course):
+    """The (column, id) a course's lessons and tests are stored under, shared or legacy."""
+    if course.artifact_id:
+        return 'artifact_id', course.artifact_id
+    return 'course_id', course.id
+
+def add_parts(model, owner, parts):
+    """Adds a {title: html} mapping as ordered Lesson or Test rows (committed by the caller)."""
+    field, owner_id = owner
+    for position, (title, body) in enumerate(parts.items()):
+        db.session.add(model(**{field: owner_id}, position=position, title=title, body=body))
+
+# Columns added after the first release; create_all() does not alter existing tables
+SCHEMA_COLUMNS = {
+    'course': {
+        'artifact_id': 'INTEGER REFERENCES course_artifact (id)',
+    },
+}
+
+def migrate_schema():
+    """
+    Adds missing columns and indexes to tables created by older versions of the app.
+    Every gunicorn worker runs this at import, so another one may get there first.
+    """
+    for table, columns in SCHEMA_COLUMNS.items():
+        for name, ddl in columns.items():
+            if name in {col['name'] for col in inspect(db.engine).get_columns(table)}:
+                continue
+            try:
+                db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+                db.session.commit()
+            except DatabaseError:
+                db.session.rollback()
+                if name not in {col['name'] for col in inspect(db.engine).get_columns(table)}:
+                    raise
+
+    # create_all() only creates the indexes of tables it creates
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+def migrate_course_content():
+    """
+    Moves lessons and tests of older versions out of the JSON blobs into Lesson/Test rows.
+    Workers starting together each claim a row before moving it, so every row is moved once.
+    """
+    moved = 0
+    for model, field in ((CourseArtifact, 'artifact_id'), (Course, 'course_id')):
+        table = model.__table__
+        pending = db.session.query(model.id).filter(or_(model.lessons_json.isnot(None), model.tests_json.isnot(None))).all()
+        db.session.commit()
+
+        # One row at a time: the blobs can be large
+        for (row_id,) in pending:
+            def move():
+                # The no-op update takes the write lock (SQLite) or the row lock, so a worker
+                # migrating the same row waits here, then sees the blobs already cleared
+                db.session.execute(table.update().where(table.c.id == row_id).values(lessons_json=table.c.lessons_json))
+                row = db.session.get(model, row_id, options=[undefer_group('blobs')], populate_existing=True)
+                if row is None or (row.lessons_json is None and row.tests_json is None):
+                    return False
+                add_parts(Lesson, (field, row.id), json.loads(row.lessons_json) if row.lessons_json else {})
+                add_parts(Test, (field, row.id), json.loads(row.tests_json) if row.tests_json else {})
+                row.lessons_json = None
+                row.tests_json = None
+                return True
+
+            moved += commit_with_retry(db.session, move)
+    if moved:
+        logging.info(f"Migrated the lessons and tests of {moved} courses into their own tables.")
+
+def touch_jobs(job_ids):
+    """Job runner heartbeat: the queued and running jobs of this process are still alive."""
+    with app.app_context():
+        def touch():
+            GenerationJob.query.filter(
+                GenerationJob.id.in_(job_ids),
+                GenerationJob.status.in_(['queued', 'running'])
+            ).update({'updated_at': utcnow()}, synchronize_session=False)
+
+        commit_with_retry(db.session, touch)
+
+def expire_stale_jobs():
+    """Fails jobs whose worker process died (after a restart or deploy) without finishing them."""
+    cutoff = utcnow() - JOB_STALE_AFTER
+    stale = GenerationJob.query.filter(
+        GenerationJob.status.in_(['queued', 'running']),
+        GenerationJob.updated_at < cutoff
+    ).all()
+    for job in stale:
+        job.status = 'failed'
+        job.error = 'Generation was interrupted. Please try again.'
+    if stale:
+        db.session.commit()
 
 # Initialize Database
 with app.app_context():
+    configure_engine(db.engine)
     db.create_all()
+    migrate_schema()
+    migrate_course_content()
+    expire_stale_jobs()
+
+# Load the agents, LLM clients and embedding model once, before the first request
+if os.getenv("WARM_UP_ON_START", "1") == "1":
+    warm_up()
 
 # --- Helpers ---
 def check_auth():
     return 'user_id' in session
 
+def course_outline(course):
+    """
+    Returns the intro, links and lesson list of a course without any lesson or
+    test body; the page fetches those one at a time from the fragment routes.
+    """
+    source = course.artifact if course.artifact_id else course
+    field, owner_id = content_owner(course)
+
+    lessons = Lesson.query.options(load_only(Lesson.position, Lesson.title)) \
+        .filter_by(**{field: owner_id}).order_by(Lesson.position).all()
+    tests = {
+        test.title: test.position
+        for test in Test.query.options(load_only(Test.position, Test.title)).filter_by(**{field: owner_id})
+    }
+
+    return {
+        'intro': source.intro,
+        'links': source.links,
+        'lessons': [
+            {
+                'title': lesson.title,
+                'lesson_url': url_for('lesson_fragment', course_id=course.id, position=lesson.position),
+                'test_url': url_for('test_fragment', course_id=course.id, position=tests[lesson.title]) if lesson.title in tests else None,
+            }
+            for lesson in lessons
+        ],
+    }
+
+def find_artifact(topic, subject, standard):
+    return CourseArtifact.query.filter_by(cache_key=course_cache_key(topic, subject, standard)).first()
+
+def save_artifact(topic, subject, standard, intro, links, lessons, tests):
+    """Stores a generated course in the shared store, tolerating a concurrent insert of the same key."""
+    def add():
+        artifact = CourseArtifact(
+            cache_key=course_cache_key(topic, subject, standard),
+            version=get_generation_version(),
+            topic=topic,
+            subject=subject,
+            standard=standard,
+            intro=intro,
+            links=json.dumps(links)
+        )
+        db.session.add(artifact)
+        db.session.flush()
+        add_parts(Lesson, ('artifact_id', artifact.id), lessons)
+        add_parts(Test, ('artifact_id', artifact.id), tests)
+        return artifact
+
+    try:
+        return commit_with_retry(db.session, add)
+    except IntegrityError:
+        db.session.rollback()
+        return find_artifact(topic, subject, standard)
+
+def save_private_course(user_id, topic, subject, standard, content):
+    """
+    Keeps a partly failed generation on the user's own course, out of the shared
+    store, so the next request for it generates the course again.
+    """
+    def add():
+        course = Course(
+            user_id=user_id,
+            topic=topic,
+            subject=subject,
+            standard=standard,
+            intro=content['intro'],
+            links=json.dumps(content['links'])
+        )
+        db.session.add(course)
+        db.session.flush()
+        add_parts(Lesson, ('course_id', course.id), content['lessons'])
+        add_parts(Test, ('course_id', course.id), content['tests'])
+        return course
+
+    return commit_with_retry(db.session, add)
+
+def wants_json():
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+def add_course_for_user(user_id, topic, subject, standard, artifact):
+    artifact_id = artifact.id
+
+    def add():
+        course = Course(
+            user_id=user_id,
+            topic=topic,
+            subject=subject,
+            standard=standard,
+            artifact_id=artifact_id
+        )
+        db.session.add(course)
+        return course
+
+    return commit_with_retry(db.session, add)
+
+def update_job(job_id, **fields):
+    with app.app_context():
+        def apply():
+            job = db.session.get(GenerationJob, job_id)
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = utcnow()
+
+        commit_with_retry(db.session, apply)
+
+def load_job_request(job_id):
+    with app.app_context():
+        job = db.session.get(GenerationJob, job_id)
+        artifact = find_artifact(job.topic, job.subject, job.standard)
+        return job.topic, job.subject, job.standard, artifact.id if artifact else None
+
+def finish_job(job_id, content=None, artifact_id=None):
+    """Stores the generated course (shared unless already stored or partly failed) and links it to the job owner."""
+    with app.app_context():
+        job = db.session.get(GenerationJob, job_id)
+        if artifact_id is not None:
+            artifact = db.session.get(CourseArtifact, artifact_id)
+            course = add_course_for_user(job.user_id, job.topic, job.subject, job.standard, artifact)
+        elif failed_parts(content):
+            logging.warning(f"Generation job {job_id}: {', '.join(failed_parts(content))} failed; not sharing the course.")
+            course = save_private_course(job.user_id, job.topic, job.subject, job.standard, content)
+        else:
+            artifact = save_artifact(
+                job.topic, job.subject, job.standard,
+                content['intro'], content['links'], content['lessons'], content['tests']
+            )
+            course = add_course_for_user(job.user_id, job.topic, job.subject, job.standard, artifact)
+        course_id = course.id
+
+        def link():
+            job.course_id = course_id
+            job.status = 'done'
+            job.phase = 'done'
+            job.updated_at = utcnow()
+
+        commit_with_retry(db.session, link)
+        return course_id
+
+async def run_generation_job(job_id):
+    """Background body of a generation job; runs on the job runner's event loop."""
+    try:
+        topic, subject, standard, artifact_id = await asyncio.to_thread(load_job_request, job_id)
+        await asyncio.to_thread(update_job, job_id, status='running')
+
+        # Another job may have produced the same course while this one was queued
+        if artifact_id is not None:
+            course_id = await asyncio.to_thread(finish_job, job_id, artifact_id=artifact_id)
+        else:
+            async def on_event(event, data):
+                job_events.publish(job_id, event, data)
+                if event == 'phase':
+                    await asyncio.to_thread(update_job, job_id, phase=data['phase'])
+
+            content = await generate_course(topic, subject, standard, on_event=on_event, trace_id=job_id)
+
+            await asyncio.to_thread(update_job, job_id, phase='saving')
+            course_id = await asyncio.to_thread(finish_job, job_id, content=content)
+            logging.info(f"Generation job {job_id} finished.")
+
+        job_events.publish(job_id, 'done', {'course_id': course_id}, final=True)
+
+    except Exception as e:
+        logging.error(f"Generation job {job_id} failed: {e}")
+        print(f"SERVER ERROR: {e}")
+        job_events.publish(job_id, 'error', {'error': str(e)}, final=True)
+        await asyncio.to_thread(update_job, job_id, status='failed', error=str(e))
+
+def conditional_page(body, etag=True):
+    """
+    HTML response with a strong ETag: browsers revalidate on every view and
+    get a bodyless 304 while the page is unchanged.
+    """
+    response = Response(body, mimetype='text/html')
+    if not etag:
+        return response
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 # --- Routes ---
 
 @app.route('/')
@@ -74,13 +491,15 @@ def register():
             return redirect(url_for('register'))
 
         hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
-        new_user = User(username=username, password=hashed_password)
         
         try:
-            db.session.add(new_user)
-            db.session.commit()
+            commit_with_retry(db.session, lambda: db.session.add(User(username=username, password=hashed_password)))
             flash("Registration successful! Please login.", "success")
             return redirect(url_for('login'))
+        except IntegrityError:
+            # Registered by a concurrent request since the check above
+            flash("Username already exists.", "error")
+            return redirect(url_for('register'))
         except Exception as e:
             flash("Registration failed.", "error")
             return redirect(url_for('register'))
@@ -118,8 +537,25 @@ def dashboard():
         flash("Please login.", "error")
         return redirect(url_for('login'))
     
-    user_courses = Course.query.filter_by(user_id=session['user_id']).order_by(Course.id.desc()).all()
-    return render_template('dashboard.html', user=session.get('username'), courses=user_courses)
+    # Keyset pagination on id (newest first), reading only the listed columns
+    before = request.args.get('before', type=int)
+    query = Course.query.options(load_only(Course.id, Course.topic, Course.subject, Course.standard)) \
+        .filter(Course.user_id == session['user_id'])
+    if before:
+        query = query.filter(Course.id < before)
+    page = query.order_by(Course.id.desc()).limit(DASHBOARD_PAGE_SIZE + 1).all()
+
+    user_courses = page[:DASHBOARD_PAGE_SIZE]
+    next_before = user_courses[-1].id if len(page) > DASHBOARD_PAGE_SIZE else None
+    return render_template(
+        'dashboard.html',
+        user=session.get('username'),
+        courses=user_courses,
+        next_before=next_before,
+        paginated=bool(before),
+        job_id=request.args.get('job'),
+        catalog_json=CATALOG_JSON
+    )
 
 @app.route('/course/<int:course_id>')
 def view_course(course_id):
@@ -131,24 +567,59 @@ def view_course(course_id):
         flash("Unauthorized.", "error")
         return redirect(url_for('dashboard'))
     
-    lessons = json.loads(course.lessons_json) if course.lessons_json else {}
-    tests = json.loads(course.tests_json) if course.tests_json else {}
-    
-    return render_template(
-        'product.html',
-        topic=course.topic,
-        subject=course.subject,
-        standard=course.standard,
-        intro=course.intro,
-        links=course.links,
-        lessons=lessons,
-        tests=tests
-    )
+    # The page shows pending flash messages, so those renders are neither cached nor tagged
+    flashes = bool(session.get('_flashes'))
+    cache = get_page_cache() if not flashes else None
+    key = course_page_key(course.id, course.artifact_id, COURSE_PAGE_VERSION)
+    page = cache.get(key) if cache is not None else None
+    if cache is not None:
+        count_page_cache(page is not None)
+
+    if page is None:
+        content = course_outline(course)
+        page = render_template(
+            'product.html',
+            topic=course.topic,
+            subject=course.subject,
+            standard=course.standard,
+            intro=content['intro'],
+            links=content['links'],
+            lessons=content['lessons']
+        )
+        if cache is not None:
+            cache.set(key, page)
+
+    return conditional_page(page, etag=not flashes)
+
+def course_fragment(model, course_id, position):
+    """Body HTML of one lesson or test of a course the user owns."""
+    if not check_auth():
+        return Response("Please login.", status=401, mimetype='text/plain')
+
+    course = db.session.get(Course, course_id)
+    if course is None or course.user_id != session['user_id']:
+        return Response("Not found.", status=404, mimetype='text/plain')
+
+    field, owner_id = content_owner(course)
+    part = model.query.filter_by(**{field: owner_id}, position=position).first()
+    if part is None:
+        return Response("Not found.", status=404, mimetype='text/plain')
+
+    return conditional_page(part.body or '')
+
+@app.route('/course/<int:course_id>/lessons/<int:position>')
+def lesson_fragment(course_id, position):
+    return course_fragment(Lesson, course_id, position)
+
+@app.route('/course/<int:course_id>/tests/<int:position>')
+def test_fragment(course_id, position):
+    return course_fragment(Test, course_id, position)
 
 @app.route('/product', methods=['POST'])
-async def product():
+def product():
     """
-    Orchestrates the 3 AI Agents Asynchronously.
+    Submits a course generation job and returns immediately.
+    Courses already in the user's history or in the shared store are served without a job.
     """
     if not check_auth():
         flash("Please login.", "error")
@@ -172,67 +643,307 @@ async def product():
     
     if existing_course:
         flash("Course loaded from history.", "success")
-        return redirect(url_for('view_course', course_id=existing_course.id))
+        target = url_for('view_course', course_id=existing_course.id)
+        return jsonify(redirect=target) if wants_json() else redirect(target)
 
-    try:
-        # Phase 1: Assistant
-        assistant = AssistantAgent()
-        initial_state = {
-            "standard": int(standard), 
-            "subject": subject, 
-            "topic": topic,
-            "raw_study_links": [],
-            "topic_draft": "",
-            "student_content": "",
-            "instructions": ""
-        }
-        
-        assistant_output = await assistant.graph.ainvoke(initial_state)
-        
-        instructions = assistant_output.get('instructions', '')
-        student_guide_html = assistant_output.get('student_content', '<p>No guide generated.</p>')
-        raw_links_data = assistant_output.get('raw_study_links', [])
+    # Check the shared store: someone may already have generated this course
+    artifact = find_artifact(topic, subject, int(standard))
 
-        # Phase 2: Tutoring
-        tutor = TutoringAgent()
-        lessons = await tutor.run(instructions, int(standard), subject, topic)
+    if artifact:
+        new_course = add_course_for_user(session['user_id'], topic, subject, int(standard), artifact)
+        flash("Course generated successfully!", "success")
+        target = url_for('view_course', course_id=new_course.id)
+        return jsonify(redirect=target) if wants_json() else redirect(target)
+
+    # Reuse a generation of the same course this user already has in flight, unless its worker died
+    job = GenerationJob.query.filter(
+        GenerationJob.user_id == session['user_id'],
+        GenerationJob.topic == topic,
+        GenerationJob.subject == subject,
+        GenerationJob.standard == int(standard),
+        GenerationJob.status.in_(['queued', 'running']),
+        GenerationJob.updated_at >= utcnow() - JOB_STALE_AFTER
+    ).first()
 
-        # Phase 3: Testing
-        tester = TestingAgent()
-        tests = await tester.run(lessons)
-        
-        # Save
-        new_course = Course(
-            user_id=session['user_id'],
-            topic=topic,
-            subject=subject,
-            standard=int(standard),
-            intro=student_guide_html,
-            links=json.dumps(raw_links_data),
-            lessons_json=json.dumps(lessons),
-            tests_json=json.dumps(tests)
-        )
-        db.session.add(new_course)
-        db.session.commit()
-        
+    if job is None:
+        def add_job():
+            job = GenerationJob(
+                user_id=session['user_id'],
+                topic=topic,
+                subject=subject,
+                standard=int(standard)
+            )
+            db.session.add(job)
+            return job
+
+        job = commit_with_retry(db.session, add_job)
+
+        try:
+            job_runner.submit(run_generation_job, job.id, key=job.id)
+            # Only for accepted jobs, so a refused one leaves no buffer behind; open() keeps events already published
+            job_events.open(job.id)
+        except JobQueueFull as e:
+            error = str(e)
+
+            def fail():
+                job.status = 'failed'
+                job.error = error
+
+            commit_with_retry(db.session, fail)
+            if wants_json():
+                return jsonify(job.to_dict()), 503
+            flash(str(e), "error")
+            return redirect(url_for('dashboard'))
+
+    if wants_json():
+        return jsonify(job.to_dict()), 202
+
+    flash("Course generation started. It will open automatically when ready.", "info")
+    return redirect(url_for('dashboard', job=job.id))
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Polled by the dashboard while a course is being generated."""
+    if not check_auth():
+        return jsonify(error="Please login."), 401
+
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != session['user_id']:
+        return jsonify(error="Job not found."), 404
+
+    expire_stale_jobs()
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/view')
+def job_view(job_id):
+    """Course page in streaming mode: content is filled in as the agents produce it."""
+    if not check_auth():
+        return redirect(url_for('login'))
+
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != session['user_id']:
+        flash("Unauthorized.", "error")
+        return redirect(url_for('dashboard'))
+
+    if job.status in ('done', 'failed'):
+        return redirect(url_for('job_result', job_id=job.id))
+
+    return render_template(
+        'product.html',
+        topic=job.topic,
+        subject=job.subject,
+        standard=job.standard,
+        intro=None,
+        links=None,
+        lessons=[],
+        stream_url=url_for('job_events_stream', job_id=job.id)
+    )
+
+@app.route('/jobs/<job_id>/events')
+def job_events_stream(job_id):
+    """
+    Server-sent events for a job: phase, guide, plan, lessons, tests, then done or error.
+    Jobs running in another worker process only report their phase and completion.
+    """
+    if not check_auth():
+        return jsonify(error="Please login."), 401
+
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != session['user_id']:
+        return jsonify(error="Job not found."), 404
+
+    def follow_buffer():
+        for item in job_events.subscribe(job_id):
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            event, data = item
+            if event == 'done':
+                data = dict(data, url=url_for('view_course', course_id=data['course_id']))
+            yield format_sse(event, data)
+
+    def follow_database():
+        last_phase = None
+        while True:
+            db.session.expire_all()
+            current = db.session.get(GenerationJob, job_id)
+            if current.phase != last_phase:
+                last_phase = current.phase
+                yield format_sse('phase', {'phase': current.phase})
+            if current.status == 'done':
+                yield format_sse('done', {
+                    'course_id': current.course_id,
+                    'url': url_for('view_course', course_id=current.course_id)
+                })
+                return
+            if current.status == 'failed':
+                yield format_sse('error', {'error': current.error})
+                return
+            time.sleep(2)
+
+    stream = follow_buffer() if job_events.has(job_id) else follow_database()
+    return Response(
+        stream_with_context(stream),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    if not check_auth():
+        return redirect(url_for('login'))
+
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != session['user_id']:
+        flash("Unauthorized.", "error")
+        return redirect(url_for('dashboard'))
+
+    if job.status == 'done' and job.course_id:
         flash("Course generated successfully!", "success")
+        return redirect(url_for('view_course', course_id=job.course_id))
 
-        return render_template(
-            'product.html',
-            topic=topic,
-            subject=subject,
-            standard=standard,
-            intro=student_guide_html,
-            links=raw_links_data,
-            lessons=lessons,
-            tests=tests
-        )
+    if job.status == 'done':
+        flash("This course has been deleted.", "info")
+        return redirect(url_for('dashboard'))
 
-    except Exception as e:
-        flash(f"Error during generation: {str(e)}", "error")
-        print(f"SERVER ERROR: {e}")
+    if job.status == 'failed':
+        flash(f"Error during generation: {job.error}", "error")
         return redirect(url_for('dashboard'))
 
+    return jsonify(job.to_dict()), 202
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint; set METRICS_TOKEN to require 'Authorization: Bearer <token>'."""
+    token = os.getenv("METRICS_TOKEN")
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# --- Maintenance commands (flask --app app <command>) ---
+
+# Course content stored compressed (see backend/src/compression.py)
+COMPRESSED_COLUMNS = [(Course, 'intro'), (CourseArtifact, 'intro'), (Lesson, 'body'), (Test, 'body')]
+
+@app.cli.command('compress-content')
+@click.option('--batch-size', default=200, show_default=True)
+@click.option('--vacuum/--no-vacuum', default=True, show_default=True, help="Reclaim the freed space (SQLite).")
+def compress_content(batch_size, vacuum):
+    """Rewrites stored course content with the current compression settings."""
+    codec = get_codec()
+    before = after = rewritten = 0
+    for model, column in COMPRESSED_COLUMNS:
+        table = model.__table__.name
+        last_id = 0
+        while True:
+            # Raw values: uncompressed text, or bytes from any codec/dictionary
+            rows = db.session.execute(
+                text(f'SELECT id, {column} FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit'),
+                {'last_id': last_id, 'limit': batch_size}
+            ).fetchall()
+            if not rows:
+                break
+            for row_id, raw in rows:
+                if raw is None or codec.is_current(raw):
+                    continue
+                try:
+                    value = codec.decompress(raw)
+                except ValueError as e:
+                    db.session.commit()
+                    raise click.ClickException(f"{table}.{column} row {row_id}: {e}")
+                # Compressed once here and written as is, bypassing CompressedText, so the size reported is what was stored
+                data = codec.compress(value)
+                db.session.execute(model.__table__.update().where(model.__table__.c.id == row_id).values({column: type_coerce(data, LargeBinary)}))
+                before += len(raw.encode('utf-8') if isinstance(raw, str) else raw)
+                after += len(data)
+                rewritten += 1
+            db.session.commit()
+            last_id = rows[-1][0]
+    click.echo(f"Rewrote {rewritten} values with {codec.codec}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB.")
+    if vacuum and db.engine.dialect.name == 'sqlite':
+        with db.engine.connect() as conn:
+            conn.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+        click.echo("Vacuumed the database.")
+
+@app.cli.command('train-compression-dict')
+@click.argument('path')
+@click.option('--samples', default=2000, show_default=True, help="Most recent lessons and tests to learn from.")
+@click.option('--size', default=64 * 1024, show_default=True, help="Dictionary size in bytes.")
+def train_compression_dict(path, samples, size):
+    """Trains a shared compression dictionary on stored lessons and tests."""
+    bodies = [lesson.body for lesson in Lesson.query.order_by(Lesson.id.desc()).limit(samples)]
+    bodies += [test.body for test in Test.query.order_by(Test.id.desc()).limit(samples)]
+    dictionary = train_dictionary(bodies, size)
+    with open(path, 'wb') as f:
+        f.write(dictionary)
+    click.echo(f"Wrote a {len(dictionary)} byte dictionary from {len(bodies)} samples to {path}.")
+    click.echo("Set COMPRESSION_DICT_PATH to it (keep older dictionaries after it) and run 'flask compress-content'.")
+
+def store_artifact(topic, subject, standard, content):
+    """save_artifact for a generated course, from a worker thread."""
+    with app.app_context():
+        save_artifact(topic, subject, standard, content['intro'], content['links'], content['lessons'], content['tests'])
+
+async def pregenerate_courses(entries, concurrency):
+    """
+    Generates and stores each (topic, subject, standard), at most `concurrency` at a time.
+    LLM calls go through the same key pool and rate limiter as the web app.
+    """
+    gate = asyncio.Semaphore(concurrency)
+    counts = {'done': 0, 'failed': 0}
+
+    async def generate(index, topic, subject, standard):
+        label = f"[{index}/{len(entries)}] {subject} / {topic} / standard {standard}"
+        async with gate:
+            started = time.perf_counter()
+            try:
+                content = await generate_course(topic, subject, standard, trace_id=f"pregen-{course_cache_key(topic, subject, standard)[:16]}")
+                # Courses with failed lessons, quizzes or study links are left for the next run
+                missing = failed_parts(content)
+                if missing:
+                    counts['failed'] += 1
+                    click.echo(f"{label}: {len(missing)} parts failed ({', '.join(missing)[:120]}); not stored")
+                    return
+                await asyncio.to_thread(store_artifact, topic, subject, standard, content)
+            except Exception as e:
+                counts['failed'] += 1
+                click.echo(f"{label}: failed ({e})")
+                return
+            counts['done'] += 1
+            click.echo(f"{label}: stored in {time.perf_counter() - started:.1f}s")
+
+    await asyncio.gather(*[generate(i, *entry) for i, entry in enumerate(entries, 1)])
+    return counts
+
+@app.cli.command('pregenerate')
+@click.option('--standards', default='9-12', show_default=True, help="Standards to cover, e.g. 9-12 or 6,8,10-12.")
+@click.option('--subject', 'subjects', multiple=True, help="Only this catalog subject (repeatable).")
+@click.option('--concurrency', default=int(os.getenv("GENERATION_WORKERS", "2")), show_default=True, help="Courses generated at once.")
+@click.option('--limit', default=0, help="Generate at most this many courses (0: all missing).")
+@click.option('--dry-run', is_flag=True, help="List the courses still to generate and exit.")
+def pregenerate(standards, subjects, concurrency, limit, dry_run):
+    """Generates the catalog courses missing from the shared store, so they open instantly."""
+    try:
+        entries = catalog_entries(parse_standards(standards), list(subjects))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    # The shared store is the checkpoint: each course is saved as it completes, and a
+    # rerun (or a new generation version) only generates what is not stored yet
+    missing = [entry for entry in entries if find_artifact(*entry) is None]
+    pending = missing[:limit] if limit else missing
+    click.echo(f"{len(entries) - len(missing)} of {len(entries)} catalog courses are stored; generating {len(pending)}.")
+    if dry_run:
+        for topic, subject, standard in pending:
+            click.echo(f"  {subject} / {topic} / standard {standard}")
+        return
+
+    started = time.perf_counter()
+    counts = asyncio.run(pregenerate_courses(pending, max(1, concurrency)))
+    click.echo(f"Stored {counts['done']} courses, {counts['failed']} failed, in {time.perf_counter() - started:.0f}s.")
+    if counts['failed']:
+        click.echo("Run the command again to retry the failed ones.")
+
 # --- NEW FEATURE: DELETE COURSE ---
 @app.route('/delete_course/<int:course_id>', methods=['POST'])
 def delete_course(course_id):
@@ -248,9 +959,21 @@ def delete_course(course_id):
         flash("Unauthorized action.", "error")
         return redirect(url_for('dashboard'))
     
+    page_key = course_page_key(course.id, course.artifact_id, COURSE_PAGE_VERSION)
+
     try:
-        db.session.delete(course)
-        db.session.commit()
+        # Shared artifacts keep their content; legacy courses own their rows
+        def delete():
+            Lesson.query.filter_by(course_id=course_id).delete()
+            Test.query.filter_by(course_id=course_id).delete()
+            # ON DELETE SET NULL is not enforced by SQLite (foreign_keys is off), and the id may be reused
+            GenerationJob.query.filter_by(course_id=course_id).update({'course_id': None}, synchronize_session=False)
+            db.session.delete(course)
+
+        commit_with_retry(db.session, delete)
+        cache = get_page_cache()
+        if cache is not None:
+            cache.delete(page_key)
         flash("Course deleted successfully.", "success")
     except Exception as e:
         db.session.rollback()
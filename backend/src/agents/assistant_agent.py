@@ -3,9 +3,10 @@ import os
 import asyncio
 from typing import TypedDict
 from langgraph.graph import StateGraph, END, START
-from langchain_tavily import TavilySearch
 from langchain_core.messages import SystemMessage
-from backend.src.utils import get_llm_1, get_llm_lite_1
+from langchain_core.runnables import RunnableConfig
+from backend.src.utils import get_llm, emit_event
+from backend.src.search import get_search, SearchError
 from backend.src.logger import logging
 from backend.src.exception import CustomException
 from backend.src.prompts.assistant_prompt import STUDENT_GUIDE_PROMPT, TOPIC_EXPLANATION_PROMPT, PLANNER_INSTRUCTIONS_PROMPT
@@ -16,6 +17,7 @@ class AgentState(TypedDict):
     subject: str
     topic: str
     raw_study_links: list[dict[str, str]]  
+    search_failed: bool
     student_content: str  
     instructions: str
     topic_draft: str
@@ -24,13 +26,10 @@ class AssistantAgent:
 
     def __init__(self):
 
-        self.llm_lite = get_llm_lite_1() 
-        self.llm = get_llm_1()
-        self.tool = TavilySearch(
-            max_results=5,
-            topic="general",
-            api_key=os.getenv("TAVILY_API_KEY")
-        )
+        self.llm_lite = get_llm("strong") 
+        self.llm = get_llm("fast")
+        # Tavily (or the offline fake) behind a TTL cache with negative caching
+        self.search = get_search()
         self.graph = self._build_graph()
 
     def _build_graph(self):
@@ -69,24 +68,18 @@ class AssistantAgent:
 
             query = f"Study materials, tutorials, and youtube videos for {topic} in {subject} for grade/standard {standard}"
             
-            response = await self.tool.ainvoke(query)
+            try:
 
-            links = []
-            
-            results_list = []
-            if isinstance(response, list):
-                results_list = response
-            elif isinstance(response, dict) and "results" in response:
-                results_list = response["results"]
-            
-            for item in results_list:
-                if isinstance(item, dict):
-                    links.append({
-                        "url": item.get("url", "No URL"),
-                        "title": item.get("title", item.get("content", "Resource")[:50])
-                    })
+                links = await self.search.search(query)
+
+            except SearchError as e:
+
+                # The guide is still written, without links; the flag keeps the course out of the shared store
+                logging.warning(f"No study links for '{topic}': {e}")
 
-            return {"raw_study_links": links}
+                return {"raw_study_links": [], "search_failed": True}
+
+            return {"raw_study_links": links, "search_failed": False}
 
         except Exception as e:
             logging.error(f"Error in fetching materials: {str(e)}")
@@ -114,7 +107,7 @@ class AssistantAgent:
 
             raise CustomException(e, sys)
 
-    async def _compile_student_guide(self, state: AgentState) -> dict:
+    async def _compile_student_guide(self, state: AgentState, config: RunnableConfig = None) -> dict:
         try:
             logging.info("Synthesizing student guide HTML...")
             
@@ -136,6 +129,9 @@ class AssistantAgent:
             )
 
             response = await self.llm.ainvoke([SystemMessage(content=prompt)])
+
+            await emit_event(config, "guide", {"intro": response.content, "links": raw_links})
+
             return {"student_content": response.content}
 
         except Exception as e:
@@ -1,12 +1,14 @@
 import sys
 import asyncio
-import random
-from typing import TypedDict, List, Dict
-from backend.src.utils import get_llm_2, get_llm_lite_2
+from typing import TypedDict, List, Dict, Union
+from backend.src.utils import get_llm, emit_event
+from backend.src.llm_cache import has_parts
+from backend.src.course_cache import missing_test
 from backend.src.logger import logging
 from backend.src.exception import CustomException
 from langgraph.graph import StateGraph, END, START
 from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
 
 try:
 
@@ -18,15 +20,15 @@ except ImportError:
 
 class AgentState(TypedDict):
 
-    lessons: dict
+    lessons: Union[dict, List[str]]  # lessons by title, or just the planned titles
     tests: dict
 
 class TestingAgent:
 
     def __init__(self):
 
-        self.llm = get_llm_2()       
-        self.llm_lite = get_llm_lite_2() 
+        self.llm = get_llm("fast")       
+        self.llm_lite = get_llm("strong") 
         self.graph = self._build_graph()
 
     def _build_graph(self):
@@ -40,14 +42,14 @@ class TestingAgent:
 
         return graph.compile()
 
-    async def _generate_tests_parallel(self, state: AgentState) -> dict:
+    async def _generate_tests_parallel(self, state: AgentState, config: RunnableConfig = None) -> dict:
 
         try:
 
             logging.info("Testing Agent: Generating tests (Async/Batched)...")
 
             lessons = state["lessons"]
-            lesson_list = list(lessons.keys()) 
+            lesson_list = list(lessons)
             total_lessons = len(lesson_list)
             
             mid_point = total_lessons // 2
@@ -55,57 +57,46 @@ class TestingAgent:
             group_heavy = lesson_list[mid_point:]
 
             BATCH_SIZE = 3 
-            sem = asyncio.Semaphore(2)
 
+            # Pacing and 429 retries are handled by the shared rate limiter behind each model
             async def process_batch(batch_titles: List[str], model):
 
-                async with sem:
+                try:
 
-                    for attempt in range(3):
+                    titles_text = "\n".join([f"- {t}" for t in batch_titles])
+                    
+                    prompt = TEST_BATCH_PROMPT.format(
+                        count=len(batch_titles),
+                        topics_text=titles_text
+                    )
 
-                        try:
+                    res = await model.ainvoke(
+                        [SystemMessage(content=prompt)],
+                        validate=has_parts("|||TEST_SPLIT|||", len(batch_titles))
+                    )
+                    
+                    parts = res.content.split("|||TEST_SPLIT|||")
+                    
+                    results = {}
+                    for i, title in enumerate(batch_titles):
 
-                            await asyncio.sleep(1) 
-                            
-                            titles_text = "\n".join([f"- {t}" for t in batch_titles])
-                            
-                            prompt = TEST_BATCH_PROMPT.format(
-                                count=len(batch_titles),
-                                topics_text=titles_text
-                            )
+                        if i < len(parts):
 
-                            res = await model.ainvoke([SystemMessage(content=prompt)])
-                            
-                            parts = res.content.split("|||TEST_SPLIT|||")
-                            
-                            results = {}
-                            for i, title in enumerate(batch_titles):
+                            results[title] = parts[i].strip()
 
-                                if i < len(parts):
+                        else:
 
-                                    results[title] = parts[i].strip()
+                            results[title] = missing_test(title)
+                    
+                    await emit_event(config, "tests", {"tests": results})
 
-                                else:
+                    return results
 
-                                    results[title] = f"<p>Error: Test content missing for {title}</p>"
-                            
-                            return results
+                except Exception as e:
 
-                        except Exception as e:
+                    logging.error(f"Batch failed: {e}")
 
-                            if "429" in str(e) or "rate limit" in str(e).lower():
-
-                                wait = 10 * (attempt + 1)
-                                logging.warning(f"Test Agent Rate Limit. Waiting {wait}s...")
-                                await asyncio.sleep(wait)
-
-                                continue
-
-                            logging.error(f"Batch failed: {e}")
-
-                            return {t: f"<p>Error generating test: {e}</p>" for t in batch_titles}
-                        
-                    return {t: "<p>Error: Rate limit exhausted</p>" for t in batch_titles}
+                    return {t: missing_test(t) for t in batch_titles}
 
             batches_lite = [group_lite[i:i + BATCH_SIZE] for i in range(0, len(group_lite), BATCH_SIZE)]
             
@@ -135,14 +126,19 @@ class TestingAgent:
 
             raise CustomException(e, sys)
 
-    async def run(self, lessons: dict):
+    async def run(self, lessons: Union[dict, List[str]], on_event=None):
+
+        """Tests only need lesson titles, so this can start as soon as the curriculum is planned."""
 
         try:
 
             logging.info("Running Testing Agent...")
 
             initial_state = {"lessons": lessons, "tests": {}}
-            final_state = await self.graph.ainvoke(input=initial_state)
+            final_state = await self.graph.ainvoke(
+                input=initial_state,
+                config={"configurable": {"on_event": on_event}}
+            )
 
             return final_state["tests"]
         
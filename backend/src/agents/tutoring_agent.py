@@ -1,27 +1,22 @@
 import sys
 import asyncio
-import random
 from typing import TypedDict, List
-from backend.src.utils import get_llm_1, get_llm_lite_1
+from backend.src.utils import get_llm, emit_event
+from backend.src.llm_cache import has_parts
+from backend.src.course_cache import MISSING_LESSON
 from backend.src.logger import logging
 from backend.src.exception import CustomException
 from langgraph.graph import StateGraph, END, START
 from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
 
 # --- RAG IMPORT ---
-# Adjust this import path based on your exact folder structure
-try:
-    from backend.src.pipelines.rag import RAGPipeline
-except ImportError:
-    try:
-        from backend.src.pipelines.rag import RAGPipeline
-    except ImportError:
-        from backend.src.pipelines.rag import RAGPipeline
+from backend.src.registry import get_rag_pipeline
 
 try:
-    from backend.src.prompts.tutoring_prompt import LESSON_PLANNING_PROMPT, LESSON_BATCH_PROMPT
+    from backend.src.prompts.tutoring_prompt import LESSON_PLANNING_PROMPT, LESSON_BATCH_PROMPT, RAG_SOURCE_INSTRUCTION
 except ImportError:
-    from backend.src.prompts.tutoring_prompt import LESSON_PLANNING_PROMPT, LESSON_BATCH_PROMPT
+    from backend.src.prompts.tutoring_prompt import LESSON_PLANNING_PROMPT, LESSON_BATCH_PROMPT, RAG_SOURCE_INSTRUCTION
 
 class AgentState(TypedDict):
     instructions: str
@@ -32,20 +27,29 @@ class AgentState(TypedDict):
     lessons: dict    
 
 class TutoringAgent:
-    def __init__(self):
-        self.llm_lite = get_llm_lite_1() 
-        self.llm = get_llm_1()           
+    def __init__(self, rag_pipeline=None):
+        self.llm_lite = get_llm("strong") 
+        self.llm = get_llm("fast")           
         
-        # 1. Initialize RAG Pipeline (Connects to existing DB)
-        try:
-            self.rag_pipeline = RAGPipeline()
-            logging.info("Tutoring Agent connected to RAG Pipeline.")
-        except Exception as e:
-            logging.error(f"Failed to initialize RAG: {e}")
-            self.rag_pipeline = None
+        # 1. RAG Pipeline: an injected one, else the shared one resolved per generation
+        self.rag_pipeline = rag_pipeline
 
         self.graph = self._build_graph()
 
+    def _get_rag_pipeline(self):
+        """
+        The shared pipeline is looked up at retrieval time, not cached here: this agent
+        is a process singleton, and a failed load (missing index, embedding error) is
+        retried on the next generation instead of leaving the worker without RAG.
+        """
+        if self.rag_pipeline is not None:
+            return self.rag_pipeline
+        try:
+            return get_rag_pipeline()
+        except Exception as e:
+            logging.error(f"RAG pipeline unavailable, generating without source material: {e}")
+            return None
+
     def _build_graph(self):
         graph = StateGraph(AgentState)
         graph.add_node("plan_curriculum", self._plan_curriculum)
@@ -57,7 +61,11 @@ class TutoringAgent:
         
         return graph.compile()
     
-    async def _plan_curriculum(self, state: AgentState) -> dict:
+    @staticmethod
+    def _parse_plan(plannings: str) -> List[str]:
+        return [line.strip() for line in plannings.split("\n") if line.strip()]
+
+    async def _plan_curriculum(self, state: AgentState, config: RunnableConfig = None) -> dict:
         try:
             logging.info("Generating curriculum plan...")
             prompt = LESSON_PLANNING_PROMPT.format(
@@ -67,11 +75,12 @@ class TutoringAgent:
                 instructions=state["instructions"]
             )
             response = await self.llm_lite.ainvoke([SystemMessage(content=prompt)])
+            await emit_event(config, "plan", {"titles": self._parse_plan(response.content)})
             return {"plannings": response.content}
         except Exception as e:
             raise CustomException(e, sys)
         
-    async def _generate_parallel_lessons(self, state: AgentState) -> dict:
+    async def _generate_parallel_lessons(self, state: AgentState, config: RunnableConfig = None) -> dict:
         try:
             logging.info("Generating lessons with RAG & Batching...")
 
@@ -80,87 +89,91 @@ class TutoringAgent:
             subject = state["subject"]
             standard = state["standard"]
             
-            lesson_list = [line.strip() for line in plannings.split("\n") if line.strip()]
+            lesson_list = self._parse_plan(plannings)
+
+            # Prefetch source material for the whole curriculum in one batched
+            # embedding pass and vector search, off the event loop, searching
+            # only the course's subject/standard partition
+            contexts = {}
+
+            # The first lookup may load the embedding model, so it also runs off the loop
+            rag_pipeline = await asyncio.to_thread(self._get_rag_pipeline) if lesson_list else None
+
+            if rag_pipeline and lesson_list:
+                try:
+                    batch_contexts = await asyncio.to_thread(
+                        rag_pipeline.retrieve_context_batch,
+                        lesson_list,
+                        subject=subject,
+                        standard=standard
+                    )
+                    contexts = dict(zip(lesson_list, batch_contexts))
+                except Exception as e:
+                    logging.error(f"RAG prefetch failed, generating without source material: {str(e)}")
 
             # Batch Size Configuration
             BATCH_SIZE = 3
             batches = [lesson_list[i:i + BATCH_SIZE] for i in range(0, len(lesson_list), BATCH_SIZE)]
 
-            sem = asyncio.Semaphore(1) 
-
+            # Pacing and 429 retries are handled by the shared rate limiter behind self.llm,
+            # which also bounds how many of these batches are in flight per API key.
             async def generate_batch_safe(batch_titles: List[str]):
-                async with sem:  
-                    for attempt in range(5):
-                        try:
-                            await asyncio.sleep(0.8) 
-                            
-                            # 2. RAG CONTEXT RETRIEVAL
-                            # We construct a rich prompt containing the Source Material for each lesson
-                            formatted_lesson_requests = []
-                            
-                            for title in batch_titles:
-                                context_text = "No source material found."
-                                
-                                if self.rag_pipeline:
-                                    # Run retrieval in a thread to prevent blocking the async loop
-                                    context_text = await asyncio.to_thread(
-                                        self.rag_pipeline.retrieve_context, 
-                                        query=title
-                                    )
-                                
-                                # Create a block for the prompt
-                                lesson_block = f"""
-                                ---
-                                TARGET LESSON: {title}
-                                VERIFIED SOURCE MATERIAL FROM TEXTBOOK:
-                                {context_text}
-                                ---
-                                """
-                                formatted_lesson_requests.append(lesson_block)
-
-                            # Join all blocks to send to LLM
-                            full_titles_text = "\n".join(formatted_lesson_requests)
-                            
-                            # 3. Inject into Prompt
-                            # We update the prompt text to explicitly mention the source material usage
-                            formatted_prompt = LESSON_BATCH_PROMPT.format(
-                                count=len(batch_titles),
-                                titles_text=full_titles_text,
-                                topic=topic,
-                                subject=subject,
-                                standard=standard
-                            )
-                            
-                            # Append specific RAG instruction dynamically
-                            formatted_prompt += "\n\nCRITICAL INSTRUCTION: Use the provided 'VERIFIED SOURCE MATERIAL' to write the lesson content. Do not hallucinate information if it is present in the source."
-
-                            res = await self.llm.ainvoke([SystemMessage(content=formatted_prompt)])
-                            raw_content = res.content
-                            
-                            split_content = raw_content.split("|||LESSON_SPLIT|||")
-                            
-                            batch_results = {}
-                            for i, title in enumerate(batch_titles):
-                                if i < len(split_content):
-                                    batch_results[title] = split_content[i].strip()
-                                else:
-                                    batch_results[title] = "<p>Error: Content missing from batch response.</p>"
-                            
-                            logging.info(f"Generated batch of {len(batch_titles)} lessons using RAG.")
-                            return batch_results
+                try:
+                    # 2. RAG CONTEXT RETRIEVAL
+                    # We construct a rich prompt containing the Source Material for each lesson
+                    formatted_lesson_requests = []
+                    
+                    for title in batch_titles:
+                        context_text = contexts.get(title) or "No source material found."
                         
-                        except Exception as e:
-                            error_msg = str(e).lower()
-                            if "429" in error_msg or "rate limit" in error_msg:
-                                wait_time = 15 * (attempt + 1) + random.uniform(0, 5)
-                                logging.warning(f"Rate limit hit. Waiting {wait_time:.1f}s...")
-                                await asyncio.sleep(wait_time)
-                                continue 
-                            else:
-                                logging.error(f"Failed to generate batch: {str(e)}")
-                                return {title: f"<p>Error: {str(e)}</p>" for title in batch_titles}
+                        # Create a block for the prompt
+                        lesson_block = f"""
+                        ---
+                        TARGET LESSON: {title}
+                        VERIFIED SOURCE MATERIAL FROM TEXTBOOK:
+                        {context_text}
+                        ---
+                        """
+                        formatted_lesson_requests.append(lesson_block)
+
+                    # Join all blocks to send to LLM
+                    full_titles_text = "\n".join(formatted_lesson_requests)
+                    
+                    # 3. Inject into Prompt
+                    # We update the prompt text to explicitly mention the source material usage
+                    formatted_prompt = LESSON_BATCH_PROMPT.format(
+                        count=len(batch_titles),
+                        titles_text=full_titles_text,
+                        topic=topic,
+                        subject=subject,
+                        standard=standard
+                    )
+                    
+                    # Append specific RAG instruction dynamically
+                    formatted_prompt += RAG_SOURCE_INSTRUCTION
+
+                    res = await self.llm.ainvoke(
+                        [SystemMessage(content=formatted_prompt)],
+                        validate=has_parts("|||LESSON_SPLIT|||", len(batch_titles))
+                    )
+                    raw_content = res.content
                     
-                    return {title: "<p>Error: Rate limit exhausted.</p>" for title in batch_titles}
+                    split_content = raw_content.split("|||LESSON_SPLIT|||")
+                    
+                    batch_results = {}
+                    for i, title in enumerate(batch_titles):
+                        if i < len(split_content):
+                            batch_results[title] = split_content[i].strip()
+                        else:
+                            batch_results[title] = MISSING_LESSON
+                    
+                    logging.info(f"Generated batch of {len(batch_titles)} lessons using RAG.")
+                    await emit_event(config, "lessons", {"lessons": batch_results})
+                    return batch_results
+                
+                except Exception as e:
+                    logging.error(f"Failed to generate batch: {str(e)}")
+                    return {title: MISSING_LESSON for title in batch_titles}
 
             tasks = [generate_batch_safe(batch) for batch in batches]
             results = await asyncio.gather(*tasks)
@@ -175,14 +188,17 @@ class TutoringAgent:
         except Exception as e:
             raise CustomException(e, sys)
 
-    async def run(self, instructions: str, standard: int, subject: str, topic: str):
+    async def run(self, instructions: str, standard: int, subject: str, topic: str, on_event=None):
         try: 
             logging.info(f"Starting Tutoring Agent for: {topic}")
             initial_state = {
                 "instructions": instructions, "standard": standard, 
                 "subject": subject, "topic": topic, "lessons": {}
             }
-            final_state = await self.graph.ainvoke(input=initial_state)
+            final_state = await self.graph.ainvoke(
+                input=initial_state,
+                config={"configurable": {"on_event": on_event}}
+            )
             logging.info("Tutoring Agent finished.")
             return final_state["lessons"]
         except Exception as e:
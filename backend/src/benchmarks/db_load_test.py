@@ -0,0 +1,278 @@
+"""
+Concurrent write load test for the app database. N worker processes (like
+gunicorn workers) hit the real routes through Flask's test client:
+registrations, /product adding a course from the shared store to a user's
+history, and course deletions, plus saves of freshly generated courses
+(intro, lessons and quizzes) the way finish_job stores them. Reports
+writes/sec, latency percentiles, failed writes and commit retries.
+--baseline runs with the previous settings (rollback journal, full fsync,
+no commit retries) to compare against.
+
+    python -m backend.src.benchmarks.db_load_test --workers 8 --ops 150 --output db_report.json
+    python -m backend.src.benchmarks.db_load_test --workers 8 --ops 150 --baseline
+"""
+import os
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime, timezone
+from backend.src.benchmarks.rag_bench import SUBJECTS, percentiles, git_commit
+from backend.src.fake_llm import WORDS
+
+OPERATIONS = ["register", "product", "delete", "save"]
+BASELINE_ENV = {
+    "SQLITE_JOURNAL_MODE": "DELETE",
+    "SQLITE_SYNCHRONOUS": "FULL",
+    "SQLITE_BUSY_TIMEOUT": "5000",
+    "DB_COMMIT_ATTEMPTS": "1"
+}
+
+def configure(args, scratch: str):
+
+    """Set before app is imported, here and (inherited) in every worker."""
+
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(scratch, 'load.db')}",
+        "WARM_UP_ON_START": "0",
+        "METRICS_NODE_HOOK": "0"
+    })
+
+    if args.baseline:
+
+        os.environ.update(BASELINE_ENV)
+
+def course_parts(rng: random.Random, count: int, words: int) -> dict:
+
+    return {
+        f"Lesson {i + 1}: {rng.choice(WORDS).title()}": f"<h3>Lesson {i + 1}</h3><p>{' '.join(rng.choice(WORDS) for _ in range(words))}</p>"
+        for i in range(count)
+    }
+
+def save_course(app_module, rng: random.Random, topic: str, lessons: int):
+
+    """One generated course, stored as finish_job stores it."""
+
+    subject = SUBJECTS[rng.randrange(4)]
+    standard = rng.randint(9, 12)
+    links = [{"title": f"Reading on {topic}", "url": f"https://example.com/{topic.replace(' ', '-')}"}]
+
+    return app_module.save_artifact(
+        topic, subject, standard, f"<p>Introduction to {topic}</p>", links,
+        course_parts(rng, lessons, 300), course_parts(rng, lessons, 120)
+    )
+
+def seed(args) -> tuple:
+
+    """Shared courses to add from, and one signed-up user per worker."""
+
+    import app as app_module
+
+    rng = random.Random(args.seed)
+
+    with app_module.app.app_context():
+
+        artifacts = [
+            (artifact.topic, artifact.subject, artifact.standard)
+            for artifact in (save_course(app_module, rng, f"Shared topic {args.run}-{i}", args.lessons) for i in range(args.artifacts))
+        ]
+        users = []
+
+        for index in range(args.workers):
+
+            user = app_module.User(username=f"load-home-{args.run}-{index}", password="-")
+            app_module.db.session.add(user)
+            app_module.db.session.commit()
+            users.append(user.id)
+
+    return artifacts, users
+
+def worker(index: int, args, artifacts: list, user_id: int, barrier, results):
+
+    import app as app_module
+    from backend.src.metrics import DB_COMMIT_RETRIES
+
+    rng = random.Random(f"{args.seed}:{index}")
+    weights = [args.register_weight, args.product_weight, args.delete_weight, args.save_weight]
+    client = app_module.app.test_client()
+    owned = {}
+    latencies = {op: [] for op in OPERATIONS}
+    failed = {op: 0 for op in OPERATIONS}
+    errors = []
+
+    with client.session_transaction() as s:
+
+        s["user_id"] = user_id
+
+    def request_ok(response) -> bool:
+
+        with client.session_transaction() as s:
+
+            flashes = s.pop("_flashes", [])
+            s["user_id"] = user_id
+
+        return response.status_code < 500 and not any(category == "error" for category, _ in flashes)
+
+    barrier.wait()
+    started = time.time()
+
+    for i in range(args.ops):
+
+        op = rng.choices(OPERATIONS, weights)[0]
+        available = [a for a in artifacts if a not in owned]
+
+        # Keep every operation a write: add when nothing is left to delete and vice versa
+        if op == "delete" and not owned:
+
+            op = "product"
+
+        if op == "product" and not available:
+
+            op = "delete"
+
+        op_started = time.perf_counter()
+
+        try:
+
+            if op == "register":
+
+                response = client.post("/register", data={"username": f"load-{args.run}-{index}-{i}", "password": "load-test"})
+                ok = request_ok(response)
+
+            elif op == "product":
+
+                topic, subject, standard = rng.choice(available)
+                response = client.post("/product", data={"topic": topic, "subject": subject, "standard": standard})
+                ok = request_ok(response) and "/course/" in response.headers.get("Location", "")
+
+                if ok:
+
+                    owned[(topic, subject, standard)] = int(response.headers["Location"].rstrip("/").split("/")[-1])
+
+            elif op == "delete":
+
+                key = rng.choice(list(owned))
+                response = client.post(f"/delete_course/{owned.pop(key)}")
+                ok = request_ok(response)
+
+            else:
+
+                with app_module.app.app_context():
+
+                    artifact = save_course(app_module, rng, f"Load topic {args.run}-{index}-{i}", args.lessons)
+                    app_module.add_course_for_user(user_id, artifact.topic, artifact.subject, artifact.standard, artifact)
+
+                ok = True
+
+        except Exception as e:
+
+            ok = False
+            errors.append(f"{op}: {e}"[:200])
+
+        latencies[op].append((time.perf_counter() - op_started) * 1000)
+        failed[op] += not ok
+
+    results.put({
+        "started": started,
+        "finished": time.time(),
+        "latencies": latencies,
+        "failed": failed,
+        "errors": errors[:5],
+        "retries": {key[0]: value for key, value in DB_COMMIT_RETRIES.totals().items()}
+    })
+
+def run(args) -> dict:
+
+    with tempfile.TemporaryDirectory() as scratch:
+
+        configure(args, scratch)
+        artifacts, users = seed(args)
+
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(args.workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(i, args, artifacts, users[i], barrier, results))
+            for i in range(args.workers)
+        ]
+
+        for process in processes:
+
+            process.start()
+
+        reports = [results.get() for _ in processes]
+
+        for process in processes:
+
+            process.join()
+
+    wall = max(r["finished"] for r in reports) - min(r["started"] for r in reports)
+    operations = {}
+
+    for op in OPERATIONS:
+
+        samples = [ms for r in reports for ms in r["latencies"][op]]
+
+        if samples:
+
+            failures = sum(r["failed"][op] for r in reports)
+            operations[op] = {"count": len(samples), "failed": failures, **percentiles(samples)}
+
+    total = sum(entry["count"] for entry in operations.values())
+    failures = sum(entry["failed"] for entry in operations.values())
+    retries = {outcome: sum(r["retries"].get(outcome, 0) for r in reports) for outcome in ("retried", "gave_up")}
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            key: getattr(args, key) for key in (
+                "workers", "ops", "artifacts", "lessons", "register_weight", "product_weight",
+                "delete_weight", "save_weight", "baseline", "seed"
+            )
+        },
+        "database": "custom" if args.database_url else "sqlite",
+        "wall_seconds": round(wall, 3),
+        "writes": total - failures,
+        "failed_writes": failures,
+        "writes_per_sec": round((total - failures) / wall, 1) if wall else 0.0,
+        "commit_retries": retries,
+        "operations": operations,
+        "sample_errors": [e for r in reports for e in r["errors"]][:10]
+    }
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Concurrent database write load test.")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes writing at once")
+    parser.add_argument("--ops", type=int, default=100, help="operations per worker")
+    parser.add_argument("--artifacts", type=int, default=20, help="shared courses /product adds from")
+    parser.add_argument("--lessons", type=int, default=20, help="lessons (and quizzes) per saved course")
+    parser.add_argument("--register-weight", type=float, default=1.0, help="registrations hash the password (CPU bound)")
+    parser.add_argument("--product-weight", type=float, default=4.0)
+    parser.add_argument("--delete-weight", type=float, default=3.0)
+    parser.add_argument("--save-weight", type=float, default=2.0)
+    parser.add_argument("--baseline", action="store_true", help="rollback journal, FULL fsync and no commit retries")
+    parser.add_argument("--database-url", default=None, help="load test this database instead of a scratch SQLite file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+    # Unique names, so runs against a persistent --database-url do not collide
+    args.run = uuid.uuid4().hex[:8]
+
+    report = run(args)
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+
+        with open(args.output, "w") as f:
+
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+
+    main()
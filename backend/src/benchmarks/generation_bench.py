@@ -0,0 +1,227 @@
+"""
+End-to-end benchmark of the /product orchestration without API keys: the
+Assistant, Tutoring and Testing agents run through generate_course against
+FakeChatGroq (LLM_BACKEND=fake), the offline search backend and a small
+hash-embedded RAG index, behind the real pool, rate limiter and concurrency
+gates. Reports wall time, per-phase milestones, per-node time, LLM calls,
+retries, limiter waits and simulated tokens, so batching and concurrency
+changes can be compared run to run.
+
+    python -m backend.src.benchmarks.generation_bench --courses 2 --keys 2 --rate-limit-rate 0.05 --output gen_report.json
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timezone
+from backend.src.benchmarks.rag_bench import SUBJECTS, HashEmbeddings, synthetic_corpus, git_commit
+
+def configure(args):
+
+    """Everything offline and uncached, set before the first pool or client is built."""
+
+    from backend.src.utils import llm_tiers
+
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "SEARCH_BACKEND": "fake",
+        "LLM_CACHE_ENABLED": "0",
+        "SEARCH_CACHE_ENABLED": "0",
+        "EMBEDDING_CACHE_PATH": "",
+        "RATE_LIMIT_DB": "",
+        "METRICS_TRACE_DIR": args.trace_dir,
+        "FAKE_LLM_KEYS": str(args.keys),
+        "FAKE_LLM_LATENCY": str(args.latency),
+        "FAKE_LLM_JITTER": str(args.jitter),
+        "FAKE_LLM_LATENCY_DISTRIBUTION": args.distribution,
+        "FAKE_LLM_TOKENS_PER_SEC": str(args.tokens_per_sec),
+        "FAKE_LLM_429_RATE": str(args.rate_limit_rate),
+        "FAKE_LLM_RETRY_AFTER": str(args.retry_after),
+        "FAKE_LLM_LESSON_TOKENS": str(args.lesson_tokens),
+        "FAKE_LLM_TEST_TOKENS": str(args.test_tokens),
+        "FAKE_LLM_SEED": str(args.seed),
+        "LLM_MAX_CONCURRENCY": str(args.max_concurrency)
+    })
+
+    for name in ("GROQ_API_KEYS", "GROQ_API_KEY"):
+
+        os.environ.pop(name, None)
+
+    index = 1
+
+    while os.environ.pop(f"GROQ_API_KEY_{index}", None) is not None:
+
+        index += 1
+
+    models = {model for tier in llm_tiers().values() for model in tier}
+    os.environ["RATE_LIMITS"] = json.dumps({model: {"rpm": args.rpm, "tpm": args.tpm} for model in models})
+
+def build_rag(directory: str, docs: int, seed: int):
+
+    from backend.src.pipelines.rag import RAGPipeline
+
+    rag = RAGPipeline(embeddings=HashEmbeddings(), model_id="hash-384", backend="flat",
+                      directory=os.path.join(directory, "index"))
+
+    if docs:
+
+        corpus_dir = os.path.join(directory, "corpus")
+        synthetic_corpus(corpus_dir, docs, 0, seed=seed)
+        rag.ingestion_engine(workers=1, by_folder=True).ingest(corpus_dir)
+
+    return rag
+
+async def generate_one(index: int) -> dict:
+
+    from backend.src.pipelines.generation import generate_course
+    from backend.src.course_cache import failed_parts
+
+    subject = SUBJECTS[index % 4]
+    standard = 9 + index % 4
+    milestones = {}
+    started = time.perf_counter()
+
+    async def on_event(event, data):
+
+        label = f"phase:{data['phase']}" if event == "phase" else f"first_{event}"
+        milestones.setdefault(label, round(time.perf_counter() - started, 3))
+
+    content = await generate_course(f"Benchmark topic {index}", subject, standard, on_event=on_event, trace_id=f"course-{index}")
+    missing = failed_parts(content)
+
+    return {
+        "course": index,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "milestones": milestones,
+        "lessons": len(content["lessons"]),
+        "tests": len(content["tests"]),
+        "failed_parts": len(missing)
+    }
+
+async def run_courses(courses: int) -> tuple:
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[generate_one(i) for i in range(courses)])
+
+    return time.perf_counter() - started, results
+
+def node_report(trace_dir: str, courses: int) -> dict:
+
+    """Per-node runs, total, mean and max seconds over the traces of every course."""
+
+    nodes = {}
+
+    for index in range(courses):
+
+        with open(os.path.join(trace_dir, f"course-{index}.json")) as f:
+
+            summary = json.load(f)["summary"]
+
+        for name, entry in summary.items():
+
+            kind, _, node = name.partition(":")
+
+            if kind != "node":
+
+                continue
+
+            total = nodes.setdefault(node, {"runs": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            total["runs"] += entry["count"]
+            total["total_seconds"] += entry["total_seconds"]
+            total["max_seconds"] = max(total["max_seconds"], entry["max_seconds"])
+
+    return {
+        node: {
+            "runs": entry["runs"],
+            "total_seconds": round(entry["total_seconds"], 3),
+            "mean_seconds": round(entry["total_seconds"] / entry["runs"], 3),
+            "max_seconds": round(entry["max_seconds"], 3)
+        }
+        for node, entry in sorted(nodes.items())
+    }
+
+def run(args) -> dict:
+
+    from backend.src import registry
+    from backend.src.fake_llm import fake_usage
+    from backend.src.rate_limiter import get_rate_limiter
+    from backend.src.utils import get_llm, llm_tiers
+
+    with tempfile.TemporaryDirectory() as scratch:
+
+        args.trace_dir = args.trace_dir or os.path.join(scratch, "traces")
+        configure(args)
+        registry.register("rag_pipeline", build_rag(scratch, args.rag_docs, args.seed))
+
+        # Agents and pools are built before the clock starts, as after warm_up() in the app
+        registry.get_assistant_agent()
+        registry.get_tutoring_agent()
+        registry.get_testing_agent()
+
+        fake_usage.reset()
+        wall, courses = asyncio.run(run_courses(args.courses))
+        nodes = node_report(args.trace_dir, args.courses)
+
+    limiter = get_rate_limiter()
+    llm = fake_usage.stats()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            key: getattr(args, key) for key in (
+                "courses", "keys", "latency", "jitter", "distribution", "tokens_per_sec", "rate_limit_rate",
+                "retry_after", "lesson_tokens", "test_tokens", "rpm", "tpm", "max_concurrency", "rag_docs", "seed"
+            )
+        },
+        "wall_seconds": round(wall, 3),
+        "courses": courses,
+        "nodes": nodes,
+        "llm": llm,
+        "simulated_tokens_per_sec": round(llm["output_tokens"] / wall, 1) if wall else 0.0,
+        "retries": {
+            "pool": {tier: get_llm(tier).retries for tier in llm_tiers()},
+            "rate_limited": llm["rate_limited"],
+            "limiter_waits": limiter.waits,
+            "limiter_wait_seconds": round(limiter.wait_seconds, 3),
+            "limiter_throttled": limiter.throttled
+        }
+    }
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Offline end-to-end course generation benchmark.")
+    parser.add_argument("--courses", type=int, default=1, help="courses generated concurrently")
+    parser.add_argument("--keys", type=int, default=2, help="synthetic API keys in each pool")
+    parser.add_argument("--latency", type=float, default=0.3, help="mean time to first token (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="lognormal sigma, or +/- fraction for uniform")
+    parser.add_argument("--distribution", default="lognormal", help="fixed | uniform | lognormal")
+    parser.add_argument("--tokens-per-sec", type=float, default=800.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after carried by injected 429s")
+    parser.add_argument("--lesson-tokens", type=int, default=600)
+    parser.add_argument("--test-tokens", type=int, default=250)
+    parser.add_argument("--rpm", type=int, default=1000, help="client-side quota per key and model (Groq free tier: 30)")
+    parser.add_argument("--tpm", type=int, default=1000000, help="client-side quota per key and model (Groq free tier: 6000)")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="LLM_MAX_CONCURRENCY per key and model")
+    parser.add_argument("--rag-docs", type=int, default=200, help="fact sheets in the offline RAG index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-dir", default=None, help="keep the per-course trace JSON here")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+
+        with open(args.output, "w") as f:
+
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+
+    main()
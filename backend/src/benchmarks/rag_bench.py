@@ -0,0 +1,248 @@
+"""
+Offline, reproducible benchmark for RAGPipeline: no network and no model
+download. A seeded synthetic corpus (one fact sheet per chunk, spread over
+subject/standard folders) is ingested through the real ingestion engine,
+then questions written from known gold chunks measure retrieval latency,
+recall@k with and without partitioning, and memory. The JSON report carries
+the git commit so runs can be compared across changes.
+
+    python -m backend.src.benchmarks.rag_bench --docs 5000 --backend flat --output rag_report.json
+"""
+import os
+import re
+import json
+import time
+import zlib
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from backend.src.benchmarks.vector_index_bench import rss_mb
+
+SUBJECTS = ["physics", "chemistry", "biology", "mathematics", "history", "geography"]
+
+class HashEmbeddings(Embeddings):
+
+    """
+    Feature-hashed bag of words: deterministic, instant, and lexical enough
+    that questions sharing keywords with a chunk retrieve it.
+    """
+
+    def __init__(self, dim: int = 384):
+
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+
+        for token in re.findall(r"\w+", text.lower()):
+
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+
+        norm = np.linalg.norm(vector)
+
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+
+        return self._embed(text)
+
+def pseudo_words(rng, count: int) -> List[str]:
+
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "zu", "pe", "dra", "gli", "tho", "xen", "qua", "bri"]
+    words = set()
+
+    while len(words) < count:
+
+        words.add("".join(rng.choice(syllables, size=rng.integers(2, 5))))
+
+    return sorted(words)
+
+def synthetic_corpus(directory: str, docs: int, questions: int, subjects: int = 4, seed: int = 0) -> list:
+
+    """
+    Writes <directory>/<subject>/<standard>/book.txt files of ~900 character
+    fact sheets (one chunk each) and returns questions as
+    [{"question", "marker", "subject", "standard"}, ...].
+    """
+
+    rng = np.random.default_rng(seed)
+    vocabulary = pseudo_words(rng, 20000)
+    common = pseudo_words(np.random.default_rng(seed + 1), 150)
+    books = {}
+    facts = []
+
+    for i in range(docs):
+
+        subject = SUBJECTS[i % subjects]
+        standard = 9 + (i // subjects) % 4
+        marker = f"factsheet{i:06d}"
+        keywords = list(rng.choice(vocabulary, size=30, replace=False))
+        words = [marker] + keywords + list(rng.choice(common, size=60))
+        rng.shuffle(words[1:])
+        text = " ".join(words)[:950]
+
+        books.setdefault((subject, standard), []).append(text)
+        facts.append((marker, keywords, subject, standard))
+
+    for (subject, standard), sheets in books.items():
+
+        folder = os.path.join(directory, subject, str(standard))
+        os.makedirs(folder, exist_ok=True)
+
+        with open(os.path.join(folder, "book.txt"), "w") as f:
+
+            f.write("\n\n".join(sheets))
+
+    picks = rng.choice(len(facts), size=min(questions, len(facts)), replace=False)
+
+    return [
+        {
+            "question": " ".join(list(rng.choice(facts[i][1], size=6, replace=False)) + list(rng.choice(common, size=3))),
+            "marker": facts[i][0],
+            "subject": facts[i][2],
+            "standard": facts[i][3]
+        }
+        for i in picks
+    ]
+
+def percentiles(samples: List[float]) -> dict:
+
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "mean_ms": round(float(np.mean(samples)), 3)
+    }
+
+def git_commit() -> str:
+
+    try:
+
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+
+    except Exception:
+
+        return ""
+
+def run(docs: int, questions: int, subjects: int, backend: str, precision: str, k_values: List[int],
+        embeddings: str, workers: int, batch_size: int, seed: int) -> dict:
+
+    from backend.src.pipelines.rag import RAGPipeline, EMBEDDING_MODEL
+
+    # Never touch the real on-disk embedding cache
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+    baseline = rss_mb()
+
+    with tempfile.TemporaryDirectory() as scratch:
+
+        corpus_dir = os.path.join(scratch, "corpus")
+        question_set = synthetic_corpus(corpus_dir, docs, questions, subjects, seed)
+
+        if embeddings == "hash":
+
+            base, model_id = HashEmbeddings(), "hash-384"
+
+        else:
+
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+
+            base, model_id = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL), EMBEDDING_MODEL
+
+        started = time.perf_counter()
+        rag = RAGPipeline(embeddings=base, model_id=model_id, backend=backend,
+                          directory=os.path.join(scratch, "index"), precision=precision)
+        open_seconds = time.perf_counter() - started
+
+        ingestion = rag.ingestion_engine(batch_size=batch_size, workers=workers, by_folder=True).ingest(corpus_dir)
+        rss_after_ingest = rss_mb()
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "config": {
+                "docs": docs, "questions": len(question_set), "subjects": subjects, "backend": backend,
+                "precision": precision, "embeddings": model_id, "workers": workers, "batch_size": batch_size, "seed": seed
+            },
+            "open_seconds": round(open_seconds, 3),
+            "ingestion": ingestion,
+            "retrieval": {},
+            "recall": {}
+        }
+
+        # Query embedding is timed on its own; the passes below hit the embedding cache
+        started = time.perf_counter()
+        rag.embeddings.embed_queries([q["question"] for q in question_set])
+        report["retrieval"]["embed_ms_per_query"] = round((time.perf_counter() - started) * 1000 / len(question_set), 3)
+
+        for k in k_values:
+
+            for partitioned in (False, True):
+
+                hits = 0
+                latencies = []
+
+                for q in question_set:
+
+                    scope = {"subject": q["subject"], "standard": q["standard"]} if partitioned else {}
+                    started = time.perf_counter()
+                    context = rag.retrieve_context(q["question"], k=k, **scope)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    hits += q["marker"] in context
+
+                label = f"k={k}" + (",partitioned" if partitioned else "")
+                report["recall"][label] = round(hits / len(question_set), 4)
+                report["retrieval"][label] = percentiles(latencies)
+
+        started = time.perf_counter()
+        rag.retrieve_context_batch([q["question"] for q in question_set], k=k_values[0])
+        report["retrieval"]["batch_ms_per_query"] = round((time.perf_counter() - started) * 1000 / len(question_set), 3)
+
+        report["embedding_cache"] = rag.embeddings.stats()
+        report["memory"] = {
+            "rss_after_ingest_mb": round(rss_after_ingest - baseline, 1),
+            "rss_after_queries_mb": round(rss_mb() - baseline, 1)
+        }
+
+    return report
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Offline RAG pipeline benchmark.")
+    parser.add_argument("--docs", type=int, default=2000, help="fact sheets (chunks) in the corpus")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--subjects", type=int, default=4)
+    parser.add_argument("--backend", default="flat", help="chroma | flat | hnsw")
+    parser.add_argument("--precision", default="float32", help="flat only: float32 | float16 | int8")
+    parser.add_argument("--k", default="1,2,5", help="comma separated k values for recall@k")
+    parser.add_argument("--embeddings", default="hash", help="hash (offline) or minilm (needs sentence_transformers)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.docs, args.questions, args.subjects, args.backend, args.precision,
+        [int(k) for k in args.k.split(",")], args.embeddings, args.workers, args.batch_size, args.seed
+    )
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+
+        with open(args.output, "w") as f:
+
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+
+    main()
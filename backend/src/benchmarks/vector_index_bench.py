@@ -0,0 +1,207 @@
+"""
+Compares the vector index backends on a synthetic clustered corpus:
+build time, single-query latency (p50/p95), recall@k against exact
+cosine search, serving memory and disk use. Every index is built in one
+process and queried from a fresh one, so the resident memory reported is
+what a web worker holding the index would pay. A flat backend can be given a
+storage precision as flat:float16 or flat:int8.
+
+    python -m backend.src.benchmarks.vector_index_bench --n 50000 --backends flat,flat:int8,hnsw,chroma
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+def rss_mb() -> float:
+
+    """Current resident set size (Linux), else the peak reported by getrusage."""
+
+    try:
+
+        with open("/proc/self/status") as f:
+
+            for line in f:
+
+                if line.startswith("VmRSS:"):
+
+                    return int(line.split()[1]) / 1024
+
+    except OSError:
+
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def synthetic_corpus(n: int, dim: int, queries: int, clusters: int = 64, seed: int = 0) -> tuple:
+
+    """Clustered unit vectors plus queries that are noisy copies of corpus rows."""
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    corpus = centers[rng.integers(0, clusters, n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+
+    picks = rng.integers(0, n, queries)
+    probes = corpus[picks] + 0.05 * rng.normal(size=(queries, dim)).astype(np.float32)
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+
+    return corpus, probes
+
+def exact_top_k(corpus: np.ndarray, probes: np.ndarray, k: int) -> np.ndarray:
+
+    scores = probes @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+def recall_at_k(found: list, truth: np.ndarray) -> float:
+
+    hits = sum(len(set(f) & set(t.tolist())) for f, t in zip(found, truth))
+
+    return hits / truth.size
+
+def disk_mb(directory: str) -> float:
+
+    total = 0
+
+    for root, _, files in os.walk(directory):
+
+        for name in files:
+
+            # Sparse files (unused capacity) only count the blocks actually written
+            st = os.stat(os.path.join(root, name))
+            total += min(st.st_size, getattr(st, "st_blocks", st.st_size // 512 + 1) * 512)
+
+    return total / (1024 * 1024)
+
+def build_index(spec: str, directory: str, n: int, dim: int, queries: int, batch: int = 1000) -> float:
+
+    from backend.src.pipelines.vector_index import create_vector_index
+
+    backend, _, precision = spec.partition(":")
+    corpus, _ = synthetic_corpus(n, dim, queries)
+
+    started = time.perf_counter()
+    index = create_vector_index(backend, None, directory=directory, precision=precision or "float32")
+
+    for i in range(0, n, batch):
+
+        rows = range(i, min(n, i + batch))
+        index.upsert(
+            ids=[str(r) for r in rows],
+            embeddings=corpus[i:i + batch],
+            documents=[f"chunk {r}" for r in rows],
+            metadatas=[{"source": f"book-{r % 10}"} for r in rows]
+        )
+
+    index.save()
+
+    return time.perf_counter() - started
+
+def query_index(spec: str, directory: str, n: int, dim: int, queries: int, k: int) -> dict:
+
+    """Runs in a fresh process, like a web worker serving an existing index."""
+
+    from backend.src.pipelines.vector_index import create_vector_index
+
+    backend, _, precision = spec.partition(":")
+    corpus, probes = synthetic_corpus(n, dim, queries)
+    truth = exact_top_k(corpus, probes, k)
+    del corpus
+    baseline = rss_mb()
+
+    started = time.perf_counter()
+    index = create_vector_index(backend, None, directory=directory, precision=precision or "float32")
+    open_seconds = time.perf_counter() - started
+
+    latencies = []
+    found = []
+
+    for probe in probes:
+
+        started = time.perf_counter()
+        hits = index.query(probe[None, :], k)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append([int(hit[0]) for hit in hits])
+
+    # Measured before the batch query, whose score matrix is transient
+    serving_rss = rss_mb() - baseline
+
+    started = time.perf_counter()
+    index.query(probes, k)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "open_seconds": round(open_seconds, 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "batch_ms_per_query": round(batch_ms / queries, 3),
+        "recall_at_k": round(recall_at_k(found, truth), 4),
+        "serving_rss_mb": round(serving_rss, 1)
+    }
+
+def run_backend(spec: str, n: int, dim: int, queries: int, k: int) -> dict:
+
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+
+            build_seconds = pool.submit(build_index, spec, directory, n, dim, queries).result()
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+
+            result = pool.submit(query_index, spec, directory, n, dim, queries, k).result()
+
+        return {
+            "backend": spec,
+            "vectors": n,
+            "dim": dim,
+            "k": k,
+            "build_seconds": round(build_seconds, 2),
+            **result,
+            "disk_mb": round(disk_mb(directory), 1)
+        }
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmark the vector index backends.")
+    parser.add_argument("--backends", default="flat,flat:float16,flat:int8,hnsw,chroma")
+    parser.add_argument("--n", type=int, default=20000, help="corpus vectors")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = []
+
+    for backend in args.backends.split(","):
+
+        try:
+
+            result = run_backend(backend.strip(), args.n, args.dim, args.queries, args.k)
+
+        except Exception as e:
+
+            result = {"backend": backend, "error": str(e)}
+
+        report.append(result)
+        print(json.dumps(result))
+
+    if args.output:
+
+        with open(args.output, "w") as f:
+
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+
+    main()
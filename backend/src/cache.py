@@ -0,0 +1,107 @@
+import json
+import time
+import sqlite3
+import threading
+from backend.src.logger import logging
+
+class SQLiteCache:
+
+    """
+    Disk-backed key/value cache with per-entry TTL and LRU eviction.
+    Values are stored as JSON, so anything json.dumps accepts can be cached.
+    One table per use (LLM responses, search results, ...) in a shared file.
+    """
+
+    def __init__(self, path: str, table: str, ttl: float, max_entries: int):
+
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_last_access ON {table} (last_access)")
+
+    def get(self, key: str):
+
+        """Returns the cached value, or None when missing or expired."""
+
+        now = time.time()
+
+        with self._lock:
+
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+
+                self.misses += 1
+
+                if row is not None:
+
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+                return None
+
+            self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None):
+
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now)
+            )
+            self._evict(now)
+
+    def delete(self, key: str):
+
+        with self._lock:
+
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self, now: float):
+
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+        if count > self.max_entries:
+
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logging.info(f"Cache {self.table}: evicted {count - self.max_entries} least recently used entries.")
+
+    def stats(self) -> dict:
+
+        with self._lock:
+
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+        lookups = self.hits + self.misses
+
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
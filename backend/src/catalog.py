@@ -0,0 +1,89 @@
+# Subjects and topics offered in the dashboard's "Browse catalog" picker, and pre-generated by "flask pregenerate"
+CATALOG = {
+    "Mathematics": [
+        "Calculus",
+        "Matrix",
+        "Multiplication",
+        "Trigonometry",
+        "Mensuration",
+        "Algebra",
+        "Geometry",
+        "Statistics"
+    ],
+    "Physics": [
+        "Kinematics",
+        "Thermodynamics",
+        "Electromagnetism",
+        "Optics",
+        "Quantum Mechanics",
+        "Nuclear Physics",
+        "Astrophysics"
+    ],
+    "Chemistry": [
+        "Organic Chemistry",
+        "Inorganic Chemistry",
+        "Physical Chemistry",
+        "Nuclear Chemistry",
+        "Analytical Chemistry",
+        "Environmental Chemistry"
+    ],
+    "Biology": [
+        "Genetics",
+        "Cell Biology",
+        "Ecology",
+        "Evolution",
+        "Molecular Biology",
+        "Immunity",
+        "Neuroscience"
+    ],
+    "Computer Science": [
+        "Data Structures",
+        "Algorithms",
+        "Web Development",
+        "Artificial Intelligence",
+        "Database Management",
+        "Cybersecurity",
+        "Operating Systems",
+        "Machine Learning",
+        "Cloud Computing"
+    ]
+}
+
+# The dashboard form accepts these standards
+STANDARDS = range(1, 13)
+
+def parse_standards(spec: str) -> list:
+
+    """"9-12", "10" or "6,8,10-12" to a sorted list of standards."""
+
+    standards = set()
+
+    for part in [p.strip() for p in spec.split(",") if p.strip()]:
+
+        low, _, high = part.partition("-")
+        standards.update(range(int(low), int(high or low) + 1))
+
+    invalid = sorted(s for s in standards if s not in STANDARDS)
+
+    if invalid or not standards:
+
+        raise ValueError(f"Standards must be between {STANDARDS[0]} and {STANDARDS[-1]} (got '{spec}')")
+
+    return sorted(standards)
+
+def catalog_entries(standards: list, subjects: list = None) -> list:
+
+    """(topic, subject, standard) for every catalog topic, optionally of some subjects only."""
+
+    unknown = [s for s in subjects or [] if s not in CATALOG]
+
+    if unknown:
+
+        raise ValueError(f"Unknown catalog subjects {unknown} (expected some of {list(CATALOG)})")
+
+    return [
+        (topic, subject, standard)
+        for subject, topics in CATALOG.items() if not subjects or subject in subjects
+        for topic in topics
+        for standard in standards
+    ]
@@ -0,0 +1,243 @@
+import os
+import zlib
+import struct
+import threading
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from backend.src.logger import logging
+
+try:
+
+    import zstandard
+
+except ImportError:
+
+    zstandard = None
+
+# Header of every stored value: magic, codec, id of the dictionary it was compressed with (0 = none)
+MAGIC = b"CZ"
+HEADER = struct.Struct(">2scI")
+CODECS = {"none": b"n", "zlib": b"z", "zstd": b"s"}
+# zlib only ever looks at the last 32 KB of a preset dictionary
+ZLIB_DICT_BYTES = 32 * 1024
+
+def dictionary_id(dictionary: bytes) -> int:
+
+    return (zlib.crc32(dictionary) or 1) if dictionary else 0
+
+class ContentCodec:
+
+    """
+    Compresses generated HTML for storage: zstd when installed, else zlib,
+    optionally primed with a shared dictionary trained on earlier courses
+    (lessons are short and repeat the same markup, which a dictionary
+    captures). Values carry their codec and dictionary id, so settings can
+    change without rewriting old rows, and plain text from before
+    compression is read as is. The first dictionary is used for writing;
+    older ones can be listed after it so rows written with them stay readable.
+    """
+
+    def __init__(self, codec: str = "auto", level: int = None, dictionaries: list = None):
+
+        if codec == "auto":
+
+            codec = "zstd" if zstandard is not None else "zlib"
+
+        if codec not in CODECS:
+
+            raise ValueError(f"Unknown compression codec '{codec}' (expected auto, {', '.join(CODECS)})")
+
+        if codec == "zstd" and zstandard is None:
+
+            raise ValueError("COMPRESSION_CODEC=zstd needs the zstandard package (pip install zstandard)")
+
+        self.codec = codec
+        self.level = level if level is not None else (6 if codec == "zlib" else 9)
+        dictionaries = [d for d in dictionaries or [] if d]
+        self.dictionary = dictionaries[0] if dictionaries else None
+        self.dictionary_id = dictionary_id(self.dictionary)
+        self.dictionaries = {dictionary_id(d): d for d in dictionaries}
+        self._zstd_dicts = {}
+
+    def _zstd_dict(self, dict_id: int):
+
+        if dict_id not in self._zstd_dicts:
+
+            self._zstd_dicts[dict_id] = zstandard.ZstdCompressionDict(self.dictionaries[dict_id])
+
+        return self._zstd_dicts[dict_id]
+
+    def compress(self, text: str) -> bytes:
+
+        data = text.encode("utf-8")
+
+        if self.codec == "none":
+
+            return HEADER.pack(MAGIC, CODECS["none"], 0) + data
+
+        if self.codec == "zlib":
+
+            if self.dictionary:
+
+                compressor = zlib.compressobj(self.level, zdict=self.dictionary[-ZLIB_DICT_BYTES:])
+                body = compressor.compress(data) + compressor.flush()
+
+            else:
+
+                body = zlib.compress(data, self.level)
+
+        else:
+
+            dict_data = self._zstd_dict(self.dictionary_id) if self.dictionary else None
+            body = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data).compress(data)
+
+        return HEADER.pack(MAGIC, CODECS[self.codec], self.dictionary_id) + body
+
+    def is_current(self, value) -> bool:
+
+        """Whether a raw stored value already uses this codec and dictionary."""
+
+        if value is None or isinstance(value, str):
+
+            return value is None
+
+        value = bytes(value[:HEADER.size])
+
+        return len(value) == HEADER.size and HEADER.unpack(value) == (MAGIC, CODECS[self.codec], self.dictionary_id)
+
+    def decompress(self, value) -> str:
+
+        if isinstance(value, str):
+
+            return value
+
+        value = bytes(value)
+
+        if len(value) < HEADER.size or value[:2] != MAGIC:
+
+            return value.decode("utf-8")
+
+        _, codec, dict_id = HEADER.unpack_from(value)
+        body = value[HEADER.size:]
+
+        if dict_id and dict_id not in self.dictionaries:
+
+            raise ValueError(f"Value was compressed with dictionary {dict_id:#x}; add it to COMPRESSION_DICT_PATH")
+
+        if codec == CODECS["none"]:
+
+            return body.decode("utf-8")
+
+        if codec == CODECS["zlib"]:
+
+            if dict_id:
+
+                decompressor = zlib.decompressobj(zdict=self.dictionaries[dict_id][-ZLIB_DICT_BYTES:])
+
+                return (decompressor.decompress(body) + decompressor.flush()).decode("utf-8")
+
+            return zlib.decompress(body).decode("utf-8")
+
+        if codec == CODECS["zstd"]:
+
+            if zstandard is None:
+
+                raise ValueError("Value was compressed with zstd; install the zstandard package to read it")
+
+            dict_data = self._zstd_dict(dict_id) if dict_id else None
+
+            return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(body).decode("utf-8")
+
+        raise ValueError(f"Unknown codec {codec!r} in stored value")
+
+def train_dictionary(samples: list, size: int = 64 * 1024) -> bytes:
+
+    """Builds a shared dictionary from sample documents (zstd training, or a plain sample for zlib)."""
+
+    encoded = [sample.encode("utf-8") for sample in samples if sample]
+
+    if not encoded:
+
+        raise ValueError("No samples to train a compression dictionary on")
+
+    if zstandard is not None:
+
+        return zstandard.train_dictionary(size, encoded).as_bytes()
+
+    # zlib: the most useful preset is recent, typical content, placed at the end
+    return b"".join(encoded)[-min(size, ZLIB_DICT_BYTES):]
+
+_codec = None
+_codec_lock = threading.Lock()
+
+def get_codec() -> ContentCodec:
+
+    """
+    Process-wide codec from COMPRESSION_CODEC, COMPRESSION_LEVEL and
+    COMPRESSION_DICT_PATH (comma separated: the current dictionary first).
+    """
+
+    global _codec
+
+    with _codec_lock:
+
+        if _codec is None:
+
+            dictionaries = []
+
+            for path in [p.strip() for p in os.getenv("COMPRESSION_DICT_PATH", "").split(",") if p.strip()]:
+
+                if os.path.exists(path):
+
+                    with open(path, "rb") as f:
+
+                        dictionaries.append(f.read())
+
+                else:
+
+                    logging.warning(f"Compression dictionary {path} not found; skipping it.")
+
+            level = os.getenv("COMPRESSION_LEVEL")
+            _codec = ContentCodec(os.getenv("COMPRESSION_CODEC", "auto"), int(level) if level else None, dictionaries)
+
+        return _codec
+
+def reset_codec():
+
+    """Drops the cached codec, e.g. after training a new dictionary."""
+
+    global _codec
+
+    with _codec_lock:
+
+        _codec = None
+
+class _StoredBytes(LargeBinary):
+
+    """BLOB column whose legacy TEXT values (SQLite keeps them as stored) are passed through untouched."""
+
+    def result_processor(self, dialect, coltype):
+
+        return None
+
+class CompressedText(TypeDecorator):
+
+    """Text attribute stored compressed (see ContentCodec); reads rows written before compression too."""
+
+    impl = _StoredBytes
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+
+        if value is None:
+
+            return None
+
+        return get_codec().compress(value)
+
+    def process_result_value(self, value, dialect):
+
+        if value is None:
+
+            return None
+
+        return get_codec().decompress(value)
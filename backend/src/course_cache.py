@@ -0,0 +1,88 @@
+import os
+import json
+import hashlib
+from backend.src.utils import LLM_TEMPERATURE, llm_tiers
+from backend.src.prompts import assistant_prompt, tutoring_prompt, testing_prompt
+
+def _prompt_fingerprint() -> str:
+
+    """Hashes every prompt template the three agents render."""
+
+    digest = hashlib.sha256()
+
+    for module in (assistant_prompt, tutoring_prompt, testing_prompt):
+
+        for name in sorted(vars(module)):
+
+            value = getattr(module, name)
+
+            if name.isupper() and isinstance(value, str):
+
+                digest.update(name.encode("utf-8"))
+                digest.update(value.encode("utf-8"))
+
+    return digest.hexdigest()
+
+def generation_version() -> str:
+
+    """
+    Invalidation key for shared courses.
+    Changes whenever a model, the temperature or any prompt changes.
+    COURSE_CACHE_SALT can be bumped to force a full regeneration.
+    """
+
+    parts = [
+        json.dumps(llm_tiers(), sort_keys=True),
+        str(LLM_TEMPERATURE),
+        _prompt_fingerprint(),
+        os.getenv("COURSE_CACHE_SALT", "")
+    ]
+
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+_version = None
+
+def get_generation_version() -> str:
+
+    """generation_version(), computed on first use rather than at import, so settings loaded from .env count."""
+
+    global _version
+
+    if _version is None:
+
+        _version = generation_version()
+
+    return _version
+
+def normalize_field(value) -> str:
+
+    return " ".join(str(value).split()).casefold()
+
+def course_cache_key(topic: str, subject: str, standard: int, version: str = None) -> str:
+
+    """Content address of a generated course: (topic, subject, standard) under a generation version (the current one by default)."""
+
+    raw = "\x1f".join([normalize_field(topic), normalize_field(subject), str(int(standard)), version or get_generation_version()])
+
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# What the agents write in place of a lesson or test they could not generate
+MISSING_LESSON = "<p>Error: Content missing from batch response.</p>"
+
+def missing_test(title: str) -> str:
+
+    return f"<p>Error: Test content missing for {title}</p>"
+
+def failed_parts(content: dict) -> list:
+
+    """
+    Titles of the lessons and tests left as placeholders, plus "Study links"
+    when the search failed. Compared exactly, so generated text that merely
+    mentions an error is not mistaken for a failure.
+    """
+
+    lessons = [title for title, html in content["lessons"].items() if html == MISSING_LESSON]
+    tests = [title for title, html in content["tests"].items() if html == missing_test(title)]
+    links = ["Study links"] if content.get("search_failed") else []
+
+    return lessons + tests + links
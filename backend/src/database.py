@@ -0,0 +1,144 @@
+import os
+import time
+import random
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from backend.src.metrics import count_db_retry
+from backend.src.logger import logging
+
+DEFAULT_DATABASE_URL = "sqlite:///users.db"
+# Postgres serialization failure and deadlock: the transaction can simply be run again
+RETRYABLE_PGCODES = {"40001", "40P01"}
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 2.0
+
+def database_url() -> str:
+
+    """DATABASE_URL, with Heroku-style postgres:// accepted (relative SQLite paths live in instance/)."""
+
+    url = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+    if url.startswith("postgres://"):
+
+        url = "postgresql://" + url[len("postgres://"):]
+
+    return url
+
+def engine_options(url: str) -> dict:
+
+    """
+    Engine arguments for SQLALCHEMY_ENGINE_OPTIONS. Server databases get a
+    sized pool whose connections are checked before use (they are dropped
+    by the server or a proxy after idling); every gunicorn worker has its
+    own pool, so size it as workers x DB_POOL_SIZE <= the server's limit.
+    SQLite is tuned per connection instead (see configure_engine).
+    """
+
+    if url.startswith("sqlite"):
+
+        return {}
+
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True
+    }
+
+def sqlite_pragmas() -> dict:
+
+    """
+    WAL lets readers carry on while one connection writes, and NORMAL
+    synchronous only fsyncs at checkpoints (a power cut can lose the last
+    commits, never corrupt the file). busy_timeout makes a writer wait for
+    the lock instead of failing with "database is locked" at once.
+    """
+
+    return {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "15000")),
+        "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000")),
+        "temp_store": "MEMORY"
+    }
+
+def configure_engine(engine):
+
+    """Applies sqlite_pragmas() to every new SQLite connection; call before the engine is first used."""
+
+    if engine.dialect.name != "sqlite":
+
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+
+        cursor = dbapi_connection.cursor()
+
+        try:
+
+            for name, value in pragmas.items():
+
+                cursor.execute(f"PRAGMA {name}={value}")
+
+        finally:
+
+            cursor.close()
+
+    logging.info(f"SQLite pragmas: {pragmas}")
+
+def is_retryable(error: DBAPIError) -> bool:
+
+    """Lock timeouts (SQLite) and serialization failures or deadlocks (Postgres)."""
+
+    message = str(error.orig).lower()
+
+    if "database is locked" in message or "database table is locked" in message:
+
+        return True
+
+    return getattr(error.orig, "pgcode", None) in RETRYABLE_PGCODES
+
+def commit_with_retry(session, work, attempts: int = None):
+
+    """
+    Runs work() and commits, both again after a lock or serialization error
+    (with jittered exponential backoff); returns what work() returned.
+    A failed commit rolls the session back, which discards the pending
+    changes, so work() has to make them again: create new objects inside it
+    and re-apply attribute changes rather than adding objects built earlier.
+    Other errors (IntegrityError included) are raised after the rollback.
+    """
+
+    attempts = attempts or int(os.getenv("DB_COMMIT_ATTEMPTS", "5"))
+
+    for attempt in range(1, attempts + 1):
+
+        try:
+
+            result = work()
+            session.commit()
+
+            return result
+
+        except DBAPIError as e:
+
+            session.rollback()
+
+            if not is_retryable(e):
+
+                raise
+
+            if attempt == attempts:
+
+                count_db_retry("gave_up")
+
+                raise
+
+            count_db_retry("retried")
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logging.warning(f"Database busy ({e.orig}); retrying in {delay:.2f}s (attempt {attempt}/{attempts}).")
+            time.sleep(delay)
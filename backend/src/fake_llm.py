@@ -0,0 +1,253 @@
+import os
+import re
+import math
+import random
+import asyncio
+import hashlib
+import threading
+from langchain_core.messages import AIMessage
+
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "lognormal"]
+
+WORDS = [
+    "energy", "force", "system", "value", "model", "process", "example", "result", "change", "structure",
+    "concept", "method", "theory", "equation", "rate", "balance", "pattern", "unit", "factor", "observation"
+]
+
+class FakeRateLimitError(Exception):
+
+    """Shaped like groq.RateLimitError: status 429 and a 'try again in' hint in the message."""
+
+    def __init__(self, model: str, retry_after: float):
+
+        super().__init__(
+            f"Error code: 429 - Rate limit reached for model `{model}` (simulated). "
+            f"Please try again in {retry_after:.2f}s."
+        )
+        self.status_code = 429
+        self.response = None
+
+class FakeUsage:
+
+    """Process-wide totals over every fake client, read by the generation benchmark."""
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+
+        with self._lock:
+
+            self.calls = 0
+            self.rate_limited = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+            self.busy_seconds = 0.0
+            self.by_model = {}
+            self._seen = {}
+
+    def next_attempt(self, digest: str) -> int:
+
+        """How often this exact prompt was sent before, across every key."""
+
+        with self._lock:
+
+            attempt = self._seen.get(digest, 0)
+            self._seen[digest] = attempt + 1
+
+        return attempt
+
+    def record(self, model: str, input_tokens: int, output_tokens: int, seconds: float, rate_limited: bool = False):
+
+        with self._lock:
+
+            model_usage = self.by_model.setdefault(model, {"calls": 0, "rate_limited": 0, "output_tokens": 0})
+            model_usage["calls"] += 1
+            self.calls += 1
+            self.busy_seconds += seconds
+
+            if rate_limited:
+
+                model_usage["rate_limited"] += 1
+                self.rate_limited += 1
+
+                return
+
+            model_usage["output_tokens"] += output_tokens
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def stats(self) -> dict:
+
+        with self._lock:
+
+            return {
+                "calls": self.calls,
+                "rate_limited": self.rate_limited,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.input_tokens + self.output_tokens,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "by_model": {model: dict(usage) for model, usage in self.by_model.items()}
+            }
+
+fake_usage = FakeUsage()
+
+class FakeChatGroq:
+
+    """
+    Offline stand-in for ChatGroq's ainvoke: answers in the format each agent
+    prompt asks for (a numbered plan, |||LESSON_SPLIT||| or |||TEST_SPLIT|||
+    separated batches with one part per requested item) after a simulated
+    delay of time-to-first-token plus output tokens / tokens_per_sec.
+    rate_limit_rate injects 429s carrying a retry-after hint. Draws depend on
+    the seed, model and prompt only, so runs are reproducible whichever key
+    the pool routes a call to.
+    """
+
+    def __init__(self, model: str, temperature: float = 0.0, api_key: str = None, latency: float = 0.3,
+                 jitter: float = 0.5, distribution: str = "lognormal", tokens_per_sec: float = 800.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0, lesson_tokens: int = 600,
+                 test_tokens: int = 250, text_tokens: int = 300, seed: int = 0):
+
+        if distribution not in LATENCY_DISTRIBUTIONS:
+
+            raise ValueError(f"Unknown latency distribution '{distribution}' (expected one of {LATENCY_DISTRIBUTIONS})")
+
+        self.model = model
+        self.model_name = model
+        self.temperature = temperature
+        self.api_key = api_key
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.tokens_per_sec = tokens_per_sec
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.lesson_tokens = lesson_tokens
+        self.test_tokens = test_tokens
+        self.text_tokens = text_tokens
+        self.seed = seed
+
+    def _rng(self, prompt: str) -> random.Random:
+
+        digest = hashlib.sha256(f"{self.model}\n{prompt}".encode("utf-8")).hexdigest()
+        attempt = fake_usage.next_attempt(digest)
+
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def _first_token_seconds(self, rng: random.Random) -> float:
+
+        if self.distribution == "fixed":
+
+            return self.latency
+
+        if self.distribution == "uniform":
+
+            return max(0.0, rng.uniform(self.latency * (1 - self.jitter), self.latency * (1 + self.jitter)))
+
+        # Lognormal with the configured mean and jitter as sigma: a long tail like real APIs
+        return rng.lognormvariate(0.0, self.jitter) * self.latency / math.exp(self.jitter ** 2 / 2)
+
+    @staticmethod
+    def _count(prompt: str, pattern: str, default: int) -> int:
+
+        match = re.search(pattern, prompt)
+
+        return int(match.group(1)) if match else default
+
+    @staticmethod
+    def _items(prompt: str, marker: str) -> list:
+
+        return [line.split(marker, 1)[1].strip() for line in prompt.splitlines() if marker in line]
+
+    @staticmethod
+    def _words(rng: random.Random, count: int) -> str:
+
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+
+        if "|||LESSON_SPLIT|||" in prompt:
+
+            count = self._count(prompt, r"following (\d+) lessons", 1)
+            titles = self._items(prompt, "TARGET LESSON:") or [f"Lesson {i + 1}" for i in range(count)]
+            parts = [
+                f"<h3>{titles[i] if i < len(titles) else f'Lesson {i + 1}'}</h3>\n"
+                f"<h4>Key Concepts</h4>\n<p>{self._words(rng, self.lesson_tokens // 2)}</p>\n"
+                f"<h4>Examples</h4>\n<p>{self._words(rng, self.lesson_tokens - self.lesson_tokens // 2)}</p>"
+                for i in range(count)
+            ]
+
+            return "\n|||LESSON_SPLIT|||\n".join(parts)
+
+        if "|||TEST_SPLIT|||" in prompt:
+
+            count = self._count(prompt, r"following (\d+) topics", 1)
+            parts = [
+                f"<div>\n<p><b>Question:</b> {self._words(rng, 20)}?</p>\n"
+                f"<p><b>Solution:</b> {self._words(rng, max(1, self.test_tokens - 20))}</p>\n</div>"
+                for _ in range(count)
+            ]
+
+            return "\n|||TEST_SPLIT|||\n".join(parts)
+
+        if "list of" in prompt and "Lesson Number and Title" in prompt:
+
+            count = self._count(prompt, r"list of (\d+) lessons", 40)
+
+            return "\n".join(f"Lesson {i + 1}: {rng.choice(WORDS).title()} {rng.choice(WORDS)} part {i + 1}" for i in range(count))
+
+        return f"<p>{self._words(rng, self.text_tokens)}</p>"
+
+    async def ainvoke(self, messages, **kwargs):
+
+        prompt = "\n".join(str(getattr(m, "content", m)) for m in messages)
+        input_tokens = len(prompt) // 4
+        rng = self._rng(prompt)
+        first_token = self._first_token_seconds(rng)
+
+        if rng.random() < self.rate_limit_rate:
+
+            await asyncio.sleep(first_token)
+            fake_usage.record(self.model, input_tokens, 0, first_token, rate_limited=True)
+
+            raise FakeRateLimitError(self.model, self.retry_after)
+
+        content = self._respond(prompt, rng)
+        output_tokens = len(content.split())
+        seconds = first_token + output_tokens / self.tokens_per_sec
+
+        await asyncio.sleep(seconds)
+        fake_usage.record(self.model, input_tokens, output_tokens, seconds)
+
+        return AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+            response_metadata={"model_name": self.model, "simulated": True}
+        )
+
+    def invoke(self, messages, **kwargs):
+
+        return asyncio.run(self.ainvoke(messages, **kwargs))
+
+def fake_llm_from_env(model: str, temperature: float, api_key: str) -> FakeChatGroq:
+
+    """FakeChatGroq configured by the FAKE_LLM_* settings (see README)."""
+
+    return FakeChatGroq(
+        model=model,
+        temperature=temperature,
+        api_key=api_key,
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0.3")),
+        jitter=float(os.getenv("FAKE_LLM_JITTER", "0.5")),
+        distribution=os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal"),
+        tokens_per_sec=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "800")),
+        rate_limit_rate=float(os.getenv("FAKE_LLM_429_RATE", "0")),
+        retry_after=float(os.getenv("FAKE_LLM_RETRY_AFTER", "1.0")),
+        lesson_tokens=int(os.getenv("FAKE_LLM_LESSON_TOKENS", "600")),
+        test_tokens=int(os.getenv("FAKE_LLM_TEST_TOKENS", "250")),
+        seed=int(os.getenv("FAKE_LLM_SEED", "0"))
+    )
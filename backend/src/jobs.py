@@ -0,0 +1,227 @@
+import time
+import asyncio
+import threading
+from backend.src.logger import logging
+
+class JobQueueFull(Exception):
+
+    pass
+
+class JobRunner:
+
+    """
+    Runs coroutines on one background event loop with bounded concurrency.
+    Web workers submit jobs and return immediately; at most max_concurrency
+    jobs run at once and at most max_pending wait behind them.
+    With a heartbeat, heartbeat(keys) is called from a thread every
+    heartbeat_interval seconds with the keys of the jobs queued or running
+    here, so their records show this process is still alive.
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_pending: int = 20, heartbeat=None, heartbeat_interval: float = 30.0):
+
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self.heartbeat_interval = heartbeat_interval
+        self.active = 0
+        self.pending = 0
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._keys = set()
+
+    def _ensure_started(self):
+
+        # Started lazily so that the thread is created after a gunicorn fork
+        with self._lock:
+
+            if self._thread is not None and self._thread.is_alive():
+
+                return
+
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+
+            def run_loop():
+
+                asyncio.set_event_loop(self._loop)
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+                if self.heartbeat is not None:
+
+                    self._loop.create_task(self._beat())
+
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name="generation-jobs", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+            logging.info(f"Job runner started with concurrency {self.max_concurrency}.")
+
+    async def _beat(self):
+
+        while True:
+
+            await asyncio.sleep(self.heartbeat_interval)
+
+            with self._lock:
+
+                keys = list(self._keys)
+
+            if not keys:
+
+                continue
+
+            try:
+
+                await asyncio.to_thread(self.heartbeat, keys)
+
+            except Exception as e:
+
+                logging.warning(f"Job heartbeat failed: {e}")
+
+    async def _run_guarded(self, key, func, *args):
+
+        try:
+
+            async with self._semaphore:
+
+                with self._lock:
+
+                    self.pending -= 1
+                    self.active += 1
+
+                try:
+
+                    return await func(*args)
+
+                finally:
+
+                    with self._lock:
+
+                        self.active -= 1
+
+        except Exception as e:
+
+            logging.error(f"Background job failed: {e}")
+            raise
+
+        finally:
+
+            with self._lock:
+
+                self._keys.discard(key)
+
+    def submit(self, func, *args, key=None):
+
+        """Schedules func(*args) on the job loop and returns a concurrent Future; key is what the heartbeat reports."""
+
+        self._ensure_started()
+
+        with self._lock:
+
+            if self.pending >= self.max_pending:
+
+                raise JobQueueFull("Too many generation jobs are waiting. Please try again shortly.")
+
+            self.pending += 1
+
+            if key is not None:
+
+                self._keys.add(key)
+
+        return asyncio.run_coroutine_threadsafe(self._run_guarded(key, func, *args), self._loop)
+
+class JobEvents:
+
+    """
+    In-process buffer of progress events per job.
+    Subscribers get every event from the start, so a page opened late still
+    renders the content produced so far. Finished jobs are kept for a while.
+    """
+
+    def __init__(self, retention_seconds: int = 600):
+
+        self.retention_seconds = retention_seconds
+
+        self._condition = threading.Condition()
+        self._events = {}
+        self._finished = {}
+
+    def open(self, job_id: str):
+
+        with self._condition:
+
+            self._events.setdefault(job_id, [])
+
+    def has(self, job_id: str) -> bool:
+
+        with self._condition:
+
+            return job_id in self._events
+
+    def publish(self, job_id: str, event: str, data: dict, final: bool = False):
+
+        with self._condition:
+
+            self._events.setdefault(job_id, []).append((event, data))
+
+            if final:
+
+                self._finished[job_id] = time.monotonic()
+
+            self._prune()
+            self._condition.notify_all()
+
+    def _prune(self):
+
+        cutoff = time.monotonic() - self.retention_seconds
+
+        for job_id, finished_at in list(self._finished.items()):
+
+            if finished_at < cutoff:
+
+                self._finished.pop(job_id, None)
+                self._events.pop(job_id, None)
+
+    def subscribe(self, job_id: str, keepalive: float = 15.0):
+
+        """Yields (event, data) tuples until the job finishes, and None whenever keepalive seconds pass quietly."""
+
+        index = 0
+
+        while True:
+
+            with self._condition:
+
+                events = self._events.get(job_id)
+
+                if events is not None and index >= len(events) and job_id not in self._finished:
+
+                    self._condition.wait(keepalive)
+                    events = self._events.get(job_id)
+
+                if events is None:
+
+                    return
+
+                batch = events[index:]
+                index = len(events)
+                finished = job_id in self._finished
+
+            if not batch:
+
+                if finished:
+
+                    return
+
+                yield None
+
+            for item in batch:
+
+                yield item
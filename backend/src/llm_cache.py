@@ -0,0 +1,113 @@
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from langchain_core.messages import AIMessage
+from backend.src.cache import SQLiteCache
+from backend.src.logger import logging
+from backend.src.metrics import count_llm_cache
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache():
+
+    """Process-wide response cache, or None when LLM_CACHE_ENABLED=0."""
+
+    global _cache
+
+    if os.getenv("LLM_CACHE_ENABLED", "1") != "1":
+
+        return None
+
+    with _cache_lock:
+
+        if _cache is None:
+
+            _cache = SQLiteCache(
+                path=os.getenv("LLM_CACHE_PATH", "llm_cache.db"),
+                table="llm_responses",
+                ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+            )
+
+        return _cache
+
+def response_cache_key(model: str, temperature: float, messages, **kwargs) -> str:
+
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [[getattr(m, "type", "human"), str(getattr(m, "content", m))] for m in messages],
+        "kwargs": kwargs
+    }
+
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def has_parts(marker: str, count: int):
+
+    """Validator for batch responses: at least `count` parts separated by `marker`."""
+
+    return lambda content: len(content.split(marker)) >= count
+
+class CachedLLM:
+
+    """
+    Serves repeated prompts from the response cache before they reach the pool.
+    Keyed on the model(s), temperature and rendered messages. Callers can
+    pass validate=callable(content) -> bool: responses it rejects (e.g. a
+    truncated batch missing its split markers) are returned but not cached.
+    """
+
+    def __init__(self, llm, cache: SQLiteCache, model: str, temperature: float):
+
+        self.llm = llm
+        self.cache = cache
+        self.cache_model = model
+        self.temperature = temperature
+
+    def __getattr__(self, name):
+
+        return getattr(self.llm, name)
+
+    async def ainvoke(self, messages, validate=None, **kwargs):
+
+        key = response_cache_key(self.cache_model, self.temperature, messages, **kwargs)
+
+        try:
+
+            cached = await asyncio.to_thread(self.cache.get, key)
+
+        except Exception as e:
+
+            logging.warning(f"LLM cache read failed: {e}")
+            cached = None
+
+        count_llm_cache(cached is not None)
+
+        if cached is not None:
+
+            return AIMessage(content=cached["content"], response_metadata={"cache_hit": True})
+
+        response = await self.llm.ainvoke(messages, **kwargs)
+
+        if not response.content:
+
+            return response
+
+        if validate is not None and not validate(response.content):
+
+            logging.warning("LLM response failed validation; not caching it.")
+
+            return response
+
+        try:
+
+            await asyncio.to_thread(self.cache.set, key, {"content": response.content})
+
+        except Exception as e:
+
+            logging.warning(f"LLM cache write failed: {e}")
+
+        return response
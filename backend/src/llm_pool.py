@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import threading
+from langchain_groq.chat_models import ChatGroq
+from backend.src.logger import logging
+from backend.src.metrics import count_llm_retry
+from backend.src.rate_limiter import RateLimitedLLM, estimate_tokens, is_rate_limit_error, retry_after_seconds
+
+TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ConnectError", "ReadTimeout", "TimeoutError"}
+
+def is_transient_error(error: Exception) -> bool:
+
+    status = getattr(error, "status_code", None)
+
+    return (status is not None and status >= 500) or type(error).__name__ in TRANSIENT_ERRORS
+
+def discover_api_keys() -> list:
+
+    """
+    Collects Groq keys from GROQ_API_KEYS (comma separated), GROQ_API_KEY and
+    GROQ_API_KEY_1, GROQ_API_KEY_2, ... in that order, without duplicates.
+    """
+
+    keys = [k.strip() for k in os.getenv("GROQ_API_KEYS", "").split(",") if k.strip()]
+
+    if os.getenv("GROQ_API_KEY"):
+
+        keys.append(os.getenv("GROQ_API_KEY"))
+
+    index = 1
+
+    while os.getenv(f"GROQ_API_KEY_{index}"):
+
+        keys.append(os.getenv(f"GROQ_API_KEY_{index}"))
+        index += 1
+
+    return list(dict.fromkeys(keys))
+
+def pool_api_keys() -> list:
+
+    """
+    Keys the pools are built over. With LLM_BACKEND=fake and no real keys,
+    FAKE_LLM_KEYS synthetic keys (default 2) stand in so offline runs still
+    exercise per-key buckets and routing.
+    """
+
+    keys = discover_api_keys()
+
+    if not keys and os.getenv("LLM_BACKEND", "groq") == "fake":
+
+        keys = [f"fake-key-{i}" for i in range(1, int(os.getenv("FAKE_LLM_KEYS", "2")) + 1)]
+
+    return keys
+
+class PoolMember:
+
+    """One (API key, model) client plus its health bookkeeping."""
+
+    def __init__(self, client: RateLimitedLLM, key_index: int):
+
+        self.client = client
+        self.key_index = key_index
+        self.model = client.model
+        self.in_flight = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.calls = 0
+
+    @property
+    def healthy(self) -> bool:
+
+        return time.time() >= self.cooldown_until
+
+    async def estimate_wait(self, tokens: int) -> float:
+
+        return await self.client.limiter.estimate_wait(self.client.bucket, self.model, tokens)
+
+    def load(self, bucket_wait: float) -> tuple:
+
+        """Sort key: healthy members first, then expected wait, then relative in-flight load."""
+
+        wait = max(self.cooldown_until - time.time(), 0.0, bucket_wait)
+
+        return (not self.healthy, round(wait, 1), self.in_flight / max(1, self.client.gate.limit), self.calls)
+
+class LLMPool:
+
+    """
+    Routes every call of a tier to the least-loaded healthy (key, model) member.
+    A member that is rate limited cools down for the server's retry-after and
+    one that errors cools down exponentially, while the call is retried on
+    another member. Throughput grows with the number of keys.
+    """
+
+    def __init__(self, tier: str, members: list, max_attempts: int = None):
+
+        if not members:
+
+            raise ValueError(f"No LLM clients configured for tier '{tier}'")
+
+        self.tier = tier
+        self.members = members
+        # LLM_MAX_RETRIES retries after the first attempt (members do not retry themselves),
+        # and enough attempts to reach every member
+        self.max_attempts = max_attempts or max(1 + int(os.getenv("LLM_MAX_RETRIES", "5")), len(members))
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+
+        return self.members[0].model
+
+    async def _pick(self, tokens: int, exclude: set) -> PoolMember:
+
+        candidates = [m for m in self.members if id(m) not in exclude] or self.members
+        # Bucket reads can hit SQLite (RATE_LIMIT_DB), so they run off the event loop and outside the lock
+        waits = await asyncio.gather(*(m.estimate_wait(tokens) for m in candidates))
+
+        with self._lock:
+
+            member, _ = min(zip(candidates, waits), key=lambda pair: pair[0].load(pair[1]))
+            member.in_flight += 1
+            member.calls += 1
+
+        return member
+
+    def _release(self, member: PoolMember):
+
+        with self._lock:
+
+            member.in_flight -= 1
+
+    async def ainvoke(self, messages, validate=None, **kwargs):
+
+        # validate only matters to the response cache (CachedLLM); accepted here for uncached tiers
+        tokens = estimate_tokens(messages, 1024)
+        tried = set()
+        last_error = None
+
+        for attempt in range(self.max_attempts):
+
+            member = await self._pick(tokens, tried)
+
+            if not member.healthy:
+
+                await asyncio.sleep(max(0.0, member.cooldown_until - time.time()))
+
+            try:
+
+                response = await member.client.ainvoke(messages, **kwargs)
+                member.failures = 0
+
+                return response
+
+            except Exception as e:
+
+                last_error = e
+                tried.add(id(member))
+                self.retries += 1
+
+                if is_rate_limit_error(e):
+
+                    member.cooldown_until = time.time() + (retry_after_seconds(e) or 5.0)
+                    count_llm_retry(member.model, "rate_limit")
+
+                elif is_transient_error(e):
+
+                    member.failures += 1
+                    member.cooldown_until = time.time() + min(120.0, 5.0 * 2 ** (member.failures - 1))
+                    count_llm_retry(member.model, "transient")
+
+                else:
+
+                    raise
+
+                logging.warning(f"LLM pool '{self.tier}': key #{member.key_index} failed ({e}); rerouting.")
+
+            finally:
+
+                self._release(member)
+
+        raise last_error
+
+    def stats(self) -> list:
+
+        return [
+            {
+                "key": m.key_index,
+                "model": m.model,
+                "calls": m.calls,
+                "in_flight": m.in_flight,
+                "healthy": m.healthy,
+                "concurrency_limit": m.client.gate.limit
+            }
+            for m in self.members
+        ]
+
+def build_pool(tier: str, models: list, temperature: float) -> LLMPool:
+
+    """
+    One member per (key, model) for every discovered key and every model of the tier.
+    LLM_BACKEND=fake swaps ChatGroq for the offline FakeChatGroq (see fake_llm.py).
+    """
+
+    members = []
+    keys = pool_api_keys()
+    fake = os.getenv("LLM_BACKEND", "groq") == "fake"
+
+    for key_index, api_key in enumerate(keys, start=1):
+
+        for model in models:
+
+            if fake:
+
+                from backend.src.fake_llm import fake_llm_from_env
+
+                llm = fake_llm_from_env(model, temperature, api_key)
+
+            else:
+
+                llm = ChatGroq(model=model, temperature=temperature, api_key=api_key)
+
+            # Rate-limit retries happen at pool level so they can move to another key
+            members.append(PoolMember(RateLimitedLLM(llm, api_key, model, max_retries=0), key_index))
+
+    logging.info(f"LLM pool '{tier}': {len(members)} {'fake ' if fake else ''}clients over {len(keys)} keys.")
+
+    return LLMPool(tier, members)
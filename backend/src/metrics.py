@@ -0,0 +1,387 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextvars import ContextVar
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from backend.src.logger import logging
+
+# Seconds; LLM calls and whole generations have long tails
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+GENERATION_BUCKETS = (5.0, 10.0, 30.0, 60.0, 120.0, 180.0, 300.0, 600.0, 1200.0)
+
+def _escape(value) -> str:
+
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels_text(names: tuple, values: tuple, le: str = None) -> str:
+
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+
+    if le is not None:
+
+        pairs.append(f'le="{le}"')
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+
+    """Every digit of a sample value: 1234567 tokens, not 1.23457e+06."""
+
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+
+    """Monotonic counter per label combination."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+
+        with self._lock:
+
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def totals(self) -> dict:
+
+        with self._lock:
+
+            return dict(self._values)
+
+    def render(self) -> list:
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+
+        for key, value in sorted(self.totals().items()):
+
+            lines.append(f"{self.name}{_labels_text(self.labels, key)} {_number(value)}")
+
+        return lines
+
+class Histogram:
+
+    """Cumulative-bucket histogram per label combination, as Prometheus expects."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+
+        with self._lock:
+
+            entry = self._values.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+
+            for i, bound in enumerate(self.buckets):
+
+                if value <= bound:
+
+                    entry["buckets"][i] += 1
+
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def totals(self) -> dict:
+
+        """{label values: (count, sum)}"""
+
+        with self._lock:
+
+            return {key: (entry["count"], entry["sum"]) for key, entry in self._values.items()}
+
+    def render(self) -> list:
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+
+            entries = sorted((key, list(entry["buckets"]), entry["sum"], entry["count"]) for key, entry in self._values.items())
+
+        for key, buckets, total, count in entries:
+
+            for bound, observed in zip(self.buckets, buckets):
+
+                lines.append(f"{self.name}_bucket{_labels_text(self.labels, key, f'{bound:g}')} {observed}")
+
+            lines.append(f"{self.name}_bucket{_labels_text(self.labels, key, '+Inf')} {count}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labels, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels_text(self.labels, key)} {count}")
+
+        return lines
+
+class MetricsRegistry:
+
+    """
+    The process's metrics in Prometheus text format. Every gunicorn worker
+    keeps its own, so scrape each worker (or run one) for complete numbers.
+    """
+
+    def __init__(self):
+
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+
+        return metric
+
+    def render(self) -> str:
+
+        lines = []
+
+        for metric in self._metrics:
+
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+NODE_SECONDS = registry.histogram("sensai_graph_node_seconds", "Duration of LangGraph node runs.", ("node", "outcome"))
+LLM_CALL_SECONDS = registry.histogram("sensai_llm_call_seconds", "Duration of LLM API calls, excluding limiter waits.", ("model", "outcome"))
+LLM_TOKENS = registry.counter("sensai_llm_tokens_total", "Tokens reported by the LLM API.", ("model", "kind"))
+LLM_RETRIES = registry.counter("sensai_llm_retries_total", "LLM calls retried or rerouted to another key.", ("model", "reason"))
+LLM_CACHE = registry.counter("sensai_llm_cache_requests_total", "LLM response cache lookups.", ("result",))
+PAGE_CACHE = registry.counter("sensai_course_page_cache_requests_total", "Rendered course page cache lookups.", ("result",))
+RATE_LIMIT_WAIT_SECONDS = registry.histogram("sensai_rate_limit_wait_seconds", "Time calls waited for the rate limiter.", ("model",))
+RAG_SECONDS = registry.histogram("sensai_rag_retrieval_seconds", "RAG retrieval duration (embedding and vector search).", ("kind",))
+RAG_QUERIES = registry.counter("sensai_rag_queries_total", "Queries answered by RAG retrievals.", ("kind",))
+GENERATION_SECONDS = registry.histogram("sensai_generation_seconds", "End-to-end course generation time.", ("outcome",), GENERATION_BUCKETS)
+DB_COMMIT_RETRIES = registry.counter("sensai_db_commit_retries_total", "Database commits retried or given up after a lock or serialization error.", ("outcome",))
+
+class Trace:
+
+    """Spans of one course generation, written as JSON when METRICS_TRACE_DIR is set."""
+
+    def __init__(self, trace_id: str = None, **attributes):
+
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, name: str, started: float, seconds: float, **attributes):
+
+        span = {"kind": kind, "name": name, "start": round(started - self.started, 4), "seconds": round(seconds, 4)}
+        span.update(attributes)
+
+        with self._lock:
+
+            self.spans.append(span)
+
+    def summary(self) -> dict:
+
+        totals = {}
+
+        with self._lock:
+
+            spans = list(self.spans)
+
+        for span in spans:
+
+            entry = totals.setdefault(f"{span['kind']}:{span['name']}", {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["total_seconds"] = round(entry["total_seconds"] + span["seconds"], 4)
+            entry["max_seconds"] = max(entry["max_seconds"], span["seconds"])
+
+        return totals
+
+    def to_dict(self) -> dict:
+
+        with self._lock:
+
+            spans = sorted(self.spans, key=lambda span: span["start"])
+
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "attributes": self.attributes,
+            "summary": self.summary(),
+            "spans": spans
+        }
+
+    def save(self, directory: str) -> str:
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.trace_id}.json")
+
+        with open(path, "w") as f:
+
+            json.dump(self.to_dict(), f, indent=2)
+
+        return path
+
+# The active trace follows the generation into its tasks and worker threads
+_current_trace = ContextVar("sensai_trace", default=None)
+
+def start_trace(trace_id: str = None, **attributes):
+
+    """Starts a trace for the current context; returns it with the token finish_trace needs."""
+
+    trace = Trace(trace_id, **attributes)
+
+    return trace, _current_trace.set(trace)
+
+def finish_trace(trace: Trace, token, directory: str = None) -> dict:
+
+    _current_trace.reset(token)
+    directory = directory or os.getenv("METRICS_TRACE_DIR")
+
+    if directory:
+
+        try:
+
+            logging.info(f"Trace written to {trace.save(directory)}")
+
+        except OSError as e:
+
+            logging.warning(f"Could not write trace {trace.trace_id}: {e}")
+
+    return trace.to_dict()
+
+def _span(kind: str, name: str, started: float, seconds: float, **attributes):
+
+    trace = _current_trace.get()
+
+    if trace is not None:
+
+        trace.add(kind, name, started, seconds, **attributes)
+
+def observe_node(node: str, started: float, seconds: float, outcome: str = "ok"):
+
+    NODE_SECONDS.observe(seconds, node=node, outcome=outcome)
+    _span("node", node, started, seconds, outcome=outcome)
+
+def observe_llm_call(model: str, started: float, seconds: float, outcome: str, usage: dict = None, wait: float = 0.0):
+
+    LLM_CALL_SECONDS.observe(seconds, model=model, outcome=outcome)
+    usage = usage or {}
+
+    for kind in ("input_tokens", "output_tokens"):
+
+        if usage.get(kind):
+
+            LLM_TOKENS.inc(usage[kind], model=model, kind=kind.split("_")[0])
+
+    _span(
+        "llm", model, started, seconds, outcome=outcome, wait_seconds=round(wait, 4),
+        input_tokens=usage.get("input_tokens", 0), output_tokens=usage.get("output_tokens", 0)
+    )
+
+def observe_rate_limit_wait(model: str, seconds: float):
+
+    RATE_LIMIT_WAIT_SECONDS.observe(seconds, model=model)
+
+def count_llm_retry(model: str, reason: str):
+
+    LLM_RETRIES.inc(model=model, reason=reason)
+
+def count_llm_cache(hit: bool):
+
+    LLM_CACHE.inc(result="hit" if hit else "miss")
+
+def count_page_cache(hit: bool):
+
+    PAGE_CACHE.inc(result="hit" if hit else "miss")
+
+def observe_rag(kind: str, started: float, seconds: float, queries: int):
+
+    RAG_SECONDS.observe(seconds, kind=kind)
+    RAG_QUERIES.inc(queries, kind=kind)
+    _span("rag", kind, started, seconds, queries=queries)
+
+def observe_generation(seconds: float, outcome: str):
+
+    GENERATION_SECONDS.observe(seconds, outcome=outcome)
+
+def count_db_retry(outcome: str):
+
+    DB_COMMIT_RETRIES.inc(outcome=outcome)
+
+class GraphNodeMetrics(BaseCallbackHandler):
+
+    """
+    Times every LangGraph node (fetch_materials, plan_curriculum, ...) of
+    every graph run in the process, without touching the agents: LangChain
+    adds this handler to each run's callbacks through a configure hook.
+    """
+
+    run_inline = True
+    ignore_llm = True
+    ignore_chat_model = True
+    ignore_retriever = True
+    ignore_agent = True
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self._started = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+
+        node = (metadata or {}).get("langgraph_node")
+
+        # Only the node itself, not the runnables LangGraph nests inside it
+        if node and kwargs.get("name") == node:
+
+            with self._lock:
+
+                self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id, outcome: str):
+
+        with self._lock:
+
+            started = self._started.pop(run_id, None)
+
+        if started is not None:
+
+            node, since = started
+            observe_node(node, since, time.perf_counter() - since, outcome)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+
+        self._finish(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+
+        self._finish(run_id, "error")
+
+_node_metrics = ContextVar(
+    "sensai_node_metrics",
+    default=GraphNodeMetrics() if os.getenv("METRICS_NODE_HOOK", "1") == "1" else None
+)
+register_configure_hook(_node_metrics, True)
+
+def render_metrics() -> str:
+
+    return registry.render()
@@ -0,0 +1,54 @@
+import os
+import hashlib
+import threading
+from backend.src.cache import SQLiteCache
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_page_cache():
+
+    """Process-wide cache of rendered course pages, or None when COURSE_PAGE_CACHE_ENABLED=0."""
+
+    global _cache
+
+    if os.getenv("COURSE_PAGE_CACHE_ENABLED", "1") != "1":
+
+        return None
+
+    with _cache_lock:
+
+        if _cache is None:
+
+            _cache = SQLiteCache(
+                path=os.getenv("COURSE_PAGE_CACHE_PATH", "page_cache.db"),
+                table="course_pages",
+                ttl=float(os.getenv("COURSE_PAGE_CACHE_TTL", str(30 * 24 * 3600))),
+                max_entries=int(os.getenv("COURSE_PAGE_CACHE_MAX_ENTRIES", "2000"))
+            )
+
+        return _cache
+
+def template_version(jinja_env, names: list) -> str:
+
+    """Hash of the templates a page is rendered from; a changed template misses every cached page."""
+
+    digest = hashlib.sha256()
+
+    for name in names:
+
+        source, _, _ = jinja_env.loader.get_source(jinja_env, name)
+        digest.update(name.encode("utf-8"))
+        digest.update(source.encode("utf-8"))
+
+    return digest.hexdigest()[:16]
+
+def course_page_key(course_id: int, artifact_id: int, version: str) -> str:
+
+    """
+    Stored courses never change, so the page is keyed on the course and the
+    template version only. The artifact id guards against SQLite reusing
+    the id of a deleted course for a different one.
+    """
+
+    return f"course:{course_id}:{artifact_id or 0}:{version}"
@@ -0,0 +1,500 @@
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List
+from backend.src.pipelines.vector_index import partition_metadata
+from backend.src.logger import logging
+from backend.src.exception import CustomException
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+def discover_files(source: str) -> List[str]:
+
+    """A directory (searched recursively), a glob pattern or a single file."""
+
+    if os.path.isdir(source):
+
+        paths = glob.glob(os.path.join(source, "**", "*"), recursive=True)
+
+    else:
+
+        paths = glob.glob(source, recursive=True)
+
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(SUPPORTED_EXTENSIONS))
+
+def file_hash(path: str) -> str:
+
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+
+        for block in iter(lambda: f.read(1 << 20), b""):
+
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def partition_tag(partition: dict) -> str:
+
+    return json.dumps(partition, sort_keys=True) if partition else ""
+
+def chunk_id(text: str, partition: dict = None) -> str:
+
+    """
+    Chunks are content addressed: identical text is embedded and stored once
+    per subject/standard partition.
+    """
+
+    return hashlib.sha256((partition_tag(partition) + text).encode("utf-8")).hexdigest()
+
+def load_and_split(path: str, chunk_size: int = 1000, chunk_overlap: int = 200, partition: dict = None) -> tuple:
+
+    """
+    Runs in a worker process: parses one file and splits it into chunks
+    tagged with the file's subject/standard partition.
+    Returns (path, page count, [(chunk id, text, metadata), ...]).
+    """
+
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    loader = PyPDFLoader(path) if path.lower().endswith(".pdf") else TextLoader(path, autodetect_encoding=True)
+    documents = loader.load()
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+
+    for split in splitter.split_documents(documents):
+
+        # Chroma only accepts scalar metadata
+        metadata = {k: v for k, v in split.metadata.items() if isinstance(v, (str, int, float, bool))}
+        metadata.update(partition or {})
+        metadata["source"] = path
+        chunks.append((chunk_id(split.page_content, partition), split.page_content, metadata))
+
+    return path, len(documents), chunks
+
+class IngestionManifest:
+
+    """
+    Sidecar SQLite record of what is in the vector store: the content hash,
+    size, mtime and partition of every ingested file and which chunk ids each
+    file uses. A chunk shared by several files is deleted only when none
+    refers to it.
+    """
+
+    def __init__(self, path: str):
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, file_hash TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (chunk_id, path))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_path ON chunks (path)")
+
+        # Manifests written before partitioning have no partition column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+
+        if "partition" not in columns:
+
+            self._conn.execute("ALTER TABLE files ADD COLUMN partition TEXT NOT NULL DEFAULT ''")
+
+    def lookup(self, path: str):
+
+        with self._lock:
+
+            return self._conn.execute("SELECT file_hash, size, mtime, partition FROM files WHERE path = ?", (path,)).fetchone()
+
+    def tracked_paths(self) -> List[str]:
+
+        with self._lock:
+
+            return [row[0] for row in self._conn.execute("SELECT path FROM files")]
+
+    def touch(self, path: str, size: int, mtime: float):
+
+        with self._lock:
+
+            self._conn.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?", (size, mtime, path))
+
+    def known_chunks(self, ids: List[str]) -> set:
+
+        known = set()
+
+        with self._lock:
+
+            for i in range(0, len(ids), 500):
+
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                known.update(row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT chunk_id FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                ))
+
+        return known
+
+    def _replace(self, path: str, ids: List[str], extra_candidates: set) -> set:
+
+        old = {row[0] for row in self._conn.execute("SELECT chunk_id FROM chunks WHERE path = ?", (path,))}
+        self._conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+        self._conn.executemany("INSERT OR IGNORE INTO chunks (chunk_id, path) VALUES (?, ?)", [(i, path) for i in ids])
+
+        candidates = (old | extra_candidates) - set(ids)
+
+        return {
+            c for c in candidates
+            if not self._conn.execute("SELECT 1 FROM chunks WHERE chunk_id = ? LIMIT 1", (c,)).fetchone()
+        }
+
+    def commit_file(self, path: str, file_hash: str, size: int, mtime: float, ids: List[str],
+                    extra_candidates: set = frozenset(), partition: str = "") -> set:
+
+        """Records the file's new chunk set and returns chunk ids nothing refers to any more."""
+
+        with self._lock:
+
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            try:
+
+                orphans = self._replace(path, ids, set(extra_candidates))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, file_hash, size, mtime, partition) VALUES (?, ?, ?, ?, ?)",
+                    (path, file_hash, size, mtime, partition)
+                )
+                self._conn.execute("COMMIT")
+
+            except Exception:
+
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return orphans
+
+    def remove_file(self, path: str) -> set:
+
+        with self._lock:
+
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            try:
+
+                orphans = self._replace(path, [], set())
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                self._conn.execute("COMMIT")
+
+            except Exception:
+
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return orphans
+
+class IngestionStats:
+
+    def __init__(self):
+
+        self.files = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.failed = 0
+        self.pages = 0
+        self.chunks = 0
+        self.embedded = 0
+        self.deleted = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def stop(self):
+
+        self.seconds = time.perf_counter() - self.started
+
+    def as_dict(self) -> dict:
+
+        seconds = self.seconds or time.perf_counter() - self.started
+
+        return {
+            "files": self.files,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+            "failed": self.failed,
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "embedded": self.embedded,
+            "deleted": self.deleted,
+            "seconds": round(seconds, 2),
+            "pages_per_sec": round(self.pages / seconds, 2) if seconds else 0.0,
+            "chunks_per_sec": round(self.chunks / seconds, 2) if seconds else 0.0
+        }
+
+class IngestionEngine:
+
+    """
+    Incremental bulk loader for the vector store. Unchanged files are detected
+    from the manifest (size/mtime, then content hash) without parsing. Changed
+    files are parsed in a process pool; only chunks whose content is not
+    already stored are embedded, in batches, and chunks no file uses any more
+    are deleted.
+
+    Chunks are tagged with a subject/standard partition, given for the whole
+    run or, with by_folder, read from <source>/<subject>/<standard>/... paths.
+    """
+
+    def __init__(self, vector_store, embeddings, manifest_path: str, batch_size: int = 64, workers: int = None,
+                 chunk_size: int = 1000, chunk_overlap: int = 200, subject: str = None, standard=None,
+                 by_folder: bool = False):
+
+        self.vector_store = vector_store
+        self.embeddings = embeddings
+        self.manifest = IngestionManifest(manifest_path)
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.subject = subject
+        self.standard = standard
+        self.by_folder = by_folder
+
+    def _partition(self, path: str, source: str) -> dict:
+
+        subject, standard = self.subject, self.standard
+
+        if self.by_folder and os.path.isdir(source):
+
+            folders = os.path.relpath(path, source).split(os.sep)[:-1]
+
+            if folders and subject is None:
+
+                subject = folders[0]
+
+            if len(folders) > 1 and standard is None:
+
+                standard = folders[1]
+
+        return partition_metadata(subject, standard)
+
+    def _write_batch(self, batch: list, stats: IngestionStats):
+
+        texts = [text for _, text, _ in batch]
+        vectors = self.embeddings.embed_documents(texts)
+
+        self.vector_store.upsert(
+            ids=[cid for cid, _, _ in batch],
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[metadata for _, _, metadata in batch]
+        )
+
+        stats.embedded += len(batch)
+
+    def _delete_chunks(self, ids: set, stats: IngestionStats):
+
+        if ids:
+
+            self.vector_store.delete(list(ids))
+            stats.deleted += len(ids)
+
+    def _legacy_chunks(self, path: str) -> set:
+
+        """Chunks stored for this path before it was tracked (random ids, not content addressed)."""
+
+        return set(self.vector_store.ids_where({"source": path}))
+
+    def _changed_files(self, paths: List[str], source: str, stats: IngestionStats) -> list:
+
+        changed = []
+
+        for path in paths:
+
+            st = os.stat(path)
+            record = self.manifest.lookup(path)
+            partition = self._partition(path, source)
+            same_partition = record is not None and record[3] == partition_tag(partition)
+
+            if same_partition and record[1] == st.st_size and record[2] == st.st_mtime:
+
+                stats.unchanged += 1
+                continue
+
+            digest = file_hash(path)
+
+            if same_partition and record[0] == digest:
+
+                self.manifest.touch(path, st.st_size, st.st_mtime)
+                stats.unchanged += 1
+                continue
+
+            changed.append((path, digest, st, record is None, partition))
+
+        return changed
+
+    def _parse(self, files: list):
+
+        """files: [(path, partition), ...]"""
+
+        worker = partial(load_and_split, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+
+        if len(files) <= 1 or self.workers == 1:
+
+            for path, partition in files:
+
+                try:
+
+                    yield path, worker(path, partition=partition), None
+
+                except Exception as e:
+
+                    yield path, None, e
+
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+
+            futures = {pool.submit(worker, path, partition=partition): path for path, partition in files}
+
+            # Embedding overlaps with parsing: files are consumed as they finish
+            for future in as_completed(futures):
+
+                try:
+
+                    yield futures[future], future.result(), None
+
+                except Exception as e:
+
+                    yield futures[future], None, e
+
+    def ingest(self, source: str, prune: bool = True) -> dict:
+
+        try:
+
+            stats = IngestionStats()
+            changed = {
+                path: (digest, st, untracked, partition)
+                for path, digest, st, untracked, partition in self._changed_files(discover_files(source), source, stats)
+            }
+
+            logging.info(f"Ingestion: {len(changed)} new or changed files, {stats.unchanged} unchanged.")
+
+            buffer = []
+            enqueued = set()
+            pending = []
+            queued_total = 0
+            written_total = 0
+
+            def commit_ready():
+
+                # A file's manifest entry is written once all of its new chunks are stored
+                while pending and pending[0][0] <= written_total:
+
+                    _, path, digest, st, ids, untracked, partition = pending.pop(0)
+                    legacy = self._legacy_chunks(path) if untracked else set()
+                    orphans = self.manifest.commit_file(path, digest, st.st_size, st.st_mtime, ids, legacy, partition_tag(partition))
+                    self._delete_chunks(orphans, stats)
+
+            for path, result, error in self._parse([(path, entry[3]) for path, entry in changed.items()]):
+
+                if error is not None:
+
+                    logging.error(f"Ingestion: Failed to parse {path}: {error}")
+                    stats.failed += 1
+                    continue
+
+                _, pages, chunks = result
+                digest, st, untracked, partition = changed[path]
+
+                unique = {cid: (cid, text, metadata) for cid, text, metadata in chunks}
+                ids = list(unique)
+                known = self.manifest.known_chunks(ids) | enqueued
+                new = [unique[cid] for cid in ids if cid not in known]
+
+                enqueued.update(cid for cid, _, _ in new)
+                buffer.extend(new)
+                queued_total += len(new)
+                pending.append((queued_total, path, digest, st, ids, untracked, partition))
+
+                stats.files += 1
+                stats.pages += pages
+                stats.chunks += len(ids)
+
+                while len(buffer) >= self.batch_size:
+
+                    self._write_batch(buffer[:self.batch_size], stats)
+                    written_total += self.batch_size
+                    buffer = buffer[self.batch_size:]
+
+                commit_ready()
+                logging.info(f"Ingestion: {path} ({pages} pages, {len(ids)} chunks, {len(new)} new)")
+
+            if buffer:
+
+                self._write_batch(buffer, stats)
+                written_total += len(buffer)
+
+            commit_ready()
+
+            if prune:
+
+                for path in self.manifest.tracked_paths():
+
+                    if not os.path.exists(path):
+
+                        self._delete_chunks(self.manifest.remove_file(path), stats)
+                        stats.removed += 1
+
+            self.vector_store.save()
+            stats.stop()
+            logging.info(f"Ingestion finished: {stats.as_dict()}")
+
+            return stats.as_dict()
+
+        except Exception as e:
+
+            raise CustomException(e, sys)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Bulk-load textbooks into the RAG vector store.")
+    parser.add_argument("source", help="directory, glob pattern or file")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", "64")))
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--no-prune", action="store_true", help="keep chunks of files that no longer exist")
+    parser.add_argument("--subject", default=None, help="tag every chunk of this run with a subject")
+    parser.add_argument("--standard", default=None, help="tag every chunk of this run with a standard/grade")
+    parser.add_argument("--by-folder", action="store_true", help="read subject/standard from <source>/<subject>/<standard>/ paths")
+    args = parser.parse_args(argv)
+
+    from backend.src.pipelines.rag import RAGPipeline
+
+    rag = RAGPipeline()
+    engine = rag.ingestion_engine(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        subject=args.subject,
+        standard=args.standard,
+        by_folder=args.by_folder
+    )
+
+    print(json.dumps(engine.ingest(args.source, prune=not args.no_prune), indent=2))
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,319 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from backend.src.logger import logging
+
+def embedding_cache_key(model_id: str, text: str) -> str:
+
+    """Whitespace and case are normalized; the MiniLM models are uncased anyway."""
+
+    normalized = " ".join(text.split()).casefold()
+
+    return hashlib.sha256(f"{model_id}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+class MemmapEmbeddingStore:
+
+    """
+    Fixed-capacity float32 matrix on disk (np.memmap) plus a SQLite index of
+    key -> row. The mapping is shared, so every gunicorn worker sees rows
+    written by the others; the least recently used row is reused when full.
+    """
+
+    def __init__(self, path: str, dim: int, capacity: int):
+
+        self.dim = dim
+        self.capacity = capacity
+        self.vectors_path = f"{path}.f32"
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"{path}.sqlite", timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+
+        self._conn.execute("BEGIN IMMEDIATE")
+
+        try:
+
+            meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+
+            if meta.get("dim") != dim or meta.get("capacity") != capacity:
+
+                # Layout changed (new model or size): start over
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?), ('capacity', ?)", (dim, capacity))
+
+                if meta:
+
+                    logging.info(f"Embedding store {path}: layout changed, cleared.")
+
+            size = capacity * dim * 4
+            fd = os.open(self.vectors_path, os.O_RDWR | os.O_CREAT)
+
+            try:
+
+                if os.fstat(fd).st_size != size:
+
+                    os.ftruncate(fd, size)
+
+            finally:
+
+                os.close(fd)
+
+            self._conn.execute("COMMIT")
+
+        except Exception:
+
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+
+    @staticmethod
+    def stored_dim(path: str):
+
+        """Dimension of an existing store, or None if there is none yet."""
+
+        if not os.path.exists(f"{path}.sqlite"):
+
+            return None
+
+        conn = sqlite3.connect(f"{path}.sqlite", timeout=30)
+
+        try:
+
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+
+        except sqlite3.OperationalError:
+
+            row = None
+
+        finally:
+
+            conn.close()
+
+        return row[0] if row else None
+
+    def get_many(self, keys: List[str]) -> dict:
+
+        if not keys:
+
+            return {}
+
+        placeholders = ",".join("?" * len(keys))
+
+        with self._lock:
+
+            # Same write lock as put(): no process can evict and refill a slot
+            # between looking it up and copying its row out of the matrix
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            try:
+
+                rows = self._conn.execute(f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", keys).fetchall()
+
+                if rows:
+
+                    self._conn.execute(
+                        f"UPDATE entries SET last_access = ? WHERE key IN ({placeholders})",
+                        [time.time(), *keys]
+                    )
+
+                found = {key: np.array(self.vectors[slot]) for key, slot in rows}
+                self._conn.execute("COMMIT")
+
+            except Exception:
+
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return found
+
+    def put(self, key: str, vector):
+
+        with self._lock:
+
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            try:
+
+                if self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone():
+
+                    self._conn.execute("COMMIT")
+                    return
+
+                count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+                if count < self.capacity:
+
+                    slot = count
+
+                else:
+
+                    victim, slot = self._conn.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_access ASC LIMIT 1"
+                    ).fetchone()
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (victim,))
+
+                # The row is written before the index entry becomes visible
+                self.vectors[slot] = np.asarray(vector, dtype=np.float32)
+                self.vectors.flush()
+                self._conn.execute(
+                    "INSERT INTO entries (key, slot, last_access) VALUES (?, ?, ?)",
+                    (key, slot, time.time())
+                )
+                self._conn.execute("COMMIT")
+
+            except Exception:
+
+                self._conn.execute("ROLLBACK")
+                raise
+
+class CachedEmbeddings(Embeddings):
+
+    """
+    Bounded, thread-safe LRU cache for query embeddings, optionally backed by a
+    MemmapEmbeddingStore so it survives restarts. Document embeddings (ingestion)
+    pass straight through; they are rarely repeated and would flush the cache.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_id: str, max_entries: int = 10000,
+                 store_path: str = None, store_entries: int = 50000):
+
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.store_path = store_path
+        self.store_entries = store_entries
+        self.store = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._store_lock = threading.Lock()
+
+        if store_path and MemmapEmbeddingStore.stored_dim(store_path):
+
+            self._open_store(MemmapEmbeddingStore.stored_dim(store_path))
+
+    def _open_store(self, dim: int):
+
+        with self._store_lock:
+
+            if self.store is None and self.store_path:
+
+                try:
+
+                    self.store = MemmapEmbeddingStore(self.store_path, dim, self.store_entries)
+
+                except Exception as e:
+
+                    logging.warning(f"Embedding store unavailable, caching in memory only: {e}")
+                    self.store_path = None
+
+        return self.store
+
+    def _remember(self, key: str, vector):
+
+        with self._lock:
+
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+
+                self._entries.popitem(last=False)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+
+        """Cached embeddings for many queries; all misses are embedded in one batch."""
+
+        keys = [embedding_cache_key(self.model_id, text) for text in texts]
+        found = {}
+
+        with self._lock:
+
+            for key in keys:
+
+                if key in self._entries:
+
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+
+            self.hits += len(found)
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+
+        if missing and self.store is not None:
+
+            from_disk = self.store.get_many(missing)
+
+            for key, vector in from_disk.items():
+
+                self._remember(key, vector)
+
+            found.update(from_disk)
+            self.disk_hits += len(from_disk)
+            missing = [k for k in missing if k not in from_disk]
+
+        if missing:
+
+            pending = {key: text for key, text in zip(keys, texts) if key in missing}
+            pending_texts = list(pending.values())
+
+            if len(pending_texts) == 1:
+
+                vectors = [self.embeddings.embed_query(pending_texts[0])]
+
+            else:
+
+                vectors = self.embeddings.embed_documents(pending_texts)
+
+            store = self._open_store(len(vectors[0]))
+
+            for key, vector in zip(pending, vectors):
+
+                vector = np.asarray(vector, dtype=np.float32)
+                found[key] = vector
+                self._remember(key, vector)
+
+                if store is not None:
+
+                    store.put(key, vector)
+
+            self.misses += len(pending)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+
+        return self.embed_queries([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self) -> dict:
+
+        lookups = self.hits + self.disk_hits + self.misses
+
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
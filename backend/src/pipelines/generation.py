@@ -0,0 +1,151 @@
+import sys
+import time
+import asyncio
+from backend.src.registry import get_assistant_agent, get_tutoring_agent, get_testing_agent
+from backend.src.utils import emit_event
+from backend.src.metrics import start_trace, finish_trace, observe_generation
+from backend.src.logger import logging
+from backend.src.exception import CustomException
+
+PHASES = ["assistant", "tutoring", "testing"]
+
+async def generate_course(topic: str, subject: str, standard: int, on_event=None, trace_id: str = None) -> dict:
+
+    """
+    Orchestrates the 3 AI Agents for one course.
+    on_event is an optional coroutine function called as on_event(event, data) with
+    "phase" as each phase starts, then "guide", "plan", "lessons" and "tests" as
+    partial content becomes available. Node, LLM and RAG timings of the run are
+    collected in a trace, saved as <trace_id>.json when METRICS_TRACE_DIR is set.
+    """
+
+    config = {"configurable": {"on_event": on_event}}
+
+    async def notify(phase):
+
+        await emit_event(config, "phase", {"phase": phase})
+
+    trace, token = start_trace(trace_id, topic=topic, subject=subject, standard=standard)
+    started = time.perf_counter()
+
+    try:
+
+        logging.info(f"Generating course: {topic} / {subject} / {standard}")
+
+        # Phase 1: Assistant
+        await notify("assistant")
+
+        assistant = get_assistant_agent()
+        initial_state = {
+            "standard": int(standard),
+            "subject": subject,
+            "topic": topic,
+            "raw_study_links": [],
+            "search_failed": False,
+            "topic_draft": "",
+            "student_content": "",
+            "instructions": ""
+        }
+
+        assistant_output = await assistant.graph.ainvoke(initial_state, config=config)
+
+        instructions = assistant_output.get('instructions', '')
+        student_guide_html = assistant_output.get('student_content', '<p>No guide generated.</p>')
+        raw_links_data = assistant_output.get('raw_study_links', [])
+
+        # Phase 2 + 3: Tutoring and Testing, pipelined
+        await notify("tutoring")
+
+        lessons, tests = await run_tutoring_and_testing(
+            get_tutoring_agent(), get_testing_agent(), instructions, int(standard), subject, topic,
+            on_event=on_event, on_phase=notify
+        )
+
+        observe_generation(time.perf_counter() - started, "ok")
+
+        return {
+            "intro": student_guide_html,
+            "links": raw_links_data,
+            "search_failed": assistant_output.get('search_failed', False),
+            "lessons": lessons,
+            "tests": tests
+        }
+
+    except Exception as e:
+
+        observe_generation(time.perf_counter() - started, "error")
+
+        raise CustomException(e, sys)
+
+    finally:
+
+        finish_trace(trace, token)
+
+async def run_tutoring_and_testing(tutor, tester, instructions, standard, subject, topic, on_event=None, on_phase=None):
+
+    """
+    Runs the Tutoring and Testing agents concurrently on their separate API keys.
+    Test prompts only need lesson titles, so test batches start as soon as the
+    curriculum plan exists instead of after every lesson has been written.
+    """
+
+    plan_ready = asyncio.get_running_loop().create_future()
+
+    async def on_tutor_event(event, data):
+
+        if event == "plan" and not plan_ready.done():
+
+            plan_ready.set_result(data["titles"])
+
+        if on_event is not None:
+
+            await on_event(event, data)
+
+    async def run_tutor():
+
+        try:
+
+            lessons = await tutor.run(instructions, standard, subject, topic, on_event=on_tutor_event)
+
+            if not plan_ready.done():
+
+                plan_ready.set_result(list(lessons))
+
+            return lessons
+
+        except Exception as e:
+
+            if not plan_ready.done():
+
+                plan_ready.set_exception(e)
+
+            raise
+
+    async def run_tester():
+
+        titles = await plan_ready
+
+        return await tester.run(titles, on_event=on_event)
+
+    tutor_task = asyncio.create_task(run_tutor())
+    tester_task = asyncio.create_task(run_tester())
+
+    try:
+
+        lessons = await tutor_task
+
+        if not tester_task.done() and on_phase is not None:
+
+            await on_phase("testing")
+
+        tests = await tester_task
+
+    except BaseException:
+
+        tutor_task.cancel()
+        tester_task.cancel()
+        # Retrieves their outcome, so an error already raised by the other task is not logged as never retrieved
+        await asyncio.gather(tutor_task, tester_task, return_exceptions=True)
+        raise
+
+    return lessons, tests
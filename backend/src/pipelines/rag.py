@@ -1,79 +1,126 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
+import time
+from typing import List
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from backend.src.pipelines.embedding_cache import CachedEmbeddings
+from backend.src.pipelines.vector_index import create_vector_index, partition_metadata, equality_filter
+from backend.src.metrics import observe_rag
 from backend.src.logger import logging
 
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
 class RAGPipeline:
-    def __init__(self):
+    def __init__(self, embeddings=None, model_id: str = EMBEDDING_MODEL, backend: str = None,
+                 directory: str = None, precision: str = None):
         """
         Initializes the RAG pipeline and connects to the persistent database.
+        Arguments default to the environment settings; benchmarks pass their
+        own embeddings and a scratch directory.
         """
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        self.persist_directory = "./chroma_db" 
+        # Query embeddings are cached (optionally on disk, shared between workers)
+        self.embeddings = CachedEmbeddings(
+            embeddings or HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL),
+            model_id=model_id,
+            max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+            store_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+            store_entries=int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "50000"))
+        )
+        self.backend = backend or os.getenv("VECTOR_BACKEND", "chroma")
         self.vector_store = None
 
-        # Always connect to the existing database
-        self.vector_store = Chroma(
-            persist_directory=self.persist_directory, 
-            embedding_function=self.embeddings
+        # Always connect to the existing database (chroma, flat or hnsw, see vector_index.py)
+        self.vector_store = create_vector_index(
+            self.backend,
+            self.embeddings,
+            directory=directory or os.getenv("VECTOR_INDEX_PATH") or None,
+            precision=precision or os.getenv("VECTOR_PRECISION", "float32")
         )
-        
-        if os.path.exists(self.persist_directory):
-            logging.info(f"RAG: Connected to existing knowledge base at {self.persist_directory}")
+        self.persist_directory = self.vector_store.directory
+        self.manifest_path = os.path.join(self.persist_directory, "ingest_manifest.sqlite")
+
+        logging.info(f"RAG: Connected to {self.backend} knowledge base at {self.persist_directory} ({self.vector_store.count()} chunks)")
 
     def ingest_document(self, file_path: str):
         """
-        Loads a new document (PDF or Text). 
-        PREVENTS DUPLICATES by checking if the file is already in the DB.
+        Loads a document (PDF or Text) incrementally.
+        Unchanged files are skipped, edited ones only re-embed the chunks that
+        changed, and identical content at another path is stored once.
         """
-        # 1. Check if file is already ingested
-        existing_docs = self.vector_store.get(where={"source": file_path})
-        
-        if existing_docs and len(existing_docs["ids"]) > 0:
-            logging.info(f"RAG: Skipping {file_path} - Already exists in database.")
-            return
+        return self.ingestion_engine(workers=1).ingest(file_path, prune=False)
 
-        logging.info(f"RAG: Ingesting new file: {file_path}...")
-        
-        # 2. Load File
-        if file_path.endswith(".pdf"):
-            loader = PyPDFLoader(file_path)
-        else:
-            loader = TextLoader(file_path)
-        
-        documents = loader.load()
-        self._process_and_store(documents, source_name=file_path)
-
-    def _process_and_store(self, documents, source_name):
-        """Helper to split text and add to vector store."""
-        if not documents:
-            logging.warning(f"RAG: Source {source_name} was empty or could not be read.")
-            return
-
-        # 3. Split Text
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
-        splits = text_splitter.split_documents(documents)
-        
-        # 4. Add to Vector Store
-        self.vector_store.add_documents(documents=splits)
-        
-        logging.info(f"RAG: Successfully added {len(splits)} new chunks from {source_name}.")
+    def ingestion_engine(self, **kwargs):
+        """Bulk/incremental loader bound to this store (see data_ingestion.py)."""
+        from backend.src.pipelines.data_ingestion import IngestionEngine
 
-    def retrieve_context(self, query: str, k: int = 2) -> str:
+        return IngestionEngine(self.vector_store, self.embeddings, manifest_path=self.manifest_path, **kwargs)
+
+    def retrieve_context(self, query: str, k: int = 2, subject: str = None, standard=None) -> str:
         """
-        Searches the knowledge base for relevant text.
+        Searches the knowledge base for relevant text, within the course's
+        subject/standard partition when one is given.
         """
         if not self.vector_store:
             return "No knowledge base loaded."
 
+        started = time.perf_counter()
+
         # Search
-        docs = self.vector_store.similarity_search(query, k=k)
+        hits = self._search([self.embeddings.embed_query(query)], k, subject, standard)[0]
         
         # Combine content
-        context_text = "\n\n".join([f"[Source Extract]: {doc.page_content}" for doc in docs])
-        return context_text
\ No newline at end of file
+        context = self._format_context([document for _, document, _, _ in hits])
+        observe_rag("single", started, time.perf_counter() - started, 1)
+        return context
+
+    def retrieve_context_batch(self, queries: List[str], k: int = 2, subject: str = None, standard=None) -> List[str]:
+        """
+        Same as retrieve_context for many queries at once: one batched
+        embedding pass and one multi-query vector search.
+        """
+        if not self.vector_store:
+            return ["No knowledge base loaded."] * len(queries)
+
+        if not queries:
+            return []
+
+        started = time.perf_counter()
+
+        # Duplicate titles are embedded and searched once
+        unique = list(dict.fromkeys(queries))
+        vectors = self.embeddings.embed_queries(unique)
+
+        results = self._search(vectors, k, subject, standard)
+
+        contexts = {
+            query: self._format_context([document for _, document, _, _ in hits])
+            for query, hits in zip(unique, results)
+        }
+
+        observe_rag("batch", started, time.perf_counter() - started, len(unique))
+        logging.info(f"RAG: Retrieved context for {len(unique)} queries in one batch.")
+        return [contexts[query] for query in queries]
+
+    def _search(self, vectors, k: int, subject: str = None, standard=None) -> list:
+        """
+        Narrowest partition that has chunks first: subject and standard, then
+        subject only, then the whole corpus (untagged or unknown subjects).
+        """
+        tags = partition_metadata(subject, standard)
+        filters = [equality_filter(tags)] if tags else []
+
+        if "subject" in tags and "standard" in tags:
+            filters.append(equality_filter({"subject": tags["subject"]}))
+
+        filters.append(None)
+
+        for where in filters:
+            results = self.vector_store.query(vectors, k, where)
+
+            if any(results):
+                break
+
+        return results
+
+    @staticmethod
+    def _format_context(texts: List[str]) -> str:
+        return "\n\n".join([f"[Source Extract]: {text}" for text in texts])
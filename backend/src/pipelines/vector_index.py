@@ -0,0 +1,741 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List
+import numpy as np
+from langchain_core.documents import Document
+from backend.src.logger import logging
+
+VECTOR_BACKENDS = ("chroma", "flat", "hnsw")
+PRECISIONS = ("float32", "float16", "int8")
+SCAN_BLOCK = 512
+
+class VectorIndex(ABC):
+
+    """
+    What RAGPipeline and the ingestion engine need from a vector store.
+    Hits are (id, document, metadata, score) with higher scores more similar.
+    `where` is a Chroma-style equality filter: {"key": value} or {"$and": [...]}.
+    """
+
+    directory = None
+
+    def __init__(self, embeddings):
+
+        self.embeddings = embeddings
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+
+        pass
+
+    @abstractmethod
+    def ids_where(self, where: dict) -> List[str]:
+
+        pass
+
+    @abstractmethod
+    def query(self, vectors, k: int, where: dict = None) -> List[list]:
+
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+
+        pass
+
+    def save(self):
+
+        """Makes pending writes durable and visible to other processes."""
+
+    def similarity_search(self, query: str, k: int = 4, where: dict = None) -> List[Document]:
+
+        hits = self.query([self.embeddings.embed_query(query)], k, where)[0]
+
+        return [Document(page_content=document, metadata=metadata) for _, document, metadata, _ in hits]
+
+class ChromaIndex(VectorIndex):
+
+    """The original persistent Chroma store at ./chroma_db."""
+
+    def __init__(self, embeddings, directory: str = None, collection_name: str = "langchain"):
+
+        from langchain_chroma import Chroma
+
+        super().__init__(embeddings)
+        self.directory = directory
+        self.store = Chroma(
+            collection_name=collection_name,
+            persist_directory=directory,
+            embedding_function=embeddings
+        )
+        self.collection = self.store._collection
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids):
+
+        if ids:
+
+            self.collection.delete(ids=list(ids))
+
+    def ids_where(self, where):
+
+        return self.collection.get(where=where, include=[])["ids"]
+
+    def query(self, vectors, k, where=None):
+
+        if not len(vectors):
+
+            return []
+
+        results = self.collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            where=where or None,
+            include=["documents", "metadatas", "distances"]
+        )
+
+        return [
+            [(i, d, m or {}, -dist) for i, d, m, dist in zip(ids, docs, metas, dists)]
+            for ids, docs, metas, dists in zip(results["ids"], results["documents"], results["metadatas"], results["distances"])
+        ]
+
+    def count(self):
+
+        return self.collection.count()
+
+    def similarity_search(self, query, k=4, where=None):
+
+        return self.store.similarity_search(query, k=k, filter=where or None)
+
+def partition_metadata(subject=None, standard=None) -> dict:
+
+    """Normalized subject/standard tags, as stored on chunks and used in filters."""
+
+    tags = {}
+
+    if subject:
+
+        tags["subject"] = " ".join(str(subject).split()).casefold()
+
+    if standard is not None and str(standard).strip():
+
+        standard = str(standard).strip()
+        tags["standard"] = int(standard) if standard.isdigit() else standard.casefold()
+
+    return tags
+
+def equality_filter(fields: dict):
+
+    """{"a": 1, "b": 2} -> a filter both Chroma and FlatIndex accept (Chroma wants $and for several keys)."""
+
+    clauses = [{key: value} for key, value in sorted(fields.items())]
+
+    if not clauses:
+
+        return None
+
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def matches(metadata: dict, where: dict) -> bool:
+
+    if "$and" in where:
+
+        return all(matches(metadata, clause) for clause in where["$and"])
+
+    return all(metadata.get(key) == value for key, value in where.items())
+
+class FlatIndex(VectorIndex):
+
+    """
+    Exact cosine search over a memory-mapped float32 matrix. Rows are
+    L2-normalized on insert, so a query is one matrix product plus a
+    partial sort. Ids, documents and metadata live in a SQLite file next
+    to the matrix; web workers pick up writes from an ingestion process by
+    checking a version counter every few seconds.
+
+    With precision float16 or int8 (per-row scale) queries scan a reduced
+    copy of the matrix, which is all that has to stay resident, and only the
+    best `rescore` * k candidates are re-scored from the float32 rows.
+    int8 is a quarter of the size and also faster to scan; float16 halves the
+    size but NumPy widens it slowly, so it costs latency.
+    """
+
+    def __init__(self, embeddings, directory: str, refresh_interval: float = 5.0,
+                 precision: str = "float32", rescore: int = 4):
+
+        if precision not in PRECISIONS:
+
+            raise ValueError(f"Unknown vector precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+
+        super().__init__(embeddings)
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.precision = precision
+        self.rescore = rescore
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.quantized_path = os.path.join(directory, f"vectors.{precision}")
+        self.scales_path = os.path.join(directory, "scales.int8.f32")
+        self.quantized = None
+        self.scales = None
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, document TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+
+        self._load()
+
+    def _meta(self) -> dict:
+
+        return dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+
+    def _load(self):
+
+        with self._lock:
+
+            meta = self._meta()
+            self.dim = meta.get("dim")
+            self.capacity = meta.get("capacity", 0)
+            self.version = meta.get("version", 0)
+
+            self._rows = {}
+            self._ids = [None] * self.capacity
+            self._metadata = [None] * self.capacity
+
+            for id_, row, metadata in self._conn.execute("SELECT id, row, metadata FROM rows"):
+
+                self._rows[id_] = row
+                self._ids[row] = id_
+                self._metadata[row] = json.loads(metadata)
+
+            self._size = max(self._rows.values()) + 1 if self._rows else 0
+            self._free = [row for row in range(self._size) if self._ids[row] is None]
+            self._masks = {}
+            self._checked = time.monotonic()
+            self.vectors = self._open_matrix() if self.capacity else None
+
+            if self.precision != "float32" and self.capacity:
+
+                self._resize_quantized()
+
+                if meta.get(f"{self.precision}_version") != self.version:
+
+                    self._requantize()
+
+    def _open_matrix(self):
+
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+
+        """
+        float32 rows for re-scoring. Read with pread rather than through the
+        mapping: page faults pull in whole neighbourhoods of the file, and the
+        float32 matrix would creep back into resident memory.
+        """
+
+        size = self.dim * 4
+
+        with open(self.vectors_path, "rb", buffering=0) as f:
+
+            return np.stack([
+                np.frombuffer(os.pread(f.fileno(), size, int(row) * size), dtype=np.float32)
+                for row in rows
+            ])
+
+    def _resize_quantized(self):
+
+        dtype = np.float16 if self.precision == "float16" else np.int8
+
+        with open(self.quantized_path, "ab") as f:
+
+            f.truncate(self.capacity * self.dim * np.dtype(dtype).itemsize)
+
+        self.quantized = np.memmap(self.quantized_path, dtype=dtype, mode="r+", shape=(self.capacity, self.dim))
+
+        if self.precision == "int8":
+
+            with open(self.scales_path, "ab") as f:
+
+                f.truncate(self.capacity * 4)
+
+            self.scales = np.memmap(self.scales_path, dtype=np.float32, mode="r+", shape=(self.capacity,))
+
+    def _quantize(self, rows, vectors: np.ndarray):
+
+        if self.precision == "float16":
+
+            self.quantized[rows] = vectors.astype(np.float16)
+
+        else:
+
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            self.quantized[rows] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self.scales[rows] = scales
+
+    def _requantize(self):
+
+        """Rebuilds the reduced copy from the float32 rows (new precision or stale copy)."""
+
+        logging.info(f"Vector index {self.directory}: building {self.precision} copy of {self._size} rows.")
+
+        for start in range(0, self._size, SCAN_BLOCK):
+
+            rows = np.arange(start, min(self._size, start + SCAN_BLOCK))
+            self._quantize(rows, np.asarray(self.vectors[rows]))
+
+        self.quantized.flush()
+        self._set_meta(**{f"{self.precision}_version": self.version})
+
+    def _version_meta(self) -> dict:
+
+        meta = {"version": self.version}
+
+        if self.precision != "float32":
+
+            meta[f"{self.precision}_version"] = self.version
+
+        return meta
+
+    def _maybe_reload(self):
+
+        if time.monotonic() - self._checked < self.refresh_interval:
+
+            return
+
+        self._checked = time.monotonic()
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+
+        if row and row[0] != self.version:
+
+            logging.info(f"Vector index {self.directory}: reloading (version {self.version} -> {row[0]}).")
+            self._load()
+
+    def _grow(self, needed: int):
+
+        capacity = max(1024, self.capacity)
+
+        while capacity < needed:
+
+            capacity *= 2
+
+        if capacity == self.capacity:
+
+            return
+
+        with open(self.vectors_path, "ab") as f:
+
+            f.truncate(capacity * self.dim * 4)
+
+        self._ids.extend([None] * (capacity - self.capacity))
+        self._metadata.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+        self.vectors = self._open_matrix()
+
+        if self.precision != "float32":
+
+            self._resize_quantized()
+
+    def _set_meta(self, **values):
+
+        self._conn.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", list(values.items()))
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _write_rows(self, rows: List[int], vectors: np.ndarray):
+
+        self.vectors[rows] = vectors
+
+        if self.precision != "float32":
+
+            self._quantize(rows, vectors)
+            self.quantized.flush()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+
+        if not ids:
+
+            return
+
+        vectors = self._normalize(embeddings)
+
+        with self._lock:
+
+            if self.dim is None:
+
+                self.dim = vectors.shape[1]
+
+            rows = []
+
+            for id_ in ids:
+
+                if id_ in self._rows:
+
+                    rows.append(self._rows[id_])
+
+                elif self._free:
+
+                    rows.append(self._free.pop())
+
+                else:
+
+                    rows.append(self._size)
+                    self._size += 1
+
+                self._rows[id_] = rows[-1]
+
+            self._grow(self._size)
+            self._write_rows(rows, vectors)
+            self.vectors.flush()
+
+            for row, id_, metadata in zip(rows, ids, metadatas):
+
+                self._ids[row] = id_
+                self._metadata[row] = metadata or {}
+
+            self.version += 1
+            self._masks = {}
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (id, row, document, metadata) VALUES (?, ?, ?, ?)",
+                [(id_, row, document, json.dumps(metadata or {})) for id_, row, document, metadata in zip(ids, rows, documents, metadatas)]
+            )
+            self._set_meta(dim=self.dim, capacity=self.capacity, **self._version_meta())
+            self._conn.execute("COMMIT")
+
+        return rows
+
+    def delete(self, ids):
+
+        with self._lock:
+
+            rows = [self._rows.pop(id_) for id_ in ids if id_ in self._rows]
+
+            for row in rows:
+
+                self._ids[row] = None
+                self._metadata[row] = None
+                self._free.append(row)
+
+            self.version += 1
+            self._masks = {}
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("DELETE FROM rows WHERE row = ?", [(row,) for row in rows])
+            self._set_meta(**self._version_meta())
+            self._conn.execute("COMMIT")
+
+        return rows
+
+    def ids_where(self, where):
+
+        self._maybe_reload()
+
+        return [self._ids[row] for row in np.flatnonzero(self._mask(where))]
+
+    def count(self):
+
+        return len(self._rows)
+
+    def _mask(self, where: dict = None) -> np.ndarray:
+
+        """Rows that hold a vector and match the filter (cached per filter until the next write)."""
+
+        key = json.dumps(where or {}, sort_keys=True)
+        mask = self._masks.get(key)
+
+        if mask is None:
+
+            mask = np.fromiter(
+                (m is not None and (not where or matches(m, where)) for m in self._metadata[:self._size]),
+                dtype=bool,
+                count=self._size
+            )
+            self._masks[key] = mask
+
+        return mask
+
+    def _scores(self, candidates, queries: np.ndarray) -> np.ndarray:
+
+        if self.precision == "float32":
+
+            matrix = self.vectors[:self._size] if candidates is None else self.vectors[candidates]
+
+            return matrix @ queries.T
+
+        # Reduced rows are widened into a small reused float32 buffer that stays in cache
+        n = self._size if candidates is None else len(candidates)
+        scores = np.empty((n, len(queries)), dtype=np.float32)
+        buffer = np.empty((SCAN_BLOCK, self.dim), dtype=np.float32)
+
+        for start in range(0, n, SCAN_BLOCK):
+
+            rows = slice(start, min(n, start + SCAN_BLOCK)) if candidates is None else candidates[start:start + SCAN_BLOCK]
+            block = self.quantized[rows]
+            widened = buffer[:len(block)]
+            np.copyto(widened, block, casting="unsafe")
+            np.matmul(widened, queries.T, out=scores[start:start + len(block)])
+
+            if self.scales is not None:
+
+                scores[start:start + len(block)] *= np.asarray(self.scales[rows])[:, None]
+
+        return scores
+
+    @staticmethod
+    def _select(scores: np.ndarray, candidates, k: int) -> List[list]:
+
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+
+        for j in range(scores.shape[1]):
+
+            order = top[np.argsort(-scores[top[:, j], j]), j]
+            rows = order if candidates is None else candidates[order]
+            results.append(list(zip(rows.tolist(), scores[order, j].tolist())))
+
+        return results
+
+    def _scan_top_k(self, queries: np.ndarray, k: int, mask: np.ndarray) -> List[list]:
+
+        """[(row, score), ...] per query, best first."""
+
+        candidates = None if mask.all() else np.flatnonzero(mask)
+        n = self._size if candidates is None else len(candidates)
+        k = min(k, n)
+
+        if k == 0:
+
+            return [[] for _ in queries]
+
+        if self.precision == "float32":
+
+            return self._select(self._scores(candidates, queries), candidates, k)
+
+        shortlist = self._select(self._scores(candidates, queries), candidates, min(n, k * self.rescore))
+        results = []
+
+        for query, hits in zip(queries, shortlist):
+
+            rows = np.array(sorted(row for row, _ in hits))
+            exact = self._read_rows(rows) @ query
+            best = np.argsort(-exact)[:k]
+            results.append(list(zip(rows[best].tolist(), exact[best].tolist())))
+
+        return results
+
+    def _top_k(self, queries: np.ndarray, k: int, mask: np.ndarray) -> List[list]:
+
+        return self._scan_top_k(queries, k, mask)
+
+    def _fetch(self, rows: List[int]) -> dict:
+
+        if not rows:
+
+            return {}
+
+        placeholders = ",".join("?" * len(rows))
+
+        return {
+            row: document
+            for row, document in self._conn.execute(f"SELECT row, document FROM rows WHERE row IN ({placeholders})", rows)
+        }
+
+    def query(self, vectors, k, where=None):
+
+        self._maybe_reload()
+
+        if not len(vectors):
+
+            return []
+
+        with self._lock:
+
+            if not self._rows:
+
+                return [[] for _ in vectors]
+
+            results = self._top_k(self._normalize(vectors), k, self._mask(where))
+            documents = self._fetch(sorted({row for hits in results for row, _ in hits}))
+
+            return [
+                [(self._ids[row], documents.get(row, ""), self._metadata[row], score) for row, score in hits]
+                for hits in results
+            ]
+
+class HNSWIndex(FlatIndex):
+
+    """
+    FlatIndex storage with an hnswlib graph on top for approximate search on
+    large corpora. The graph is saved next to the matrix and rebuilt when it
+    is out of date. Filtered queries over small partitions stay exact; with
+    a reduced precision those scans use the reduced copy like FlatIndex,
+    while the graph keeps its own float32 vectors.
+    """
+
+    def __init__(self, embeddings, directory: str, refresh_interval: float = 5.0, precision: str = "float32",
+                 rescore: int = 4, m: int = 16, ef_construction: int = 200, ef_search: int = 64, exact_below: int = 2000):
+
+        import hnswlib
+
+        self._hnswlib = hnswlib
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.exact_below = exact_below
+        self.graph = None
+
+        super().__init__(embeddings, directory, refresh_interval, precision, rescore)
+
+    @property
+    def graph_path(self) -> str:
+
+        return os.path.join(self.directory, "hnsw.bin")
+
+    def _load(self):
+
+        with self._lock:
+
+            super()._load()
+            self.graph = None
+
+            if not self._rows:
+
+                return
+
+            graph = self._hnswlib.Index(space="ip", dim=self.dim)
+
+            if self._meta().get("graph_version") == self.version and os.path.exists(self.graph_path):
+
+                graph.load_index(self.graph_path, max_elements=self.capacity)
+
+            else:
+
+                logging.info(f"Vector index {self.directory}: building HNSW graph over {len(self._rows)} vectors.")
+                graph.init_index(max_elements=self.capacity, ef_construction=self.ef_construction, M=self.m)
+                rows = np.array(sorted(self._rows.values()))
+                graph.add_items(np.asarray(self.vectors[rows]), rows)
+
+            graph.set_ef(self.ef_search)
+            self.graph = graph
+
+    def _ensure_graph(self):
+
+        if self.graph is None:
+
+            self.graph = self._hnswlib.Index(space="ip", dim=self.dim)
+            self.graph.init_index(max_elements=self.capacity, ef_construction=self.ef_construction, M=self.m)
+            self.graph.set_ef(self.ef_search)
+
+        elif self.graph.get_max_elements() < self.capacity:
+
+            self.graph.resize_index(self.capacity)
+
+    def _write_rows(self, rows, vectors):
+
+        super()._write_rows(rows, vectors)
+        self._ensure_graph()
+
+        for row in rows:
+
+            try:
+
+                self.graph.unmark_deleted(row)
+
+            except RuntimeError:
+
+                pass
+
+        self.graph.add_items(vectors, np.asarray(rows))
+
+    def delete(self, ids):
+
+        with self._lock:
+
+            rows = super().delete(ids)
+
+            for row in rows:
+
+                self.graph.mark_deleted(row)
+
+        return rows
+
+    def save(self):
+
+        with self._lock:
+
+            if self.graph is not None:
+
+                self.graph.save_index(self.graph_path)
+                self._set_meta(graph_version=self.version)
+
+    def _top_k(self, queries, k, mask):
+
+        candidates = int(mask.sum())
+
+        if self.graph is None or candidates <= max(k, self.exact_below):
+
+            return self._scan_top_k(queries, k, mask)
+
+        self.graph.set_ef(max(self.ef_search, k))
+        allowed = None if candidates == self._size else (lambda row: bool(mask[row]))
+        labels, distances = self.graph.knn_query(queries, k=min(k, candidates), filter=allowed)
+
+        # Inner-product distance is 1 - cosine similarity
+        return [
+            [(int(row), 1.0 - float(distance)) for row, distance in zip(row_labels, row_distances)]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+
+def create_vector_index(backend: str, embeddings, directory: str = None, precision: str = "float32") -> VectorIndex:
+
+    """
+    chroma: the Chroma store at ./chroma_db (default)
+    flat:   exact search over a memory-mapped matrix at ./vector_index;
+            precision float16/int8 scans a reduced copy and re-scores in float32
+    hnsw:   the same storage as flat with an HNSW graph (requires hnswlib);
+            precision applies to its exact scans of small partitions
+    """
+
+    if backend == "chroma":
+
+        if precision != "float32":
+
+            logging.warning(f"VECTOR_PRECISION={precision} has no effect on the chroma backend; it stores float32.")
+
+        return ChromaIndex(embeddings, directory or "./chroma_db")
+
+    if backend == "flat":
+
+        return FlatIndex(embeddings, directory or "./vector_index", precision=precision)
+
+    if backend == "hnsw":
+
+        return HNSWIndex(embeddings, directory or "./vector_index", precision=precision)
+
+    raise ValueError(f"Unknown VECTOR_BACKEND '{backend}', expected one of {', '.join(VECTOR_BACKENDS)}")
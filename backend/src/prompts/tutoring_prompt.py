@@ -61,4 +61,8 @@ You are an expert tutor. Write comprehensive lesson content for the following {c
 |||LESSON_SPLIT|||
 <h3>Lesson 2: Next Topic</h3>
 <p>...</p>
-"""
\ No newline at end of file
+"""
+
+RAG_SOURCE_INSTRUCTION = """
+
+CRITICAL INSTRUCTION: Use the provided 'VERIFIED SOURCE MATERIAL' to write the lesson content. Do not hallucinate information if it is present in the source."""
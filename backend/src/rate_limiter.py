@@ -0,0 +1,483 @@
+import os
+import re
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from backend.src.logger import logging
+from backend.src.metrics import observe_llm_call, observe_rate_limit_wait, count_llm_retry
+
+# Groq quotas per model (requests and tokens per minute).
+# Override with RATE_LIMITS='{"model": {"rpm": 30, "tpm": 6000}}'.
+DEFAULT_LIMITS = {
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000},
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+}
+FALLBACK_LIMIT = {"rpm": 30, "tpm": 6000}
+
+def get_limits(model: str) -> dict:
+
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(json.loads(os.getenv("RATE_LIMITS", "{}")))
+
+    return limits.get(model, FALLBACK_LIMIT)
+
+def bucket_name(api_key: str, model: str) -> str:
+
+    """Buckets are keyed per API key and model; the key itself is never stored."""
+
+    key_id = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+    return f"{key_id}:{model}"
+
+def estimate_tokens(messages, completion_tokens: int) -> int:
+
+    """Rough prompt size (4 characters per token) plus the expected completion."""
+
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+
+    return chars // 4 + completion_tokens
+
+def is_rate_limit_error(error: Exception) -> bool:
+
+    if getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError":
+
+        return True
+
+    message = str(error).lower()
+
+    return "429" in message or "rate limit" in message
+
+def _parse_duration(value: str):
+
+    """Parses '7', '7.5s', '850ms' or '1m2.5s' into seconds."""
+
+    value = str(value).strip()
+
+    try:
+
+        return float(value)
+
+    except ValueError:
+
+        pass
+
+    match = re.fullmatch(r"(?:(\d+)h)?(?:(\d+)m(?!s))?(?:([\d.]+)s)?(?:([\d.]+)ms)?", value)
+
+    if not match or not any(match.groups()):
+
+        return None
+
+    hours, minutes, seconds, millis = match.groups()
+
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds or 0) + float(millis or 0) / 1000
+
+def retry_after_seconds(error: Exception):
+
+    """Reads the server's retry hint from the response headers or the error message."""
+
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+
+    for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+
+        if headers.get(header):
+
+            seconds = _parse_duration(headers[header])
+
+            if seconds is not None:
+
+                return seconds
+
+    match = re.search(r"try again in ((?:\d+h)?(?:\d+m)?[\d.]+m?s)", str(error))
+
+    if match:
+
+        return _parse_duration(match.group(1))
+
+    return None
+
+def _refill(state: dict, now: float, rpm: float, tpm: float) -> dict:
+
+    elapsed = max(0.0, now - state["updated"])
+
+    state["requests"] = min(rpm, state["requests"] + elapsed * rpm / 60.0)
+    state["tokens"] = min(tpm, state["tokens"] + elapsed * tpm / 60.0)
+    state["updated"] = now
+
+    return state
+
+def _reserve(state: dict, now: float, rpm: float, tpm: float, tokens: int) -> float:
+
+    """
+    Takes one request and the estimated tokens from the buckets, letting the
+    balance go negative. The caller waits until the debt has been refilled,
+    which queues concurrent callers in arrival order.
+    """
+
+    _refill(state, now, rpm, tpm)
+
+    state["requests"] -= 1
+    state["tokens"] -= tokens
+
+    wait = max(0.0, -state["requests"] * 60.0 / rpm, -state["tokens"] * 60.0 / tpm)
+
+    return max(wait, state["blocked_until"] - now)
+
+class MemoryBucketStore:
+
+    """Bucket state shared by every thread and event loop of one process."""
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def _get(self, name, rpm, tpm, now):
+
+        if name not in self._state:
+
+            self._state[name] = {"requests": rpm, "tokens": tpm, "updated": now, "blocked_until": 0.0}
+
+        return self._state[name]
+
+    def reserve(self, name: str, rpm: float, tpm: float, tokens: int) -> float:
+
+        with self._lock:
+
+            now = time.time()
+
+            return _reserve(self._get(name, rpm, tpm, now), now, rpm, tpm, tokens)
+
+    def peek(self, name: str, rpm: float, tpm: float, tokens: int) -> float:
+
+        with self._lock:
+
+            now = time.time()
+
+            return _reserve(dict(self._get(name, rpm, tpm, now)), now, rpm, tpm, tokens)
+
+    def adjust_tokens(self, name: str, rpm: float, tpm: float, delta: int):
+
+        with self._lock:
+
+            state = self._get(name, rpm, tpm, time.time())
+            state["tokens"] = min(tpm, state["tokens"] + delta)
+
+    def block(self, name: str, rpm: float, tpm: float, seconds: float):
+
+        with self._lock:
+
+            now = time.time()
+            state = _refill(self._get(name, rpm, tpm, now), now, rpm, tpm)
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+            state["requests"] = min(state["requests"], 0.0)
+            state["tokens"] = min(state["tokens"], 0.0)
+
+class SQLiteBucketStore:
+
+    """Bucket state in a SQLite file, shared by every gunicorn worker on the host."""
+
+    def __init__(self, path: str):
+
+        self.path = path
+
+        with self._connect() as conn:
+
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, requests REAL, tokens REAL, updated REAL, blocked_until REAL)"
+            )
+
+    def _connect(self):
+
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        return conn
+
+    def _update(self, name, rpm, tpm, change):
+
+        conn = self._connect()
+
+        try:
+
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                "SELECT requests, tokens, updated, blocked_until FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+
+            if row is None:
+
+                state = {"requests": rpm, "tokens": tpm, "updated": now, "blocked_until": 0.0}
+
+            else:
+
+                state = dict(zip(("requests", "tokens", "updated", "blocked_until"), row))
+
+            result = change(state, now)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?)",
+                (name, state["requests"], state["tokens"], state["updated"], state["blocked_until"])
+            )
+            conn.execute("COMMIT")
+
+            return result
+
+        except Exception:
+
+            conn.execute("ROLLBACK")
+            raise
+
+        finally:
+
+            conn.close()
+
+    def reserve(self, name: str, rpm: float, tpm: float, tokens: int) -> float:
+
+        return self._update(name, rpm, tpm, lambda state, now: _reserve(state, now, rpm, tpm, tokens))
+
+    def peek(self, name: str, rpm: float, tpm: float, tokens: int) -> float:
+
+        conn = self._connect()
+
+        try:
+
+            now = time.time()
+            row = conn.execute(
+                "SELECT requests, tokens, updated, blocked_until FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+
+        finally:
+
+            conn.close()
+
+        if row is None:
+
+            return 0.0
+
+        return _reserve(dict(zip(("requests", "tokens", "updated", "blocked_until"), row)), now, rpm, tpm, tokens)
+
+    def adjust_tokens(self, name: str, rpm: float, tpm: float, delta: int):
+
+        def change(state, now):
+
+            state["tokens"] = min(tpm, state["tokens"] + delta)
+
+        self._update(name, rpm, tpm, change)
+
+    def block(self, name: str, rpm: float, tpm: float, seconds: float):
+
+        def change(state, now):
+
+            _refill(state, now, rpm, tpm)
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+            state["requests"] = min(state["requests"], 0.0)
+            state["tokens"] = min(state["tokens"], 0.0)
+
+        self._update(name, rpm, tpm, change)
+
+class RateLimiter:
+
+    """
+    Token-bucket limiter budgeting requests/min and tokens/min per API key and model.
+    A 429 blocks the bucket for the server's retry-after and drains it, so every
+    caller sharing the key backs off together instead of retrying into the limit.
+    """
+
+    def __init__(self, store=None):
+
+        self.store = store or MemoryBucketStore()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+
+    async def estimate_wait(self, name: str, model: str, tokens: int) -> float:
+
+        """Seconds a call of this size would wait right now, without reserving anything."""
+
+        limits = get_limits(model)
+
+        return await asyncio.to_thread(self.store.peek, name, limits["rpm"], limits["tpm"], tokens)
+
+    async def acquire(self, name: str, model: str, tokens: int) -> float:
+
+        limits = get_limits(model)
+        wait = await asyncio.to_thread(self.store.reserve, name, limits["rpm"], limits["tpm"], tokens)
+
+        if wait > 0:
+
+            self.waits += 1
+            self.wait_seconds += wait
+            logging.info(f"Rate limiter: waiting {wait:.1f}s for {model}.")
+            await asyncio.sleep(wait)
+
+        return wait
+
+    async def record_usage(self, name: str, model: str, estimated: int, actual: int):
+
+        """Refunds (or charges) the difference between the estimate and the reported usage."""
+
+        if actual and actual != estimated:
+
+            limits = get_limits(model)
+            await asyncio.to_thread(self.store.adjust_tokens, name, limits["rpm"], limits["tpm"], estimated - actual)
+
+    async def penalize(self, name: str, model: str, seconds: float):
+
+        self.throttled += 1
+        limits = get_limits(model)
+        await asyncio.to_thread(self.store.block, name, limits["rpm"], limits["tpm"], seconds)
+
+class AdaptiveConcurrency:
+
+    """
+    In-flight call limit per bucket: halved on every 429, raised by one after
+    a run of successes (AIMD), between 1 and the configured maximum.
+    """
+
+    def __init__(self, maximum: int):
+
+        self.maximum = maximum
+        self.limit = maximum
+        self.in_flight = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    async def __aenter__(self):
+
+        while True:
+
+            with self._lock:
+
+                if self.in_flight < self.limit:
+
+                    self.in_flight += 1
+                    return self
+
+            await asyncio.sleep(0.05)
+
+    async def __aexit__(self, exc_type, exc, tb):
+
+        with self._lock:
+
+            self.in_flight -= 1
+
+    def on_success(self):
+
+        with self._lock:
+
+            self._successes += 1
+
+            if self._successes >= self.limit and self.limit < self.maximum:
+
+                self.limit += 1
+                self._successes = 0
+
+    def on_throttled(self):
+
+        with self._lock:
+
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+_limiter = None
+_gates = {}
+_registry_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+
+    """Process-wide limiter; set RATE_LIMIT_DB to share the buckets across worker processes."""
+
+    global _limiter
+
+    with _registry_lock:
+
+        if _limiter is None:
+
+            path = os.getenv("RATE_LIMIT_DB")
+            _limiter = RateLimiter(SQLiteBucketStore(path) if path else MemoryBucketStore())
+
+        return _limiter
+
+def get_concurrency_gate(name: str) -> AdaptiveConcurrency:
+
+    with _registry_lock:
+
+        if name not in _gates:
+
+            _gates[name] = AdaptiveConcurrency(int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+
+        return _gates[name]
+
+class RateLimitedLLM:
+
+    """
+    Wraps a chat model so that every ainvoke goes through the shared limiter.
+    Rate-limit errors are retried here, after the server's retry-after.
+    """
+
+    def __init__(self, llm, api_key: str, model: str, completion_tokens: int = 1024, max_retries: int = None):
+
+        self.llm = llm
+        self.model = model
+        self.bucket = bucket_name(api_key, model)
+        self.completion_tokens = completion_tokens
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "5"))
+        self.limiter = get_rate_limiter()
+        self.gate = get_concurrency_gate(self.bucket)
+
+    def __getattr__(self, name):
+
+        return getattr(self.llm, name)
+
+    async def ainvoke(self, messages, **kwargs):
+
+        for attempt in range(self.max_retries + 1):
+
+            estimated = estimate_tokens(messages, self.completion_tokens)
+
+            async with self.gate:
+
+                waited = await self.limiter.acquire(self.bucket, self.model, estimated)
+                observe_rate_limit_wait(self.model, waited)
+                started = time.perf_counter()
+
+                try:
+
+                    response = await self.llm.ainvoke(messages, **kwargs)
+
+                except Exception as e:
+
+                    limited = is_rate_limit_error(e)
+                    observe_llm_call(self.model, started, time.perf_counter() - started, "rate_limited" if limited else "error", wait=waited)
+
+                    if not limited:
+
+                        raise
+
+                    wait = retry_after_seconds(e) or min(60.0, 2 ** attempt + random.uniform(0, 1))
+                    logging.warning(f"Rate limit hit on {self.model}. Backing off {wait:.1f}s (attempt {attempt + 1}).")
+
+                    await self.limiter.penalize(self.bucket, self.model, wait)
+                    self.gate.on_throttled()
+
+                    if attempt == self.max_retries:
+
+                        raise
+
+                    count_llm_retry(self.model, "rate_limit")
+
+                    continue
+
+            usage = getattr(response, "usage_metadata", None) or {}
+            observe_llm_call(self.model, started, time.perf_counter() - started, "ok", usage, waited)
+            await self.limiter.record_usage(self.bucket, self.model, estimated, usage.get("total_tokens", 0))
+            self.gate.on_success()
+
+            return response
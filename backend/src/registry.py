@@ -0,0 +1,100 @@
+import threading
+from backend.src.logger import logging
+
+# Process-wide instances. The agents keep no per-run state (progress callbacks
+# travel in the graph run config), so one compiled graph and one set of LLM
+# clients serve every generation. Creation is guarded so that concurrent first
+# requests build each instance only once.
+_lock = threading.RLock()
+_instances = {}
+
+def _get_or_create(name: str, factory):
+
+    instance = _instances.get(name)
+
+    if instance is not None:
+
+        return instance
+
+    with _lock:
+
+        instance = _instances.get(name)
+
+        if instance is None:
+
+            logging.info(f"Registry: creating shared {name}...")
+            instance = factory()
+            _instances[name] = instance
+
+        return instance
+
+def register(name: str, instance):
+
+    """Installs a prebuilt shared instance, e.g. an offline RAG pipeline for benchmarks."""
+
+    with _lock:
+
+        _instances[name] = instance
+
+def get_rag_pipeline():
+
+    """Shared RAG pipeline: the embedding model and the vector store are loaded once per process."""
+
+    from backend.src.pipelines.rag import RAGPipeline
+
+    return _get_or_create("rag_pipeline", RAGPipeline)
+
+def get_assistant_agent():
+
+    from backend.src.agents.assistant_agent import AssistantAgent
+
+    return _get_or_create("assistant_agent", AssistantAgent)
+
+def get_tutoring_agent():
+
+    from backend.src.agents.tutoring_agent import TutoringAgent
+
+    return _get_or_create("tutoring_agent", TutoringAgent)
+
+def get_testing_agent():
+
+    from backend.src.agents.testing_agent import TestingAgent
+
+    return _get_or_create("testing_agent", TestingAgent)
+
+def warm_up():
+
+    """
+    Builds every shared instance ahead of the first request and runs one
+    embedding so the model weights are resident. Failures are logged, not
+    raised: the app still starts and the instance is retried on first use.
+    """
+
+    for name, getter in [
+        ("rag_pipeline", get_rag_pipeline),
+        ("assistant_agent", get_assistant_agent),
+        ("tutoring_agent", get_tutoring_agent),
+        ("testing_agent", get_testing_agent)
+    ]:
+
+        try:
+
+            instance = getter()
+
+            if name == "rag_pipeline":
+
+                instance.embeddings.embed_query("warm up")
+
+        except Exception as e:
+
+            logging.error(f"Registry: warm-up of {name} failed: {e}")
+
+    logging.info("Registry: warm-up complete.")
+
+def reset():
+
+    """Drops every shared instance, e.g. after changing API keys."""
+
+    with _lock:
+
+        _instances.clear()
@@ -0,0 +1,172 @@
+import os
+import re
+import asyncio
+import hashlib
+import threading
+from backend.src.cache import SQLiteCache
+from backend.src.logger import logging
+
+def normalize_query(query: str) -> str:
+
+    """Case, spacing and punctuation differences map to the same cache entry."""
+
+    return " ".join(re.sub(r"[^\w\s/]", " ", query).split()).casefold()
+
+def parse_results(response) -> list:
+
+    """
+    Turns a Tavily response into [{"url": ..., "title": ...}]. The tool
+    reports API failures (quota, outage) as {"error": ...} rather than
+    raising; those raise here so they are not cached as "no results".
+    """
+
+    if isinstance(response, dict) and response.get("error"):
+
+        raise RuntimeError(f"Search API error: {response['error']}")
+
+    results_list = []
+    if isinstance(response, list):
+        results_list = response
+    elif isinstance(response, dict) and "results" in response:
+        results_list = response["results"]
+
+    links = []
+    for item in results_list:
+        if isinstance(item, dict):
+            links.append({
+                "url": item.get("url", "No URL"),
+                "title": item.get("title", item.get("content", "Resource")[:50])
+            })
+
+    return links
+
+class TavilyBackend:
+
+    def __init__(self, max_results: int = 5):
+
+        from langchain_tavily import TavilySearch
+
+        self.tool = TavilySearch(
+            max_results=max_results,
+            topic="general",
+            api_key=os.getenv("TAVILY_API_KEY")
+        )
+
+    async def search(self, query: str) -> list:
+
+        return parse_results(await self.tool.ainvoke(query))
+
+class FakeSearchBackend:
+
+    """Offline stand-in for benchmarks and tests: deterministic links derived from the query."""
+
+    def __init__(self, max_results: int = 5, latency: float = 0.0):
+
+        self.max_results = max_results
+        self.latency = latency
+        self.calls = 0
+
+    async def search(self, query: str) -> list:
+
+        self.calls += 1
+
+        if self.latency:
+
+            await asyncio.sleep(self.latency)
+
+        slug = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:8]
+
+        return [
+            {"url": f"https://example.com/{slug}/{i}", "title": f"Study resource {i + 1} for {query[:40]}"}
+            for i in range(self.max_results)
+        ]
+
+class SearchError(RuntimeError):
+
+    """The search API failed, now or within the negative TTL."""
+
+class CachedSearch:
+
+    """
+    Search with a TTL cache on normalized queries. Failures are cached too
+    (for a shorter time) and raised as SearchError, so a flaky search API
+    is not hammered by retries and the caller knows the links are missing.
+    """
+
+    def __init__(self, backend, cache: SQLiteCache = None, negative_ttl: float = 300):
+
+        self.backend = backend
+        self.cache = cache
+        self.negative_ttl = negative_ttl
+
+    async def search(self, query: str) -> list:
+
+        key = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+        if self.cache is not None:
+
+            cached = await asyncio.to_thread(self.cache.get, key)
+
+            if cached is not None:
+
+                if cached.get("error"):
+
+                    raise SearchError(cached["error"])
+
+                return cached.get("links", [])
+
+        try:
+
+            links = await self.backend.search(query)
+
+            if self.cache is not None:
+
+                await asyncio.to_thread(self.cache.set, key, {"links": links})
+
+            return links
+
+        except Exception as e:
+
+            logging.error(f"Search failed, caching the failure for {self.negative_ttl:.0f}s: {e}")
+
+            if self.cache is not None:
+
+                await asyncio.to_thread(self.cache.set, key, {"links": [], "error": str(e)}, self.negative_ttl)
+
+            raise SearchError(str(e)) from e
+
+_search = None
+_search_lock = threading.Lock()
+
+def get_search() -> CachedSearch:
+
+    """Process-wide search client. SEARCH_BACKEND=fake selects the offline backend."""
+
+    global _search
+
+    with _search_lock:
+
+        if _search is None:
+
+            if os.getenv("SEARCH_BACKEND", "tavily") == "fake":
+
+                backend = FakeSearchBackend()
+
+            else:
+
+                backend = TavilyBackend()
+
+            cache = None
+
+            if os.getenv("SEARCH_CACHE_ENABLED", "1") == "1":
+
+                cache = SQLiteCache(
+                    path=os.getenv("SEARCH_CACHE_PATH", "search_cache.db"),
+                    table="search_results",
+                    ttl=float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600))),
+                    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+                )
+
+            _search = CachedSearch(backend, cache, negative_ttl=float(os.getenv("SEARCH_NEGATIVE_TTL", "300")))
+
+        return _search
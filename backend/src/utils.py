@@ -1,101 +1,84 @@
-from langchain_groq.chat_models import ChatGroq
 from backend.src.logger import logging
 from backend.src.exception import CustomException
+from backend.src.llm_pool import build_pool, pool_api_keys
+from backend.src.llm_cache import CachedLLM, get_llm_cache
 import sys
 import os
+import json
+import threading
 
-def get_llm_1():
+LLM_MODEL = "llama-3.1-8b-instant"
+LLM_LITE_MODEL = "llama-3.3-70b-versatile"
+LLM_TEMPERATURE = 0.1
 
-    if os.getenv("GROQ_API_KEY_1") is None:
+_pools = {}
+_pools_lock = threading.Lock()
 
-        raise Exception("GROQ_API_KEY is not set")
+def llm_tiers() -> dict:
 
-    try:
+    """Models per tier. Override with LLM_TIERS='{"fast": ["model-a"], "strong": ["model-b", "model-c"]}'."""
 
-        logging.info("Initializing LLM")
+    tiers = {"fast": [LLM_MODEL], "strong": [LLM_LITE_MODEL]}
+    tiers.update(json.loads(os.getenv("LLM_TIERS", "{}")))
 
-        llm = ChatGroq(
-            model = "llama-3.1-8b-instant", 
-            temperature = 0.1,
-            api_key = os.getenv("GROQ_API_KEY_1")
-        )
+    return tiers
 
-        logging.info("LLM initialized")
+def get_llm(tier: str = "fast"):
 
-        return llm
-    
-    except Exception as e:
+    """
+    Shared client pool for a tier ("fast" or "strong") over every configured Groq key.
+    Each call is routed to the least-loaded healthy key, behind the persistent
+    response cache unless LLM_CACHE_ENABLED=0.
+    """
 
-        raise CustomException(e, sys)
-        
-def get_llm_lite_1():
-
-    if os.getenv("GROQ_API_KEY_1") is None:
+    if not pool_api_keys():
 
         raise Exception("GROQ_API_KEY is not set")
 
     try:
 
-        logging.info("Initializing LLM")
+        with _pools_lock:
 
-        llm = ChatGroq(
-            model = "llama-3.3-70b-versatile", 
-            temperature = 0.1,
-            api_key = os.getenv("GROQ_API_KEY_1")
-        )
+            if tier not in _pools:
 
-        logging.info("LLM initialized")
+                logging.info(f"Initializing LLM pool '{tier}'")
+                models = llm_tiers()[tier]
+                pool = build_pool(tier, models, LLM_TEMPERATURE)
+                cache = get_llm_cache()
+                _pools[tier] = CachedLLM(pool, cache, ",".join(models), LLM_TEMPERATURE) if cache else pool
+
+        return _pools[tier]
 
-        return llm
-    
     except Exception as e:
 
         raise CustomException(e, sys)
-    
-def get_llm_2():
-
-    if os.getenv("GROQ_API_KEY_2") is None:
 
-        raise Exception("GROQ_API_KEY is not set")
+def get_llm_1():
 
-    try:
+    """The "fast" tier pool (see get_llm); kept for the research notebooks."""
 
-        logging.info("Initializing LLM")
+    return get_llm("fast")
 
-        llm = ChatGroq(
-            model = "llama-3.1-8b-instant", 
-            temperature = 0.1,
-            api_key = os.getenv("GROQ_API_KEY_2")
-        )
+def get_llm_lite_1():
 
-        logging.info("LLM initialized")
+    """The "strong" tier pool (see get_llm); kept for the research notebooks."""
 
-        return llm
-    
-    except Exception as e:
+    return get_llm("strong")
 
-        raise CustomException(e, sys)
-        
-def get_llm_lite_2():
+async def emit_event(config, event: str, data: dict):
 
-    if os.getenv("GROQ_API_KEY_2") is None:
+    """Forwards progress to the on_event callback passed in a graph run's configurable, if any."""
 
-        raise Exception("GROQ_API_KEY is not set")
+    on_event = (config or {}).get("configurable", {}).get("on_event")
 
-    try:
+    if on_event is None:
 
-        logging.info("Initializing LLM")
+        return
 
-        llm = ChatGroq(
-            model = "llama-3.3-70b-versatile", 
-            temperature = 0.1,
-            api_key = os.getenv("GROQ_API_KEY_2")
-        )
+    try:
 
-        logging.info("LLM initialized")
+        await on_event(event, data)
 
-        return llm
-    
     except Exception as e:
 
-        raise CustomException(e, sys)
\ No newline at end of file
+        logging.warning(f"Progress callback failed for '{event}': {e}")
@@ -11,55 +11,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // ===================================
     // CATALOG DATA (Subject -> Topics)
     // ===================================
-    const catalogData = {
-        "Mathematics": [
-            "Calculus", 
-            "Matrix", 
-            "Multiplication", 
-            "Trigonometry", 
-            "Mensuration",
-            "Algebra",
-            "Geometry",
-            "Statistics"
-        ],
-        "Physics": [
-            "Kinematics", 
-            "Thermodynamics", 
-            "Electromagnetism", 
-            "Optics", 
-            "Quantum Mechanics",
-            "Nuclear Physics",
-            "Astrophysics"
-        ],
-        "Chemistry": [
-            "Organic Chemistry", 
-            "Inorganic Chemistry", 
-            "Physical Chemistry", 
-            "Nuclear Chemistry", 
-            "Analytical Chemistry",
-            "Environmental Chemistry"
-        ],
-        "Biology": [
-            "Genetics", 
-            "Cell Biology", 
-            "Ecology", 
-            "Evolution", 
-            "Molecular Biology",
-            "Immunity",
-            "Neuroscience"
-        ],
-        "Computer Science": [
-            "Data Structures", 
-            "Algorithms", 
-            "Web Development", 
-            "Artificial Intelligence", 
-            "Database Management",
-            "Cybersecurity",
-            "Operating Systems",
-            "Machine Learning",
-            "Cloud Computing"
-        ]
-    };
+    // Served by the dashboard from backend/src/catalog.py
+    const catalogElement = document.getElementById('catalog-data');
+    const catalogData = catalogElement ? JSON.parse(catalogElement.textContent) : {};
 
     // ===================================
     // PARTICLE GENERATOR
@@ -108,23 +62,231 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     // ===================================
-    // FORM SUBMISSION
+    // FORM SUBMISSION & JOB POLLING
     // ===================================
     const dashboardForm = document.getElementById('course-form');
+    const loadingContainer = document.querySelector('.loading-container');
+    const JOB_PHASES = ['queued', 'assistant', 'tutoring', 'testing', 'saving', 'done'];
+
+    function showLoading() {
+        const submitBtn = dashboardForm ? dashboardForm.querySelector('button[type="submit"]') : null;
+        const formCard = document.querySelector('.dashboard-form .glass-card');
+        
+        if (submitBtn && loadingContainer) {
+            submitBtn.style.display = 'none';
+            loadingContainer.classList.add('active');
+            const progressFill = loadingContainer.querySelector('.progress-fill');
+            if (progressFill) setTimeout(() => progressFill.style.width = '100%', 100);
+            if (formCard) setTimeout(() => formCard.style.opacity = '0.5', 300);
+        }
+    }
+
+    function hideLoading() {
+        const submitBtn = dashboardForm ? dashboardForm.querySelector('button[type="submit"]') : null;
+        const formCard = document.querySelector('.dashboard-form .glass-card');
+        if (submitBtn) submitBtn.style.display = '';
+        if (loadingContainer) loadingContainer.classList.remove('active');
+        if (formCard) formCard.style.opacity = '';
+    }
+
+    function renderJobPhase(phase) {
+        if (!loadingContainer) return;
+        const currentIndex = JOB_PHASES.indexOf(phase);
+        loadingContainer.querySelectorAll('.job-phases li').forEach(item => {
+            const itemIndex = JOB_PHASES.indexOf(item.dataset.phase);
+            item.classList.toggle('current', itemIndex === currentIndex);
+            item.classList.toggle('completed', itemIndex < currentIndex);
+        });
+    }
+
+    function pollJob(statusUrl) {
+        fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json())
+            .then(job => {
+                if (job.status === 'done' || job.status === 'failed') {
+                    window.location = job.result_url;
+                    return;
+                }
+                renderJobPhase(job.phase);
+                setTimeout(() => pollJob(statusUrl), 2000);
+            })
+            .catch(() => setTimeout(() => pollJob(statusUrl), 5000));
+    }
+
     if (dashboardForm) {
         dashboardForm.addEventListener('submit', function(e) {
-            const submitBtn = dashboardForm.querySelector('button[type="submit"]');
-            const loadingContainer = document.querySelector('.loading-container');
-            const formCard = document.querySelector('.dashboard-form .glass-card');
-            
-            if (submitBtn && loadingContainer) {
-                submitBtn.style.display = 'none';
-                loadingContainer.classList.add('active');
-                const progressFill = loadingContainer.querySelector('.progress-fill');
-                if (progressFill) setTimeout(() => progressFill.style.width = '100%', 100);
-                if (formCard) setTimeout(() => formCard.style.opacity = '0.5', 300);
+            e.preventDefault();
+            showLoading();
+
+            fetch(dashboardForm.action, {
+                method: 'POST',
+                body: new FormData(dashboardForm),
+                headers: { 'Accept': 'application/json' }
+            })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.redirect) {
+                        window.location = data.redirect;
+                    } else if (data.view_url && data.status !== 'failed' && window.EventSource) {
+                        window.location = data.view_url;
+                    } else if (data.status_url && data.status !== 'failed') {
+                        pollJob(data.status_url);
+                    } else {
+                        hideLoading();
+                        alert(data.error || 'Could not start course generation.');
+                    }
+                })
+                .catch(() => dashboardForm.submit());
+        });
+    }
+
+    // Resume a job submitted without JavaScript (or before a reload)
+    if (loadingContainer && loadingContainer.dataset.jobId) {
+        if (window.EventSource) {
+            window.location = '/jobs/' + loadingContainer.dataset.jobId + '/view';
+        } else {
+            showLoading();
+            pollJob('/jobs/' + loadingContainer.dataset.jobId);
+        }
+    }
+
+    // ===================================
+    // STREAMED COURSE PAGE (SSE)
+    // ===================================
+    const streamRoot = document.querySelector('[data-stream-url]');
+    if (streamRoot && window.EventSource) {
+        const lessonList = document.getElementById('lesson-list');
+        const introContainer = document.getElementById('course-intro');
+        const linksContainer = document.getElementById('course-links');
+        const streamStatus = document.getElementById('stream-status');
+        const lessonCards = new Map();
+        const pendingTests = {};
+        const phaseLabels = {
+            assistant: 'Researching your topic...',
+            tutoring: 'Planning and writing lessons...',
+            testing: 'Creating practice quizzes...',
+            saving: 'Saving your course...'
+        };
+
+        function setStatus(text, finished) {
+            if (!streamStatus) return;
+            streamStatus.textContent = text;
+            streamStatus.classList.toggle('finished', Boolean(finished));
+        }
+
+        function ensureLessonCard(title) {
+            if (lessonCards.has(title)) return lessonCards.get(title);
+
+            const card = document.createElement('div');
+            card.className = 'lesson-card pending';
+            card.style.setProperty('--index', lessonCards.size);
+
+            const header = document.createElement('div');
+            header.className = 'lesson-header';
+            const heading = document.createElement('h3');
+            heading.style.margin = '0';
+            heading.style.fontSize = '1.1rem';
+            heading.textContent = title;
+            const headingWrap = document.createElement('div');
+            headingWrap.appendChild(heading);
+            const toggle = document.createElement('span');
+            toggle.className = 'lesson-toggle';
+            toggle.textContent = '▼';
+            header.appendChild(headingWrap);
+            header.appendChild(toggle);
+
+            const content = document.createElement('div');
+            content.className = 'lesson-content';
+            const body = document.createElement('div');
+            body.className = 'lesson-body';
+            body.style.color = 'var(--light-grey)';
+            body.style.lineHeight = '1.8';
+            body.innerHTML = '<p class="stream-placeholder">Writing this lesson...</p>';
+            content.appendChild(body);
+
+            card.appendChild(header);
+            card.appendChild(content);
+            lessonList.appendChild(card);
+            lessonCards.set(title, card);
+            return card;
+        }
+
+        function setQuiz(card, html) {
+            let quiz = card.querySelector('.quiz-section');
+            if (!quiz) {
+                quiz = document.createElement('div');
+                quiz.className = 'quiz-section';
+                quiz.innerHTML = '<h4 class="quiz-title">📝 Practice Quiz</h4>' +
+                    '<div class="quiz-body" style="color: var(--light-grey); line-height: 1.8;"></div>';
+                card.querySelector('.lesson-content').appendChild(quiz);
+            }
+            quiz.querySelector('.quiz-body').innerHTML = html;
+        }
+
+        const source = new EventSource(streamRoot.dataset.streamUrl);
+
+        source.addEventListener('phase', e => {
+            const data = JSON.parse(e.data);
+            if (phaseLabels[data.phase]) setStatus(phaseLabels[data.phase]);
+        });
+
+        source.addEventListener('guide', e => {
+            const data = JSON.parse(e.data);
+            if (introContainer) introContainer.innerHTML = data.intro;
+            if (linksContainer) {
+                linksContainer.innerHTML = '';
+                (data.links || []).forEach(link => {
+                    const anchor = document.createElement('a');
+                    anchor.href = link.url;
+                    anchor.target = '_blank';
+                    anchor.className = 'study-link';
+                    anchor.textContent = '📚 ' + (link.title || 'Resource Link');
+                    linksContainer.appendChild(anchor);
+                });
             }
         });
+
+        source.addEventListener('plan', e => {
+            JSON.parse(e.data).titles.forEach(ensureLessonCard);
+        });
+
+        source.addEventListener('lessons', e => {
+            const lessons = JSON.parse(e.data).lessons;
+            Object.keys(lessons).forEach(title => {
+                const card = ensureLessonCard(title);
+                card.querySelector('.lesson-body').innerHTML = lessons[title];
+                card.classList.remove('pending');
+                if (pendingTests[title]) {
+                    setQuiz(card, pendingTests[title]);
+                    delete pendingTests[title];
+                }
+            });
+        });
+
+        source.addEventListener('tests', e => {
+            const tests = JSON.parse(e.data).tests;
+            Object.keys(tests).forEach(title => {
+                if (lessonCards.has(title)) {
+                    setQuiz(lessonCards.get(title), tests[title]);
+                } else {
+                    pendingTests[title] = tests[title];
+                }
+            });
+        });
+
+        source.addEventListener('done', e => {
+            const data = JSON.parse(e.data);
+            source.close();
+            setStatus('Your course is ready!', true);
+            if (data.url) window.history.replaceState(null, '', data.url);
+        });
+
+        // Named 'error' events carry a message; plain connection errors are retried by EventSource
+        source.addEventListener('error', e => {
+            if (!e.data) return;
+            source.close();
+            setStatus('Error during generation: ' + JSON.parse(e.data).error, true);
+        });
     }
     
     // ===================================
@@ -248,18 +410,53 @@ document.addEventListener('DOMContentLoaded', function() {
     // ===================================
     // LESSON ACCORDION & OTHER UI
     // ===================================
-    const lessonHeaders = document.querySelectorAll('.lesson-header');
-    lessonHeaders.forEach((header, index) => {
+    // Delegated so that lesson cards added while streaming behave the same
+    document.querySelectorAll('.lesson-header').forEach((header, index) => {
         header.style.setProperty('--index', index);
-        header.addEventListener('click', function() {
-            const lessonCard = this.parentElement;
-            const isActive = lessonCard.classList.contains('active');
-            document.querySelectorAll('.lesson-card').forEach(card => card.classList.remove('active'));
-            if (!isActive) {
-                lessonCard.classList.add('active');
-                setTimeout(() => lessonCard.scrollIntoView({ behavior: 'smooth', block: 'nearest' }), 100);
-            }
+    });
+    // Stored courses ship titles only; a lesson and its quiz are fetched on first open
+    function fetchFragment(url) {
+        return fetch(url).then(response => {
+            if (!response.ok) throw new Error(response.status);
+            return response.text();
         });
+    }
+
+    function loadLesson(card) {
+        if (!card.dataset.lessonUrl || card.dataset.loaded) return;
+        card.dataset.loaded = 'true';
+        const body = card.querySelector('.lesson-body');
+
+        fetchFragment(card.dataset.lessonUrl)
+            .then(html => { body.innerHTML = html; })
+            .catch(() => {
+                delete card.dataset.loaded;
+                body.innerHTML = '<p class="stream-placeholder">Could not load this lesson. Open it again to retry.</p>';
+            });
+
+        if (card.dataset.testUrl && !card.querySelector('.quiz-section')) {
+            fetchFragment(card.dataset.testUrl).then(html => {
+                const quiz = document.createElement('div');
+                quiz.className = 'quiz-section';
+                quiz.innerHTML = '<h4 class="quiz-title">📝 Practice Quiz</h4>' +
+                    '<div class="quiz-body" style="color: var(--light-grey); line-height: 1.8;"></div>';
+                quiz.querySelector('.quiz-body').innerHTML = html;
+                card.querySelector('.lesson-content').appendChild(quiz);
+            }).catch(() => {});
+        }
+    }
+
+    document.addEventListener('click', function(e) {
+        const header = e.target.closest('.lesson-header');
+        if (!header) return;
+        const lessonCard = header.parentElement;
+        loadLesson(lessonCard);
+        const isActive = lessonCard.classList.contains('active');
+        document.querySelectorAll('.lesson-card').forEach(card => card.classList.remove('active'));
+        if (!isActive) {
+            lessonCard.classList.add('active');
+            setTimeout(() => lessonCard.scrollIntoView({ behavior: 'smooth', block: 'nearest' }), 100);
+        }
     });
 
     document.querySelectorAll('.lesson-card').forEach((card, index) => {
@@ -0,0 +1,22 @@
+from backend.src.course_cache import MISSING_LESSON, missing_test, failed_parts
+
+def test_failed_parts_matches_placeholders_only():
+
+    content = {
+        "lessons": {
+            "Errors in measurement": "<p>Errors in measurement come from the instrument and the observer.</p>",
+            "Significant figures": MISSING_LESSON
+        },
+        "tests": {
+            "Errors in measurement": "<p>Error: which of these is a systematic error?</p>",
+            "Significant figures": missing_test("Significant figures")
+        }
+    }
+
+    assert failed_parts(content) == ["Significant figures", "Significant figures"]
+
+def test_failed_search_is_a_failed_part():
+
+    content = {"lessons": {"Optics": "<p>Light</p>"}, "tests": {}, "search_failed": True}
+
+    assert failed_parts(content) == ["Study links"]
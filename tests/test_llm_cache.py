@@ -0,0 +1,54 @@
+import asyncio
+from langchain_core.messages import AIMessage, SystemMessage
+from backend.src.cache import SQLiteCache
+from backend.src.llm_cache import CachedLLM, has_parts
+
+class ScriptedLLM:
+
+    """Returns the given responses in order and counts the calls."""
+
+    def __init__(self, *contents):
+
+        self.contents = list(contents)
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+
+        self.calls += 1
+
+        return AIMessage(content=self.contents.pop(0))
+
+def cached_llm(tmp_path, llm):
+
+    cache = SQLiteCache(str(tmp_path / "llm.db"), "llm_responses", ttl=3600, max_entries=100)
+
+    return CachedLLM(llm, cache, "test-model", 0.0)
+
+def test_malformed_batch_is_not_cached(tmp_path):
+
+    complete = "<p>one</p>\n|||LESSON_SPLIT|||\n<p>two</p>\n|||LESSON_SPLIT|||\n<p>three</p>"
+    llm = ScriptedLLM("<p>one</p> (truncated", complete, "unused")
+    cached = cached_llm(tmp_path, llm)
+    messages = [SystemMessage(content="Write the following 3 lessons")]
+    validate = has_parts("|||LESSON_SPLIT|||", 3)
+
+    # The truncated batch is returned to the caller but not stored...
+    assert asyncio.run(cached.ainvoke(messages, validate=validate)).content == "<p>one</p> (truncated"
+
+    # ...so the next call reaches the model, and its complete answer is cached
+    assert asyncio.run(cached.ainvoke(messages, validate=validate)).content == complete
+    assert asyncio.run(cached.ainvoke(messages, validate=validate)).content == complete
+    assert llm.calls == 2
+
+def test_responses_without_validator_are_cached(tmp_path):
+
+    llm = ScriptedLLM("<p>plan</p>", "unused")
+    cached = cached_llm(tmp_path, llm)
+    messages = [SystemMessage(content="Plan the course")]
+
+    asyncio.run(cached.ainvoke(messages))
+    response = asyncio.run(cached.ainvoke(messages))
+
+    assert response.content == "<p>plan</p>"
+    assert response.response_metadata["cache_hit"] is True
+    assert llm.calls == 1
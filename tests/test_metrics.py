@@ -0,0 +1,9 @@
+from backend.src.metrics import Counter
+
+def test_counter_renders_every_digit():
+
+    counter = Counter("sensai_test_tokens_total", "Tokens.", ("model",))
+    counter.inc(1234567, model="a")
+    counter.inc(0.25, model="b")
+
+    assert counter.render()[2:] == ['sensai_test_tokens_total{model="a"} 1234567', 'sensai_test_tokens_total{model="b"} 0.25']
@@ -0,0 +1,46 @@
+import time
+import asyncio
+import pytest
+from backend.src.cache import SQLiteCache
+from backend.src.search import CachedSearch, SearchError, parse_results
+
+class ErrorPayloadBackend:
+
+    """Answers like TavilySearch during an outage: an error payload, no exception."""
+
+    def __init__(self):
+
+        self.calls = 0
+
+    async def search(self, query: str) -> list:
+
+        self.calls += 1
+
+        return parse_results({"error": "Rate limit exceeded"})
+
+def test_parse_results_raises_on_error_payload():
+
+    with pytest.raises(RuntimeError, match="Rate limit exceeded"):
+
+        parse_results({"error": "Rate limit exceeded"})
+
+    assert parse_results({"results": [{"url": "https://a", "title": "A"}]}) == [{"url": "https://a", "title": "A"}]
+
+def test_error_payload_is_negatively_cached(tmp_path):
+
+    cache = SQLiteCache(str(tmp_path / "search.db"), "search_results", ttl=24 * 3600, max_entries=100)
+    backend = ErrorPayloadBackend()
+    search = CachedSearch(backend, cache, negative_ttl=300)
+
+    # Raised both times, but the API is only asked once
+    for query in ("Optics", "optics"):
+
+        with pytest.raises(SearchError, match="Rate limit exceeded"):
+
+            asyncio.run(search.search(query))
+
+    assert backend.calls == 1
+
+    # Kept for the short negative TTL only, not the 24h of a real result
+    expires_at = cache._conn.execute("SELECT expires_at FROM search_results").fetchone()[0]
+    assert expires_at - time.time() <= 300